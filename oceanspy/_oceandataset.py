@@ -3,6 +3,9 @@
 # This is the main object of OceanSpy.
 # All attributes are stored as global attributes (strings!) of the xr.Dataset.
 # When users request an attribute, it is decoded from the global attributes.
+# Decoded attributes are kept in memory (_DECODED_ATTRS, keyed by the strings),
+# so strings are decoded only once, even by new OceanDatasets.
+# Always use _read_from_global_attr and _store_as_global_attr.
 # Thus, there are custom attribute setters (class setters are inhibited).
 #
 # There are private and public objects.
@@ -40,6 +43,7 @@ import xarray as _xr
 # From OceanSpy (private)
 from . import utils as _utils
 from ._ospy_utils import (
+    _cached_spatial_index,
     _check_instance,
     _check_list_of_string,
     _check_oceanspy_axes,
@@ -66,6 +70,11 @@ try:
 except ImportError:  # pragma: no cover
     pass
 
+# Decoded global attributes, keyed by the raw strings (shared by all OceanDatasets).
+# Never return these objects: return copies (see _copy_metadata).
+_DECODED_ATTRS = _OrderedDict()
+_DECODED_ATTRS_MAXSIZE = 128
+
 
 class OceanDataset:
     """
@@ -94,15 +103,40 @@ class OceanDataset:
         # Initialize dataset
         self._ds = dataset.copy()
 
+        # Initialize decoded objects (e.g., projection)
+        self._metadata = {}
+
+        # Initialize grid cache
+        self._grid_cache = {}
+        self._grid_cache_stats = {"hits": 0, "misses": 0}
+
+        # Diagnostics cache (opt-in)
+        self._diagnostics_cache = None
+
         # Apply aliases
         self = self._apply_aliases()
 
     def __copy__(self):
         """
-        Shallow copy
+        Shallow copy.
+        The new OceanDataset shares the underlying data with the original one
+        (copy-on-write): only the metadata can diverge.
         """
 
-        return OceanDataset(dataset=self.dataset.copy())
+        od = OceanDataset.__new__(OceanDataset)
+        od._ds = self._ds.copy(deep=False)
+
+        # Same global attributes, no need to decode them again
+        od._metadata = dict(self._metadata)
+
+        # Same dimensions and metadata, so the grid is still valid
+        od._grid_cache = dict(self._grid_cache)
+        od._grid_cache_stats = {"hits": 0, "misses": 0}
+
+        # Results are keyed by dataset identity, so the cache can be shared
+        od._diagnostics_cache = self._diagnostics_cache
+
+        return od
 
     def __repr__(self):
         main_info = ["<oceanspy.OceanDataset>"]
@@ -262,10 +296,11 @@ class OceanDataset:
         From {'ospy_name': 'custom_name'}
         to {'custom_name': 'ospy_name'}
         """
-        if self.aliases:
-            aliases_flipped = {custom: ospy for ospy, custom in self.aliases.items()}
+        aliases = self.aliases
+        if aliases:
+            aliases_flipped = {custom: ospy for ospy, custom in aliases.items()}
         else:
-            return self.aliases
+            return aliases
 
         return aliases_flipped
 
@@ -304,6 +339,9 @@ class OceanDataset:
         # Apply aliases
         self = self._apply_aliases()
 
+        # Grid dimensions might have been renamed
+        self._invalidate_grid_cache()
+
         return self
 
     def _apply_aliases(self):
@@ -336,10 +374,11 @@ class OceanDataset:
 
         # Show _ds with renamed variables.
         dataset = self._ds.copy()
-        if self.aliases:
+        aliases = self.aliases
+        if aliases:
             aliases = {
                 ospy: custom
-                for ospy, custom in self.aliases.items()
+                for ospy, custom in aliases.items()
                 if ospy in self._ds or ospy in self._ds.dims
             }
             dataset = dataset.rename(aliases)
@@ -539,6 +578,10 @@ class OceanDataset:
             self = self._store_as_global_attr(
                 name="grid_coords", attr=grid_coords, overwrite=False
             )
+
+        # Grid must be rebuilt
+        self._invalidate_grid_cache()
+
         return self
 
     # -------------------
@@ -589,6 +632,9 @@ class OceanDataset:
             name="grid_periodic", attr=grid_periodic, overwrite=True
         )
 
+        # Grid must be rebuilt
+        self._invalidate_grid_cache()
+
         return self
 
     # -----------------
@@ -642,6 +688,10 @@ class OceanDataset:
         self = self._store_as_global_attr(
             name="face_connections", attr=face_connections, overwrite=True
         )
+
+        # Grid must be rebuilt
+        self._invalidate_grid_cache()
+
         return self
 
     # -------------------
@@ -655,16 +705,22 @@ class OceanDataset:
         along the same physical dimension
         but describe different positions relative to a grid cell.
 
+        The grid is cached, and it is rebuilt only when
+        the grid metadata or the dimensions of the dataset change.
+
         References
         ----------
         https://xgcm.readthedocs.io/en/stable/api.html#Grid
         """
 
-        dataset = self.dataset.copy()
-        coords = self.grid_coords
-        periodic = self.grid_periodic
-        face_connections = self.face_connections
-        grid = _create_grid(dataset, coords, periodic, face_connections)
+        grid = self._read_from_grid_cache("grid")
+        if grid is False:
+            dataset = self.dataset.copy()
+            coords = self.grid_coords
+            periodic = self.grid_periodic
+            face_connections = self.face_connections
+            grid = _create_grid(dataset, coords, periodic, face_connections)
+            self._store_in_grid_cache("grid", grid)
 
         return grid
 
@@ -674,6 +730,10 @@ class OceanDataset:
         :py:obj:`xgcm.Grid` with OceanSpy reference names.
         """
 
+        grid = self._read_from_grid_cache("_grid")
+        if grid is not False:
+            return grid
+
         aliases = self.aliases
         coords = self.grid_coords
 
@@ -691,9 +751,102 @@ class OceanDataset:
         periodic = self.grid_periodic
         face_connections = self.face_connections
         grid = _create_grid(dataset, coords, periodic, face_connections)
+        self._store_in_grid_cache("_grid", grid)
 
         return grid
 
+    @property
+    def grid_cache_info(self):
+        """
+        Statistics of the :py:obj:`xgcm.Grid` cache:
+        {'hits': int, 'misses': int, 'currsize': int}.
+        A miss means that the grid has been (re)built.
+        """
+
+        return {**self._grid_cache_stats, "currsize": len(self._grid_cache)}
+
+    def enable_diagnostics_cache(self, maxsize=32, maxbytes=2**30, persist=False):
+        """
+        Cache the results of diagnostics
+        (gradient, divergence, curl, laplacian, weighted_mean, and integral),
+        so they are not computed again when called with the same arguments.
+        Results are keyed by function, arguments, and dataset identity
+        (names of dask arrays, identity of in-memory arrays, and metadata).
+        In-memory arrays modified in place are not detected.
+
+        Parameters
+        ----------
+        maxsize: int
+            Maximum number of cached results.
+        maxbytes: int
+            Maximum size in bytes of cached results held in memory
+            (persisted or not lazy). Lazy results are not counted.
+            Least recently used results are evicted first.
+        persist: bool
+            If True, persist the cached results.
+
+        Returns
+        -------
+        od: OceanDataset
+            oceandataset with diagnostics cache.
+
+        References
+        ----------
+        https://docs.xarray.dev/en/stable/generated/xarray.Dataset.persist.html
+        """
+
+        _check_instance(
+            {"maxsize": maxsize, "maxbytes": maxbytes, "persist": persist},
+            {"maxsize": "int", "maxbytes": "int", "persist": "bool"},
+        )
+        od = _copy.copy(self)
+        od._diagnostics_cache = {
+            "results": _OrderedDict(),
+            "stats": {"hits": 0, "misses": 0, "evictions": 0},
+            "maxsize": maxsize,
+            "maxbytes": maxbytes,
+            "persist": persist,
+        }
+
+        return od
+
+    def disable_diagnostics_cache(self):
+        """
+        Disable the diagnostics cache, and remove all cached results.
+
+        Returns
+        -------
+        od: OceanDataset
+            oceandataset without diagnostics cache.
+        """
+
+        od = _copy.copy(self)
+        od._diagnostics_cache = None
+
+        return od
+
+    @property
+    def diagnostics_cache_info(self):
+        """
+        Statistics of the diagnostics cache:
+        {'hits': int, 'misses': int, 'evictions': int,
+        'currsize': int, 'nbytes': int, 'maxsize': int, 'maxbytes': int}.
+        None if the cache is not enabled.
+        """
+
+        cache = self._diagnostics_cache
+        if cache is None:
+            return None
+
+        results = cache["results"]
+        return {
+            **cache["stats"],
+            "currsize": len(results),
+            "nbytes": sum(nbytes for _, nbytes, _ in results.values()),
+            "maxsize": cache["maxsize"],
+            "maxbytes": cache["maxbytes"],
+        }
+
     @grid.setter
     def grid(self, grid):
         """
@@ -733,7 +886,14 @@ class OceanDataset:
                     )
                     projection = None
                 else:
-                    projection = eval("_ccrs.{}".format(projection))
+                    # Cartopy projections are expensive to create
+                    cached = self._metadata.get("_projection_crs")
+                    if cached is not None and cached[0] == projection:
+                        projection = cached[1]
+                    else:
+                        crs = eval("_ccrs.{}".format(projection))
+                        self._metadata["_projection_crs"] = (projection, crs)
+                        projection = crs
 
         return projection
 
@@ -797,6 +957,13 @@ class OceanDataset:
         tree: scipy.spatial.cKDTree
             Return a xKDTree object that can be used to query a point.
 
+        Notes
+        -----
+        Trees are cached in memory, and they are built only once for each grid.
+        Set the environment variable OCEANSPY_CACHE_DIR to also store them on disk,
+        so they can be reused across sessions. Cached trees are unpickled,
+        so only use a trusted directory.
+
         References
         ----------
         | cKDTree:
@@ -817,25 +984,30 @@ class OceanDataset:
                 "".format(grid_pos_list)
             )
 
-        # Convert if it's not cartesian
         Y = self._ds["Y" + grid_pos]
         X = self._ds["X" + grid_pos]
         R = self.parameters["rSphere"]
-        if R:
-            x, y, z = _utils.spherical2cartesian(Y=Y, X=X, R=R)
-        else:
-            x = X
-            y = Y
-            z = _xr.zeros_like(Y)
 
-        # Stack
-        rid_value = 777777
-        x_stack = x.stack(points=x.dims).fillna(rid_value).data
-        y_stack = y.stack(points=y.dims).fillna(rid_value).data
-        z_stack = z.stack(points=z.dims).fillna(rid_value).data
+        def build():
+            # Convert if it's not cartesian
+            if R:
+                x, y, z = _utils.spherical2cartesian(Y=Y, X=X, R=R)
+            else:
+                x = X
+                y = Y
+                z = _xr.zeros_like(Y)
+
+            # Stack
+            rid_value = 777777
+            x_stack = x.stack(points=x.dims).fillna(rid_value).data
+            y_stack = y.stack(points=y.dims).fillna(rid_value).data
+            z_stack = z.stack(points=z.dims).fillna(rid_value).data
+
+            # Construct KD-tree
+            return _spatial.cKDTree(_np.column_stack((x_stack, y_stack, z_stack)))
 
-        # Construct KD-tree
-        tree = _spatial.cKDTree(_np.column_stack((x_stack, y_stack, z_stack)))
+        # Reuse trees of the same grid
+        tree = _cached_spatial_index("cKDTree", (X.dims, X.data, Y.data, R), build)
 
         return tree
 
@@ -907,7 +1079,9 @@ class OceanDataset:
             for dim, attr in attrs.items():
                 dataset[dim].attrs = attr
 
-        return OceanDataset(dataset)
+        od = OceanDataset(dataset)
+        od._diagnostics_cache = self._diagnostics_cache
+        return od
 
     def to_netcdf(self, path, **kwargs):
         """
@@ -1233,16 +1407,137 @@ class OceanDataset:
 
         # Store
         if not overwrite and name in self._ds.attrs:
-            prev_attr = self._ds.attrs[name]
-            if prev_attr[0] == "{" and prev_attr[-1] == "}":
-                attr = {**eval(prev_attr), **attr}
+            prev_attr = self._read_from_global_attr(name.replace("OceanSpy_", ""))
+            if isinstance(prev_attr, dict):
+                attr = {**prev_attr, **attr}
             else:
-                attr = prev_attr + "_" + attr
+                attr = self._ds.attrs[name] + "_" + attr
 
+        # Encode, and keep the decoded attribute in memory
         self._ds.attrs[name] = str(attr)
+        if isinstance(attr, (dict, list)):
+            _cache_decoded_attr(self._ds.attrs[name], _copy_metadata(attr))
 
         return self
 
+    def _grid_cache_key(self):
+        """
+        Key used to check that cached grids are still valid.
+        Grids must be rebuilt when the dimensions of _ds change.
+        """
+
+        return tuple(sorted(self._ds.sizes.items()))
+
+    def _read_from_grid_cache(self, name):
+        """
+        Read a cached grid.
+
+        Parameters
+        ----------
+        name: str
+            Name of the grid: {'grid', '_grid'}
+
+        Returns
+        -------
+        grid: xgcm.Grid, None, or False
+            False if the grid is not cached or it is not valid anymore.
+        """
+
+        key, grid = self._grid_cache.get(name, (None, False))
+        if grid is not False and key == self._grid_cache_key():
+            self._grid_cache_stats["hits"] += 1
+            return grid
+
+        self._grid_cache_stats["misses"] += 1
+        return False
+
+    def _store_in_grid_cache(self, name, grid):
+        """
+        Store a grid in the cache.
+
+        Parameters
+        ----------
+        name: str
+            Name of the grid: {'grid', '_grid'}
+        grid: xgcm.Grid or None
+            Grid to store.
+        """
+
+        self._grid_cache[name] = (self._grid_cache_key(), grid)
+
+    def _invalidate_grid_cache(self):
+        """
+        Remove all cached grids.
+        They will be rebuilt next time they are requested.
+        """
+
+        self._grid_cache = {}
+
+    def _read_from_diagnostics_cache(self, key):
+        """
+        Read a cached diagnostic.
+
+        Parameters
+        ----------
+        key: tuple
+            Function name, token of arguments, and dataset identity.
+
+        Returns
+        -------
+        ds: xarray.Dataset or None
+            None if the result is not cached.
+        """
+
+        cache = self._diagnostics_cache
+        if key not in cache["results"]:
+            cache["stats"]["misses"] += 1
+            return None
+
+        cache["stats"]["hits"] += 1
+        cache["results"].move_to_end(key)
+        ds, _, _ = cache["results"][key]
+        return ds.copy()
+
+    def _store_in_diagnostics_cache(self, key, ds, refs):
+        """
+        Store a diagnostic in the cache,
+        and evict least recently used results if needed.
+
+        Parameters
+        ----------
+        key: tuple
+            Function name, token of arguments, and dataset identity.
+        ds: xarray.Dataset
+            Diagnostic to store.
+        refs: list
+            In-memory arrays identifying the dataset,
+            kept along with the result so that their ids are not reused.
+
+        Returns
+        -------
+        ds: xarray.Dataset
+            Stored diagnostic (persisted if requested).
+        """
+
+        cache = self._diagnostics_cache
+        if cache["persist"]:
+            ds = ds.persist()
+            nbytes = ds.nbytes
+        else:  # Lazy variables only hold their graph
+            nbytes = sum(
+                var.nbytes for var in ds.data_vars.values() if var.chunks is None
+            )
+
+        results = cache["results"]
+        results[key] = (ds, nbytes, refs)
+        while len(results) > cache["maxsize"] or (
+            sum(nbytes for _, nbytes, _ in results.values()) > cache["maxbytes"]
+        ):
+            results.popitem(last=False)
+            cache["stats"]["evictions"] += 1
+
+        return ds.copy()
+
     def _read_from_global_attr(self, name):
         """
         Read an OceanSpy attribute stored as dataset global attribute.
@@ -1271,7 +1566,15 @@ class OceanDataset:
         check_dict = attr[0] == "{" and attr[-1] == "}"
         check_list = attr[0] == "[" and attr[-1] == "]"
         if check_dict or check_list:
-            attr = eval(attr)
+            # Decode only once (hash lookup of the raw string)
+            decoded = _DECODED_ATTRS.get(attr)
+            if decoded is None:
+                decoded = _cache_decoded_attr(attr, eval(attr))
+            else:
+                _DECODED_ATTRS.move_to_end(attr)
+
+            # Return a copy, so the decoded attribute can't be modified
+            attr = _copy_metadata(decoded)
 
         return attr
 
@@ -1310,3 +1613,51 @@ class OceanDataset:
         """
 
         return _animateMethods(self)
+
+
+def _cache_decoded_attr(raw, decoded):
+    """
+    Store a decoded global attribute in _DECODED_ATTRS (LRU).
+
+    Parameters
+    ----------
+    raw: str
+        Global attribute.
+    decoded: dict or list
+        Decoded attribute (not shared with callers).
+
+    Returns
+    -------
+    decoded: dict or list
+        Decoded attribute
+    """
+
+    _DECODED_ATTRS[raw] = decoded
+    _DECODED_ATTRS.move_to_end(raw)
+    while len(_DECODED_ATTRS) > _DECODED_ATTRS_MAXSIZE:
+        _DECODED_ATTRS.popitem(last=False)
+
+    return decoded
+
+
+def _copy_metadata(attr):
+    """
+    Copy nested dictionaries and lists of decoded attributes.
+    Much faster than deepcopy, as all other objects are immutable.
+
+    Parameters
+    ----------
+    attr: dict, list, or immutable object
+        Decoded attribute
+
+    Returns
+    -------
+    attr: dict, list, or immutable object
+        Copy of the decoded attribute
+    """
+
+    if isinstance(attr, dict):
+        return {key: _copy_metadata(value) for key, value in attr.items()}
+    if isinstance(attr, list):
+        return [_copy_metadata(value) for value in attr]
+    return attr
@@ -2,12 +2,34 @@
 # This modules collect useful functions used by OceanSpy.
 # All functions here must be private (names start with underscore `_`)
 
+import functools
+import importlib.metadata
+import inspect
+import os
+import pickle
 import warnings
+from collections import OrderedDict
 
 # Import modules (can be public here)
+import dask.array
 import numpy
+import pandas
 import xarray as _xr
 import xgcm
+from dask.base import tokenize
+from dask.utils import parse_bytes
+
+# Recommended dependencies
+try:
+    import xoak as _xoak
+except ImportError:  # pragma: no cover
+    pass
+
+# Spatial indexes (e.g., KD-trees, LLC transform plans) are expensive to build,
+# so they are cached (in memory and optionally on disk).
+# Keys are fingerprints of the grid coordinates.
+_SPATIAL_INDEX_CACHE = OrderedDict()
+_SPATIAL_INDEX_CACHE_MAXSIZE = 8
 
 
 # =========
@@ -376,6 +398,801 @@ def _restore_coord_attrs(ds):
     return ds
 
 
+def _cache_dir():
+    """
+    Local directory used to persist cached objects across sessions.
+    Set the environment variable OCEANSPY_CACHE_DIR to enable the disk cache.
+    Cached objects are unpickled, so the directory must be trusted
+    (never point it to files written by others).
+
+    Returns
+    -------
+    cache_dir: str or None
+        None if the disk cache is disabled.
+    """
+    cache_dir = os.environ.get("OCEANSPY_CACHE_DIR")
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _cache_versions():
+    """
+    Versions of the libraries used to build and pickle cached objects.
+    They are part of the cache keys, so objects cached by other versions
+    are rebuilt rather than loaded.
+
+    Returns
+    -------
+    versions: tuple
+        (library, version) pairs (version is None if not installed).
+    """
+    from . import __version__
+
+    versions = [("oceanspy", __version__)]
+    for library in ["numpy", "scipy", "xoak"]:
+        try:
+            versions += [(library, importlib.metadata.version(library))]
+        except importlib.metadata.PackageNotFoundError:  # pragma: no cover
+            versions += [(library, None)]
+    return tuple(versions)
+
+
+def _load_from_disk_cache(name, token):
+    """
+    Load an object pickled in the disk cache.
+
+    Parameters
+    ----------
+    name: str
+        Type of the cached object
+    token: str
+        Fingerprint of the cached object
+
+    Returns
+    -------
+    obj: object or None
+        None if the object is not available.
+    """
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return None
+    path = os.path.join(cache_dir, "{}_{}.pkl".format(name, token))
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing, corrupted, or incompatible (e.g., ImportError): rebuild
+        return None
+
+
+def _store_in_disk_cache(name, token, obj):
+    """
+    Pickle an object in the disk cache (if enabled).
+
+    Parameters
+    ----------
+    name: str
+        Type of the cached object
+    token: str
+        Fingerprint of the cached object
+    obj: object
+        Object to cache
+    """
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return
+    path = os.path.join(cache_dir, "{}_{}.pkl".format(name, token))
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _cached_spatial_index(name, fingerprint, build):
+    """
+    Return a spatial index, building it only if it is not cached.
+    Indexes are cached in memory (LRU), and on disk if OCEANSPY_CACHE_DIR is set
+    (see _cache_dir). Library versions are part of the keys.
+
+    Parameters
+    ----------
+    name: str
+        Type of index (e.g., 'cKDTree', 'scipy_kdtree', 'arctic_crown_plan')
+    fingerprint: tuple
+        Objects (e.g., coordinates) that uniquely define the index.
+    build: callable
+        Function without arguments that builds the index.
+
+    Returns
+    -------
+    index: object
+        Spatial index.
+    """
+    token = tokenize(name, _cache_versions(), *fingerprint)
+    key = (name, token)
+
+    # Memory
+    if key in _SPATIAL_INDEX_CACHE:
+        _SPATIAL_INDEX_CACHE.move_to_end(key)
+        return _SPATIAL_INDEX_CACHE[key]
+
+    # Disk or build
+    index = _load_from_disk_cache(name, token)
+    if index is None:
+        index = build()
+        if index is not None:
+            _store_in_disk_cache(name, token, index)
+
+    _SPATIAL_INDEX_CACHE[key] = index
+    while len(_SPATIAL_INDEX_CACHE) > _SPATIAL_INDEX_CACHE_MAXSIZE:
+        _SPATIAL_INDEX_CACHE.popitem(last=False)
+
+    return index
+
+
+def _dataset_identity(ds):
+    """
+    Cheap identity of a dataset, used to key cached diagnostics
+    without hashing the data.
+    Dask variables are identified by their name (a token of the graph),
+    in-memory variables by the id of their data,
+    and small index variables by their values.
+
+    Parameters
+    ----------
+    ds: xarray.Dataset
+
+    Returns
+    -------
+    token: str
+    refs: list
+        In-memory data identified by id.
+        Keep them alive as long as the token is used,
+        so that their ids are not reused.
+    """
+    variables = []
+    refs = []
+    for name, var in ds.variables.items():
+        if isinstance(var, _xr.IndexVariable):
+            data = tokenize(var)
+        elif var.chunks is not None:
+            data = var.data.name
+        else:
+            refs.append(var._data)
+            data = id(var._data)
+        variables.append((name, var.dims, var.attrs, data))
+
+    return tokenize(ds.attrs, variables), refs
+
+
+def _cached_diagnostic(func):
+    """
+    Decorator caching the results of func(od, ...) on the oceandataset,
+    if enabled (see OceanDataset.enable_diagnostics_cache).
+    Results are keyed by function name, arguments,
+    and dataset identity (see _dataset_identity).
+
+    Parameters
+    ----------
+    func: callable
+        Function taking an OceanDataset as first argument,
+        and returning a xarray.Dataset.
+
+    Returns
+    -------
+    wrapper: callable
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(od, *args, **kwargs):
+        if getattr(od, "_diagnostics_cache", None) is None:
+            return func(od, *args, **kwargs)
+
+        # Same key for positional and keyword arguments
+        arguments = signature.bind(od, *args, **kwargs)
+        arguments.apply_defaults()
+        arguments = dict(arguments.arguments)
+        arguments.pop(next(iter(signature.parameters)))
+        token, refs = _dataset_identity(od._ds)
+        key = (func.__name__, tokenize(arguments), token)
+
+        ds = od._read_from_diagnostics_cache(key)
+        if ds is None:
+            ds = func(od, *args, **kwargs)
+            ds = od._store_in_diagnostics_cache(key, ds, refs)
+        return ds
+
+    return wrapper
+
+
+@functools.lru_cache(maxsize=None)
+def _fused_stencil_kernels():
+    """
+    Compile (once) the Numba kernels used by the fused stencil backend.
+    Kernels are generalized ufuncs operating on horizontal (2D) slices,
+    so that the full stencil is evaluated in a single pass.
+
+    Returns
+    -------
+    kernels: dict
+        | diff: (f[a] - f[a-1]) / den
+        | wdiff: ((f*w1*w2)[a] - (f*w1*w2)[a-1]) / (den1*den2)
+        | curl: (diff_X(v*wv) - diff_Y(u*wu)) / den
+        | where a = index + offset along the differentiated axis,
+        | and out of bounds is NaN.
+    """
+    try:
+        import numba
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "The fused stencil backend requires numba."
+            "\nInstall numba, or use backend='xgcm'."
+        )
+
+    def _sigs(nargs, nscalars):
+        return [
+            "void({})".format(
+                ", ".join(
+                    ["{}[:, :]".format(dtype)] * nargs
+                    + ["int64"] * nscalars
+                    + ["{}[:, :]".format(dtype)]
+                )
+            )
+            for dtype in ["float32", "float64"]
+        ]
+
+    @numba.guvectorize(
+        _sigs(2, 2), "(m,n),(k,l),(),()->(k,l)", nopython=True, cache=True
+    )
+    def diff(f, den, axis, offset, out):
+        dj, di = int(axis == 0), int(axis == 1)
+        for j in range(out.shape[0]):
+            for i in range(out.shape[1]):
+                a, b = j + offset * dj, i + offset * di
+                if a < dj or b < di or a >= f.shape[0] or b >= f.shape[1]:
+                    out[j, i] = numpy.nan
+                else:
+                    out[j, i] = (f[a, b] - f[a - dj, b - di]) / den[j, i]
+
+    @numba.guvectorize(
+        _sigs(5, 2),
+        "(m,n),(m,n),(m,n),(k,l),(k,l),(),()->(k,l)",
+        nopython=True,
+        cache=True,
+    )
+    def wdiff(f, w1, w2, den1, den2, axis, offset, out):
+        dj, di = int(axis == 0), int(axis == 1)
+        for j in range(out.shape[0]):
+            for i in range(out.shape[1]):
+                a, b = j + offset * dj, i + offset * di
+                if a < dj or b < di or a >= f.shape[0] or b >= f.shape[1]:
+                    out[j, i] = numpy.nan
+                else:
+                    out[j, i] = (
+                        f[a, b] * w1[a, b] * w2[a, b]
+                        - f[a - dj, b - di] * w1[a - dj, b - di] * w2[a - dj, b - di]
+                    ) / (den1[j, i] * den2[j, i])
+
+    @numba.guvectorize(
+        _sigs(5, 2),
+        "(p,m),(p,m),(q,k),(q,k),(p,k),(),()->(p,k)",
+        nopython=True,
+        cache=True,
+    )
+    def curl(v, wv, u, wu, den, offsetX, offsetY, out):
+        for j in range(out.shape[0]):
+            b = j + offsetY
+            for i in range(out.shape[1]):
+                a = i + offsetX
+                if a < 1 or a >= v.shape[1] or b < 1 or b >= u.shape[0]:
+                    out[j, i] = numpy.nan
+                else:
+                    out[j, i] = (
+                        (v[j, a] * wv[j, a] - v[j, a - 1] * wv[j, a - 1])
+                        - (u[b, i] * wu[b, i] - u[b - 1, i] * wu[b - 1, i])
+                    ) / den[j, i]
+
+    return dict(diff=diff, wdiff=wdiff, curl=curl)
+
+
+def _fused_stencil_axis(od, axis, da):
+    """
+    Check whether the fused stencil backend can differentiate
+    a DataArray along a horizontal axis, and find the output dimensions.
+    Periodic and face-connected axes are left to xgcm.
+
+    Parameters
+    ----------
+    od: OceanDataset
+        oceandataset with the grid.
+    axis: str
+        Axis name ('X' or 'Y').
+    da: xarray.DataArray
+        DataArray to differentiate.
+
+    Returns
+    -------
+    stencil: tuple or None
+        (input horizontal dimensions, output horizontal dimensions,
+        index of the differentiated dimension, offset),
+        or None if the backend can not be used.
+        The difference at output index j is da[j + offset] - da[j + offset - 1].
+    """
+    grid = od._grid
+    axes = ["Y", "X"]
+    if grid is None or any(ax not in grid.axes for ax in axes):
+        return None
+    if axis in od.grid_periodic or od.face_connections or "face" in da.dims:
+        return None
+    positions = {}
+    for ax in axes:
+        coords = grid.axes[ax].coords
+        if len(coords) != 2:
+            return None
+        positions.update({dim: position for position, dim in coords.items()})
+    in_dims = [dim for dim in da.dims if dim in positions]
+    axis_dims = list(grid.axes[axis].coords.values())
+    if len(in_dims) != 2 or len(set(in_dims) & set(axis_dims)) != 1:
+        return None
+    index = [dim in axis_dims for dim in in_dims].index(True)
+    in_dim = in_dims[index]
+    out_dim = [dim for dim in axis_dims if dim != in_dim][0]
+    out_dims = [out_dim if dim == in_dim else dim for dim in in_dims]
+    shifted = (positions[in_dim], positions[out_dim])
+    offset = int(
+        shifted
+        in [
+            ("left", "center"),
+            ("outer", "center"),
+            ("center", "right"),
+            ("center", "inner"),
+        ]
+    )
+    return in_dims, out_dims, index, offset
+
+
+def _fused_stencil(kernel, args, core_dims, out_dims, grid):
+    """
+    Apply a fused stencil kernel (see _fused_stencil_kernels)
+    chunk by chunk, using xarray.apply_ufunc.
+    Core (horizontal) dimensions are merged into single chunks.
+
+    Parameters
+    ----------
+    kernel: str
+        Name of the kernel.
+    args: list
+        Kernel arguments (DataArrays or integers).
+    core_dims: list
+        Core dimensions of each argument.
+    out_dims: list
+        Core dimensions of the output,
+        replacing the core dimensions of the first argument.
+    grid: xgcm.Grid
+        Grid providing the dimension coordinates of the output.
+
+    Returns
+    -------
+    da: xarray.DataArray
+        Dimensions are in the same order of the first argument.
+        Coordinates and attributes are the same of the xgcm backend:
+        non-index coordinates of the differentiated arguments are dropped.
+    """
+    args = [
+        (
+            arg.reset_coords(drop=True)
+            if isinstance(arg, _xr.DataArray) and list(dims) != list(out_dims)
+            else arg
+        )
+        for arg, dims in zip(args, core_dims)
+    ]
+    arrays = [arg for arg in args if isinstance(arg, _xr.DataArray)]
+    dtype = numpy.result_type(*[da.dtype for da in arrays], numpy.float32)
+    sizes = {dim: size for da in arrays for dim, size in da.sizes.items()}
+    # Same attributes as the xgcm backend: grid.diff keeps the attributes
+    # of its argument, then the scaling by metrics follows xarray's keep_attrs
+    # (keep_attrs=None resolves it the same way arithmetic does)
+    da = _xr.apply_ufunc(
+        _fused_stencil_kernels()[kernel],
+        *args,
+        input_core_dims=core_dims,
+        output_core_dims=[out_dims],
+        dask="parallelized",
+        keep_attrs=None,
+        output_dtypes=[dtype],
+        dask_gufunc_kwargs={
+            "output_sizes": {dim: sizes[dim] for dim in out_dims},
+            "allow_rechunk": True,
+        },
+    )
+    dims = [
+        out_dims[core_dims[0].index(dim)] if dim in core_dims[0] else dim
+        for dim in args[0].dims
+    ]
+    coords = {dim: grid._ds[dim].variable for dim in da.dims if dim in grid._ds}
+    da = da.assign_coords(coords)
+    return da.transpose(*dims)
+
+
+def _weighted_moments_block(x, w, axis):
+    """
+    Weighted moments of a block along axis (NaNs are skipped).
+
+    Returns
+    -------
+    stats: numpy.ndarray
+        Stacked (sum of weights, mean, sum of weighted squared anomalies).
+    """
+    valid = ~numpy.isnan(x)
+    x = numpy.where(valid, x, 0)
+    w = numpy.where(valid, w, 0)
+    W = w.sum(axis, keepdims=True)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        mean = (w * x).sum(axis, keepdims=True) / W
+        M2 = (w * (x - mean) ** 2).sum(axis, keepdims=True)
+    return numpy.stack(numpy.broadcast_arrays(W, mean, M2))
+
+
+def _merge_weighted_moments(stats, axis, keepdims=True):
+    """
+    Merge partial weighted moments (see _weighted_moments_block)
+    along axis, using the parallel algorithm of Chan et al.
+    """
+    axis = axis[0] if isinstance(axis, tuple) else axis
+    W, mean, M2 = stats
+    Wt = W.sum(axis - 1, keepdims=True)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        meant = numpy.nansum(W * mean, axis - 1, keepdims=True) / Wt
+        M2t = numpy.nansum(M2 + W * (mean - meant) ** 2, axis - 1, keepdims=True)
+    return numpy.stack([Wt, meant, M2t])
+
+
+def _streaming_moments(da, weight, dim):
+    """
+    Weighted mean and variance along a dimension, computed in a single pass.
+    Moments of each chunk are merged with the parallel algorithm of Chan et al.,
+    so dask arrays are reduced chunk by chunk (Welford-like, numerically stable).
+    NaNs are skipped.
+
+    Parameters
+    ----------
+    da: xarray.DataArray
+        DataArray to reduce.
+    weight: xarray.DataArray
+        1D weights along dim.
+    dim: str
+        Dimension to reduce.
+
+    Returns
+    -------
+    mean: xarray.DataArray
+        Weighted mean.
+    var: xarray.DataArray
+        Weighted (population) variance.
+
+    References
+    ----------
+    Chan, T. F., Golub, G. H., & LeVeque, R. J. (1983).
+    Algorithms for computing the sample variance: Analysis and recommendations.
+    The American Statistician, 37(3), 242-247.
+    """
+    axis = da.get_axis_num(dim)
+    shape = [-1 if i == axis else 1 for i in range(da.ndim)]
+    w = numpy.asarray(weight.transpose(dim).values, dtype=float).reshape(shape)
+    x = da.data
+    dtype = numpy.result_type(x.dtype, numpy.float32)
+    if isinstance(x, dask.array.Array):
+        w = dask.array.from_array(
+            w, chunks=[x.chunks[axis] if i == axis else 1 for i in range(da.ndim)]
+        )
+        chunks = [(1,) * len(c) if i == axis else c for i, c in enumerate(x.chunks)]
+        stats = dask.array.map_blocks(
+            _weighted_moments_block,
+            x,
+            w,
+            axis=axis,
+            new_axis=0,
+            chunks=((3,),) + tuple(chunks),
+            dtype=dtype,
+            meta=numpy.array((), dtype=dtype),
+        )
+        stats = dask.array.reduction(
+            stats,
+            chunk=lambda stats, axis, keepdims: stats,
+            combine=_merge_weighted_moments,
+            aggregate=_merge_weighted_moments,
+            axis=axis + 1,
+            keepdims=True,
+            dtype=dtype,
+            concatenate=True,
+            meta=numpy.array((), dtype=dtype),
+        )
+    else:
+        stats = _weighted_moments_block(x, w, axis)
+    stats = stats.squeeze(axis + 1)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        var = stats[2] / stats[0]
+
+    dims = [d for d in da.dims if d != dim]
+    coords = {k: v for k, v in da.coords.items() if dim not in v.dims}
+    mean = _xr.DataArray(stats[1], dims=dims, coords=coords)
+    var = _xr.DataArray(var, dims=dims, coords=coords)
+    return mean, var
+
+
+def _histogram2d_block(x, y, *weights, bins):
+    """
+    Weighted 2D histograms of a block (NaNs are skipped).
+    Bins are uniform, so bin indexes are computed directly.
+    The block dimensions are kept (size 1), so blocks can be summed.
+    """
+    ndim = x.ndim
+    shape = numpy.broadcast_shapes(x.shape, y.shape, *[w.shape for w in weights])
+    x, y = (numpy.broadcast_to(values, shape) for values in (x, y))
+    index = 0
+    valid = True
+    for values, edges in zip([x, y], bins):
+        n = len(edges) - 1
+        i = numpy.floor((values.ravel() - edges[0]) * (n / (edges[-1] - edges[0])))
+        # Right edge is included in the last bin
+        i[values.ravel() == edges[-1]] = n - 1
+        valid = valid & (i >= 0) & (i < n)
+        index = index * n + numpy.where(valid, i, 0).astype(numpy.intp)
+    size = numpy.prod([len(edges) - 1 for edges in bins])
+    hists = []
+    for w in weights:
+        w = numpy.broadcast_to(w, shape).ravel()
+        this_valid = valid & numpy.isfinite(w)
+        hists.append(
+            numpy.bincount(index[this_valid], weights=w[this_valid], minlength=size)
+        )
+    return numpy.stack(hists).reshape(
+        (1,) * ndim + (len(weights),) + tuple(len(edges) - 1 for edges in bins)
+    )
+
+
+def _histogram2d(x, y, weights, bins):
+    """
+    Weighted 2D histograms of DataArrays, computed in a single pass.
+    Dask arrays are binned chunk by chunk and partial histograms are summed,
+    so memory is bounded by the chunk size rather than the size of x.
+
+    Parameters
+    ----------
+    x, y: xarray.DataArray
+        Values to bin.
+    weights: list
+        DataArrays with weights (one histogram per element).
+    bins: list
+        Edges along x and y (uniform).
+
+    Returns
+    -------
+    hist: numpy.ndarray
+        Histograms with shape (len(weights), len(bins[0]) - 1, len(bins[1]) - 1).
+    """
+    # Weights are not broadcast to the shape of x (size 1 is used instead),
+    # so they are never expanded in memory.
+    x, y = _xr.broadcast(x, y)
+    weights = [_xr.DataArray(w) for w in weights]
+    dims = list(x.dims) + [d for w in weights for d in w.dims if d not in x.dims]
+    x, y = (da.expand_dims([d for d in dims if d not in da.dims]) for da in (x, y))
+    weights = [
+        w.expand_dims([d for d in dims if d not in w.dims]).transpose(*dims)
+        for w in weights
+    ]
+    x, y = (da.transpose(*dims).data for da in (x, y))
+    weights = [w.data for w in weights]
+    if any(isinstance(a, dask.array.Array) for a in [x, y] + weights):
+        x, y = dask.array.unify_chunks(x, dims, y, dims)[1]
+        x, y = dask.array.asarray(x), dask.array.asarray(y)
+        weights = [
+            dask.array.asarray(w).rechunk(
+                [
+                    (n,) if n == 1 or len(c) == 1 else c
+                    for n, c in zip(w.shape, x.chunks)
+                ]
+            )
+            for w in weights
+        ]
+    arrays = [x, y] + weights
+    shape = (len(weights),) + tuple(len(edges) - 1 for edges in bins)
+
+    if not isinstance(x, dask.array.Array):
+        return _histogram2d_block(*arrays, bins=bins).reshape(shape)
+
+    ndim = x.ndim
+    numblocks = numpy.max([a.numblocks for a in arrays], axis=0)
+    hists = dask.array.map_blocks(
+        _histogram2d_block,
+        *arrays,
+        bins=bins,
+        new_axis=list(range(ndim, ndim + 3)),
+        chunks=tuple((1,) * n for n in numblocks) + tuple((n,) for n in shape),
+        dtype=float,
+        meta=numpy.array((), dtype=float),
+    )
+    return hists.sum(axis=tuple(range(ndim))).compute()
+
+
+def _time_mean_block(x, axis):
+    """
+    Mean of a block along axis (NaNs are skipped for floats, same as xarray).
+    """
+    if numpy.issubdtype(x.dtype, numpy.inexact):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return numpy.nanmean(x, axis, keepdims=True)
+    return numpy.mean(x, axis, keepdims=True)
+
+
+def _split_time_bins(chunks, max_steps):
+    """
+    Split bins into balanced chunks of at most max_steps time steps.
+
+    Parameters
+    ----------
+    chunks: tuple
+        Number of time steps of each bin.
+    max_steps: int
+        Maximum number of time steps per chunk.
+
+    Returns
+    -------
+    chunks: tuple
+        Number of time steps of each chunk.
+    """
+    splits = [-(-count // max_steps) for count in chunks]
+    return tuple(
+        count // n + int(k < count % n)
+        for count, n in zip(chunks, splits)
+        for k in range(n)
+    )
+
+
+def _resample_time_mean(ds, freq):
+    """
+    Time-mean resampling of a Dataset, same as ds.resample(time=freq).mean().
+    Time is rechunked so that chunks match the output bins,
+    then each chunk is reduced independently: every output bin depends on
+    exactly one input chunk, and the graph has O(bins) tasks.
+    Bins that would exceed dask's array.chunk-size are split
+    into smaller chunks, and reduced with a tree reduction.
+
+    Parameters
+    ----------
+    ds: xarray.Dataset
+        Dataset with dask variables along time.
+    freq: str
+        Output frequency.
+
+    Returns
+    -------
+    ds: xarray.Dataset or None
+        Resampled dataset.
+        None if time is not a sorted pandas.DatetimeIndex,
+        variables are not numeric, or none is a dask array
+        (use xarray's resample).
+    """
+    times = ds.indexes["time"]
+    if (
+        not isinstance(times, pandas.DatetimeIndex)
+        or not times.is_monotonic_increasing
+        or not any(isinstance(var.data, dask.array.Array) for var in ds.values())
+        or not all(
+            numpy.issubdtype(var.dtype, numpy.number) or var.dtype == bool
+            for var in ds.values()
+        )
+    ):
+        return None
+
+    # Chunks aligned with bins (empty bins are added back at the end)
+    counts = pandas.Series(numpy.ones(len(times)), index=times).resample(freq).count()
+    chunks = tuple(int(count) for count in counts.values if count > 0)
+    labels = counts.index[counts.values > 0]
+    bounds = numpy.cumsum((0,) + chunks)
+    chunk_size = parse_bytes(dask.config.get("array.chunk-size"))
+
+    data_vars = {}
+    for name, var in ds.data_vars.items():
+        axis = var.get_axis_num("time")
+        data = dask.array.asarray(var.data)
+        dtype = _time_mean_block(numpy.zeros((1,), var.dtype), 0).dtype
+
+        # Maximum number of time steps per chunk
+        step = data.dtype.itemsize * numpy.prod(
+            [max(c) for i, c in enumerate(data.chunks) if i != axis], dtype=int
+        )
+        max_steps = max(chunk_size // max(step, 1), 1)
+
+        if max(chunks) <= max_steps:
+            # One chunk per bin
+            data = data.rechunk({axis: chunks})
+            data = data.map_blocks(
+                _time_mean_block,
+                axis=axis,
+                chunks=tuple(
+                    (1,) * len(c) if i == axis else c for i, c in enumerate(data.chunks)
+                ),
+                dtype=dtype,
+                meta=numpy.array((), dtype=dtype),
+            )
+        else:
+            # Large bins are split, and each bin is reduced with a tree reduction
+            data = data.rechunk({axis: _split_time_bins(chunks, max_steps)})
+            mean = (
+                dask.array.nanmean
+                if numpy.issubdtype(var.dtype, numpy.inexact)
+                else dask.array.mean
+            )
+            data = dask.array.concatenate(
+                [
+                    mean(
+                        data[(slice(None),) * axis + (slice(start, stop),)],
+                        axis=axis,
+                        keepdims=True,
+                        dtype=dtype,
+                    )
+                    for start, stop in zip(bounds[:-1], bounds[1:])
+                ],
+                axis=axis,
+            )
+        data_vars[name] = (var.dims, data, var.attrs)
+    coords = {
+        name: coord.variable
+        for name, coord in ds.coords.items()
+        if "time" not in coord.dims
+    }
+    coords["time"] = ("time", labels, ds["time"].attrs)
+    ds_mean = _xr.Dataset(data_vars, coords=coords, attrs=ds.attrs)
+    return ds_mean.reindex(time=counts.index)
+
+
+def _nearest_grid_points(ds_grid, Xcoords, Ycoords, dim_name, xoak_index):
+    """
+    Nearest-neighbor lookup of grid points using xoak index adapters.
+    Equivalent to ds_grid.xoak.set_index and ds_grid.xoak.sel,
+    but indexes are cached (see _cached_spatial_index).
+
+    Parameters
+    ----------
+    ds_grid: xarray.Dataset
+        Dataset with XC and YC
+    Xcoords, Ycoords: 1D array_like
+        Coordinates of the points to look up
+    dim_name: str
+        Name of the new dimension
+    xoak_index: str
+        xoak index to be used.
+
+    Returns
+    -------
+    nds: xarray.Dataset
+        ds_grid subsampled at the nearest points.
+    """
+    XC = ds_grid["XC"]
+    YC = ds_grid["YC"]
+    adapter = _xoak.IndexRegistry()[xoak_index]()
+
+    def build():
+        points = numpy.stack([numpy.ravel(XC.values), numpy.ravel(YC.values)]).T
+        return adapter.build(points)
+
+    index = _cached_spatial_index(xoak_index, (XC.dims, XC.data, YC.data), build)
+
+    # Query
+    points = numpy.stack([numpy.ravel(Xcoords), numpy.ravel(Ycoords)]).T
+    _, indices = adapter.query(index, points)
+    indices = numpy.unravel_index(numpy.ravel(indices), XC.shape)
+    indexers = {dim: _xr.Variable(dim_name, ind) for dim, ind in zip(XC.dims, indices)}
+
+    return ds_grid.isel(indexers)
+
+
 # ========
 # MESSAGES
 # ========
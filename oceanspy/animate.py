@@ -8,24 +8,37 @@ Animate using oceanspy plot functions.
 # 3. Add new functions to _animateMethods
 # 4. Add new functions to docs/api.rst
 
+import copy as _copy
 import functools as _functools
-
-import numpy as _np
+import multiprocessing as _multiprocessing
+import os as _os
+import subprocess as _subprocess
+import tempfile as _tempfile
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from concurrent.futures import as_completed as _as_completed
 
 # Required dependencies (private)
+import dask as _dask
+import numpy as _np
 import xarray as _xr
 
 # From OceanSpy (private)
 from xarray.plot.utils import _determine_cmap_params
 
-import oceanspy as _ospy
-
 from . import compute as _compute
-from . import plot as _plot  # noqa: F401
-from ._ospy_utils import _ax_warning, _check_instance, _check_options, _rename_aliased
+from . import plot as _plot
+from ._ospy_utils import (
+    _ax_warning,
+    _check_instance,
+    _check_mean_and_int_axes,
+    _check_options,
+    _rename_aliased,
+)
+from .llc_rearrange import Dims
 
 # Recommended dependencies (private)
 try:
+    import matplotlib as _mpl
     import matplotlib.pyplot as _plt
     from matplotlib.animation import FuncAnimation as _FuncAnimation
 except ImportError:  # pragma: no cover
@@ -33,6 +46,7 @@ except ImportError:  # pragma: no cover
 
 try:
     from IPython.display import HTML as _HTML
+    from IPython.display import Video as _Video
     from IPython.display import display as _display
     from IPython.utils import io as _io
 except ImportError:  # pragma: no cover
@@ -44,10 +58,26 @@ except ImportError:  # pragma: no cover
     pass
 
 
-def _create_animation(od, time, plot_func, func_kwargs, display, **kwargs):
+def _create_animation(
+    od,
+    time,
+    plot_func,
+    func_kwargs,
+    display,
+    frames_func=None,
+    filename=None,
+    processes=None,
+    **kwargs,
+):
     """
     Create animation using oceanspy plot functions.
 
+    The first frame is drawn by plot_func.
+    If frames_func is provided, the fields are computed once
+    for the whole time range and loaded one time-chunk at a time,
+    and the following frames only update the data of the artists.
+    Otherwise, each frame is drawn by plot_func.
+
     Parameters
     ----------
     od: OceanDataset
@@ -60,6 +90,17 @@ def _create_animation(od, time, plot_func, func_kwargs, display, **kwargs):
         Keyword arguments for plot_func.
     display: bool
         If True, display the animation.
+    frames_func: function
+        Function returning the fields (with time dimension)
+        and the function updating the artists,
+        or None if the plot is not supported.
+    filename: str
+        If provided, frames are rendered in parallel and saved to a video.
+    processes: int
+        Number of processes used to render the frames.
+        If None, use all CPUs.
+        With more than one process, processes are spawned, so scripts
+        must create the animation under ``if __name__ == "__main__":``.
     **kwargs:
         Keyword arguments for py:class:`matplotlib.animation.FuncAnimation`
 
@@ -75,29 +116,37 @@ def _create_animation(od, time, plot_func, func_kwargs, display, **kwargs):
 
     # Check parameters
     _check_instance(
-        {"od": od, "time": time, "func_kwargs": func_kwargs, "display": display},
+        {
+            "od": od,
+            "time": time,
+            "func_kwargs": func_kwargs,
+            "display": display,
+            "filename": filename,
+            "processes": processes,
+        },
         {
             "od": "oceanspy.OceanDataset",
             "time": "xarray.DataArray",
             "func_kwargs": ["type(None)", "dict"],
             "display": ["bool"],
+            "filename": ["type(None)", "str"],
+            "processes": ["type(None)", "int"],
         },
     )
+    if processes is not None and processes < 1:
+        raise ValueError("`processes` must be greater than 0")
 
     # Handle kwargs
     if func_kwargs is None:
         func_kwargs = {}
     func_kwargs = dict(func_kwargs)
+    func_kwargs.pop("cutout_kwargs", None)
 
     # Animate function
+    draw = _frame_func(od, plot_func, func_kwargs, frames_func)
+
     def animate(i):
-        _plt.clf()
-        func_kwargs["cutout_kwargs"] = {
-            "timeRange": time.isel({time.dims[0]: i}).values,
-            "dropAxes": "time",
-        }
-        with _io.capture_output() as captured:
-            plot_func(od, **func_kwargs)
+        draw(i)
         if "pbar" in locals():
             pbar.update(1)
 
@@ -106,8 +155,24 @@ def _create_animation(od, time, plot_func, func_kwargs, display, **kwargs):
         **{"fig": _plt.gcf(), "func": animate, "frames": len(time), **kwargs}
     )
 
+    # Save (video is encoded once)
+    if filename is not None:
+        _save_video(
+            od=od,
+            nframes=len(time),
+            plot_func=plot_func,
+            func_kwargs=func_kwargs,
+            frames_func=frames_func,
+            filename=filename,
+            processes=processes,
+            fig=anim._fig,
+            fps=1000 / kwargs.get("interval", 200),
+        )
+
     # Display
-    if display is True:
+    if display is True and filename is not None:
+        _display(_Video(filename, embed=True))
+    elif display is True:
         pbar = _tqdm(total=len(time))
         _display(_HTML(anim.to_html5_video()))
         pbar.close()
@@ -116,7 +181,407 @@ def _create_animation(od, time, plot_func, func_kwargs, display, **kwargs):
     return anim
 
 
-def vertical_section(od, display=True, FuncAnimation_kwargs=None, **kwargs):
+def _frame_func(od, plot_func, func_kwargs, frames_func):
+    """
+    Return the function drawing the i-th frame on the current figure.
+    Artists and frames are created when the first frame is drawn.
+    """
+    state = {}
+
+    def draw(i):
+        if state.get("update") is not None:
+            state["update"](state["ax"], state["load"](i))
+        else:
+            _plt.clf()
+            with _io.capture_output():
+                od_frame = _time_frame(od, i)
+                plot_func(od_frame, **func_kwargs)
+                if "ax" not in state and frames_func is not None:
+                    fields, state["update"] = frames_func(od, od_frame, func_kwargs)
+                    if state["update"] is not None:
+                        state["load"] = _frame_loader(od, fields)
+            # Colorbars are added after the main axes
+            state["ax"] = _plt.gcf().axes[0]
+            if state.get("update") is not None:
+                state["update"](state["ax"], state["load"](i))
+
+    return draw
+
+
+def _save_video(
+    od, nframes, plot_func, func_kwargs, frames_func, filename, processes, fig, fps
+):
+    """
+    Render frames in a process pool and encode them in a video.
+    Each process renders a contiguous block of frames to PNG files,
+    and ffmpeg stitches them in order.
+    Processes only receive the time slices of their own block.
+    """
+    if processes is None:
+        processes = _os.cpu_count() or 1
+    blocks = _np.array_split(_np.arange(nframes), min(processes, nframes))
+
+    with _tempfile.TemporaryDirectory() as tmpdir:
+        args = {
+            "plot_func": plot_func,
+            "func_kwargs": func_kwargs,
+            "frames_func": frames_func,
+            "figsize": tuple(fig.get_size_inches()),
+            "dpi": fig.dpi,
+            "pattern": _os.path.join(tmpdir, "frame_%06d.png"),
+        }
+        if len(blocks) == 1:
+            _render_frames(od=od, frames=_np.arange(nframes), **args)
+        else:
+            # Spawn: forked dask and matplotlib states are not safe
+            context = _multiprocessing.get_context("spawn")
+            with _ProcessPoolExecutor(len(blocks), mp_context=context) as pool:
+                futures = [
+                    pool.submit(
+                        _render_frames,
+                        od=_time_block(od, block[0], block[-1] + 1),
+                        frames=block,
+                        start=block[0],
+                        worker=True,
+                        **args,
+                    )
+                    for block in blocks
+                ]
+                futures = _as_completed(futures)
+                if "_tqdm" in globals():
+                    futures = _tqdm(futures, total=len(blocks))
+                for future in futures:
+                    future.result()
+        _encode_frames(args["pattern"], filename, fps)
+
+
+def _render_frames(
+    od,
+    plot_func,
+    func_kwargs,
+    frames_func,
+    frames,
+    figsize,
+    dpi,
+    pattern,
+    start=0,
+    worker=False,
+):
+    """
+    Render frames to PNG files (pattern is formatted with the frame index).
+    The time axis of od starts at frame start.
+    Workers use a non-interactive backend and the synchronous dask scheduler,
+    so processes don't compete for cores.
+    """
+    if worker:
+        _plt.switch_backend("agg")
+        _dask.config.set(scheduler="synchronous")
+    fig = _plt.figure(figsize=figsize, dpi=dpi)
+    draw = _frame_func(od, plot_func, func_kwargs, frames_func)
+    for i in frames:
+        draw(i - start)
+        # Facet plots are drawn on a new figure
+        frame_fig = _plt.gcf()
+        frame_fig.savefig(pattern % i, dpi=dpi)
+        if frame_fig is not fig:
+            _plt.close(frame_fig)
+    _plt.close(fig)
+
+
+def _encode_frames(pattern, filename, fps):
+    """
+    Encode PNG files in a video using ffmpeg.
+    """
+    cmd = [
+        _mpl.rcParams["animation.ffmpeg_path"],
+        "-y",
+        "-loglevel",
+        "error",
+        "-framerate",
+        str(fps),
+        "-i",
+        pattern,
+        "-vf",
+        "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        "-vcodec",
+        _mpl.rcParams["animation.codec"],
+        "-pix_fmt",
+        "yuv420p",
+        filename,
+    ]
+    _subprocess.run(cmd, check=True)
+
+
+def _time_frame(od, i):
+    """
+    Select a time snapshot and drop the time axis.
+    Same as cutout with timeRange=time[i] and dropAxes="time",
+    without cutting out the other axes.
+    """
+    od = _copy.copy(od)
+    ds = od._ds.isel(time=slice(i, i + 1))
+    if "time_midp" in ds.dims:
+        j = min(i, len(ds["time_midp"]) - 1)
+        ds = ds.isel(time_midp=slice(j, j + 1))
+    od._ds = ds
+    grid_coords = od.grid_coords
+    grid_coords.pop("time", None)
+    return od.set_grid_coords(grid_coords, overwrite=True)
+
+
+def _time_block(od, start, stop):
+    """
+    Select the time range [start, stop) of frames,
+    so that _time_frame(od, i - start) is the i-th frame of the full range.
+    Cached grids are dropped, so only the selected slices are pickled.
+    """
+    od = _copy.copy(od)
+    ds = od._ds.isel(time=slice(start, stop))
+    if "time_midp" in ds.dims:
+        nmidp = len(ds["time_midp"])
+        start = min(start, nmidp - 1)
+        ds = ds.isel(time_midp=slice(start, max(min(stop, nmidp), start + 1)))
+    od._ds = ds
+    od._invalidate_grid_cache()
+    od._diagnostics_cache = None
+    return od
+
+
+def _time_name(od, da):
+    """
+    Return the time dimension of da (None if time independent).
+    """
+    time_names = od.grid_coords.get("time", {"time": None})
+    time_names = [dim for dim in time_names if dim in da.dims]
+    if len(time_names) == 0:
+        return None
+    return time_names[0]
+
+
+def _frame_loader(od, fields):
+    """
+    Return a function loading the i-th frame of fields.
+    Fields are computed one time-chunk at a time (the dask chunk containing
+    the frame), and the chunk is kept in memory until a frame outside
+    of it is requested.
+    """
+    time_names = [_time_name(od, field) for field in fields]
+    blocks = {}
+
+    def load(i):
+        # Find chunks to compute
+        todo = {}
+        for k, (field, time_name) in enumerate(zip(fields, time_names)):
+            if time_name is None:
+                if k not in blocks:
+                    todo[k] = (0, 1, field)
+                continue
+            j = min(i, field.sizes[time_name] - 1)
+            if k in blocks and blocks[k][0] <= j < blocks[k][1]:
+                continue
+            if field.chunks is None:
+                start, stop = 0, field.sizes[time_name]
+            else:
+                chunks = field.chunks[field.get_axis_num(time_name)]
+                bounds = _np.cumsum((0,) + tuple(chunks))
+                start = bounds[_np.searchsorted(bounds, j, side="right") - 1]
+                stop = bounds[_np.searchsorted(bounds, j, side="right")]
+            todo[k] = (start, stop, field.isel({time_name: slice(start, stop)}))
+
+        # Compute all together (shared tasks are computed once)
+        computed = _dask.compute(*[block for _, _, block in todo.values()])
+        for k, block in zip(todo, computed):
+            blocks[k] = todo[k][:2] + (block,)
+
+        # Extract frame
+        frames = []
+        for k, (field, time_name) in enumerate(zip(fields, time_names)):
+            start, _, block = blocks[k]
+            if time_name is not None:
+                j = min(i, field.sizes[time_name] - 1)
+                block = block.isel({time_name: j - start})
+            frames = frames + [block]
+        return frames
+
+    return load
+
+
+def _update_mesh(ax, frame):
+    """
+    Update pcolormesh or imshow artists, and title.
+    """
+    values = _np.ma.masked_invalid(frame.values)
+    if len(ax.images) != 0:
+        ax.images[0].set_data(values)
+    else:
+        ax.collections[0].set_array(values)
+    ax.set_title(frame._title_for_slice())
+
+
+def _Hsection_frames(od, od_frame, kwargs):
+    """
+    Fields and update function of horizontal section animations.
+    Return (None, None) if artists can not be updated.
+    """
+    kwargs = dict(kwargs)
+    varName = kwargs.pop("varName")
+    unsupported = [
+        kwargs.pop("plotType", "pcolormesh") not in ["pcolormesh", "imshow"],
+        kwargs.pop("contourName", None) is not None,
+        kwargs.pop("col", None) is not None,
+    ]
+    if any(unsupported):
+        return None, None
+
+    # Same axes of plot_func
+    meanAxes, intAxes = _check_mean_and_int_axes(
+        od=od_frame,
+        meanAxes=kwargs.pop("meanAxes", False),
+        intAxes=kwargs.pop("intAxes", False),
+        exclude=["X", "Y"],
+    )
+    if any("time" in axes for axes in [meanAxes, intAxes] if axes is not False):
+        return None, None
+
+    # Whole time range
+    da, _ = _plot._compute_mean_and_int(od, varName, meanAxes, intAxes)
+    time_name = _time_name(od, da)
+    if time_name is None:
+        return None, None
+    da = da.squeeze([dim for dim in da.dims if da.sizes[dim] == 1 and dim != time_name])
+    if da.ndim != 3:
+        return None, None
+
+    # Same slicing of plot_func
+    xstep, ystep = kwargs.pop("xstep", None), kwargs.pop("ystep", None)
+    if xstep is not None and ystep is not None:
+        dims_var = Dims([dim for dim in da.dims if dim[0] in ["X", "Y"]][::-1])
+        da = da.isel({dims_var.X: slice(None, None, xstep)})
+        da = da.isel({dims_var.Y: slice(None, None, ystep)})
+
+    # Same level of detail of plot_func (figure is the same)
+    if kwargs.pop("coarsen", False):
+        pyramid = kwargs.pop("pyramid", None)
+        if meanAxes is not False or intAxes is not False:
+            pyramid = None
+        da = _plot._coarsen_to_pixels(od, da, None, kwargs.get("figsize"), pyramid)
+
+    # Same order of xarray (coordinates are 2D)
+    if not kwargs.pop("use_coords", True):
+        dims_var = Dims([dim for dim in da.dims if dim[0] in ["X", "Y"]][::-1])
+        da = da.transpose(time_name, dims_var.Y, dims_var.X)
+
+    def update(ax, frames):
+        _update_mesh(ax, frames[0])
+
+    return [da], update
+
+
+def _Vsection_frames(od, od_frame, kwargs):
+    """
+    Fields and update function of vertical section animations.
+    Return (None, None) if artists can not be updated.
+    """
+    kwargs = dict(kwargs)
+    varName = kwargs.pop("varName")
+    unsupported = [
+        kwargs.pop("plotType", "pcolormesh") not in ["pcolormesh", "imshow"],
+        kwargs.pop("contourName", None) is not None,
+        kwargs.pop("col", None) is not None,
+    ]
+    if any(unsupported):
+        return None, None
+
+    # Same axes of plot_func
+    meanAxes, intAxes = _check_mean_and_int_axes(
+        od=od_frame,
+        meanAxes=kwargs.pop("meanAxes", False),
+        intAxes=kwargs.pop("intAxes", False),
+        exclude=["mooring", "station", "X", "Y", "Z"],
+    )
+    if any("time" in axes for axes in [meanAxes, intAxes] if axes is not False):
+        return None, None
+
+    # Whole time range
+    da, varName = _plot._compute_mean_and_int(od, varName, meanAxes, intAxes)
+    time_name = _time_name(od, da)
+    if time_name is None:
+        return None, None
+    da = da.squeeze([dim for dim in da.dims if da.sizes[dim] == 1 and dim != time_name])
+    da, hor_name = _plot._Vsection_regrid(od, da, varName)
+    da = da.squeeze([dim for dim in da.dims if da.sizes[dim] == 1 and dim != time_name])
+    if da.ndim != 3:
+        return None, None
+    ver_name = [dim for dim in od.grid_coords["Z"] if dim in da.dims][0]
+
+    # Same slicing of plot_func
+    step = kwargs.pop("step", None)
+    dims_var = Dims(list(da.dims)[::-1])
+    if step is not None and dims_var.X in ["mooring", "station"]:
+        da = da.isel({dims_var.X: slice(None, None, step)})
+
+    # Same order of xarray (coordinates are 1D)
+    da = da.transpose(time_name, ver_name, hor_name)
+
+    def update(ax, frames):
+        _update_mesh(ax, frames[0])
+
+    return [da], update
+
+
+def _TS_frames(od, od_frame, kwargs):
+    """
+    Fields and update function of TS diagram animations.
+    Return (None, None) if artists can not be updated.
+    """
+    kwargs = dict(kwargs)
+    Tlim, Slim = kwargs.pop("Tlim"), kwargs.pop("Slim")
+    colorName = kwargs.pop("colorName", None)
+    meanAxes = kwargs.pop("meanAxes", None)
+    binned = kwargs.pop("binned", False)
+    bins = _np.broadcast_to(kwargs.pop("bins", 100), (2,))
+    if meanAxes is not None and "time" in meanAxes:
+        return None, None
+
+    # Whole time range
+    od, T, S, color, lost_coords = _plot._TS_fields(od, meanAxes, colorName)
+    time_name = _time_name(od, T)
+    if time_name is None:
+        return None, None
+    fields = [S, T] if color is None else [S, T, color]
+    if binned:
+        edges = [
+            _np.linspace(min(lim), max(lim), n + 1)
+            for lim, n in zip([Slim, Tlim], bins)
+        ]
+        weight, _ = _plot._TS_weights(od_frame, T.isel({time_name: 0}))
+        fields = fields + [weight]
+
+    def update(ax, frames):
+        S, T = frames[:2]
+        if binned:
+            color = frames[2] if colorName is not None else None
+            field = _plot._TS_binned(S, T, color, frames[-1], edges)
+            ax.collections[0].set_array(field)
+        elif colorName is None:
+            ax.lines[0].set_data(S.values.flatten(), T.values.flatten())
+        else:
+            sc = ax.collections[0]
+            sc.set_offsets(_np.column_stack([S.values.flatten(), T.values.flatten()]))
+            sc.set_array(_plot._TS_color(S, T, frames[2], Tlim, Slim))
+        ax.set_title(_plot._TS_title(od_frame, T, lost_coords))
+
+    return fields, update
+
+
+def vertical_section(
+    od,
+    display=True,
+    FuncAnimation_kwargs=None,
+    filename=None,
+    processes=None,
+    **kwargs,
+):
     """
     Animate vertical section plots.
 
@@ -128,6 +593,15 @@ def vertical_section(od, display=True, FuncAnimation_kwargs=None, **kwargs):
         If True, display the animation.
     FuncAnimation_kwargs: dict
         Keyword arguments from :py:func:`matplotlib.animation.FuncAnimation`
+    filename: str
+        If provided, render the frames in parallel and save the video
+        (requires ffmpeg).
+    processes: int
+        Number of processes used to render the frames.
+        If None, use all CPUs.
+        With more than one process, processes are spawned and import
+        the ``__main__`` module, so scripts must call this function under
+        ``if __name__ == "__main__":``.
     **kwargs:
         Keyword arguments from :py:func:`oceanspy.plot.vertical_section`
 
@@ -219,12 +693,22 @@ def vertical_section(od, display=True, FuncAnimation_kwargs=None, **kwargs):
         plot_func=plot_func,
         func_kwargs=kwargs,
         display=display,
+        frames_func=_Vsection_frames,
+        filename=filename,
+        processes=processes,
         **FuncAnimation_kwargs,
     )
     return anim
 
 
-def horizontal_section(od, display=True, FuncAnimation_kwargs=None, **kwargs):
+def horizontal_section(
+    od,
+    display=True,
+    FuncAnimation_kwargs=None,
+    filename=None,
+    processes=None,
+    **kwargs,
+):
     """
     Animate horizontal section plots.
 
@@ -236,6 +720,15 @@ def horizontal_section(od, display=True, FuncAnimation_kwargs=None, **kwargs):
         If True, display the animation.
     FuncAnimation_kwargs: dict
         Keyword arguments from :py:func:`matplotlib.animation.FuncAnimation`
+    filename: str
+        If provided, render the frames in parallel and save the video
+        (requires ffmpeg).
+    processes: int
+        Number of processes used to render the frames.
+        If None, use all CPUs.
+        With more than one process, processes are spawned and import
+        the ``__main__`` module, so scripts must call this function under
+        ``if __name__ == "__main__":``.
     **kwargs:
         Keyword arguments from :py:func:`oceanspy.plot.horizontal_section`
 
@@ -311,12 +804,22 @@ def horizontal_section(od, display=True, FuncAnimation_kwargs=None, **kwargs):
         plot_func=plot_func,
         func_kwargs=kwargs,
         display=display,
+        frames_func=_Hsection_frames,
+        filename=filename,
+        processes=processes,
         **FuncAnimation_kwargs,
     )
     return anim
 
 
-def TS_diagram(od, display=True, FuncAnimation_kwargs=None, **kwargs):
+def TS_diagram(
+    od,
+    display=True,
+    FuncAnimation_kwargs=None,
+    filename=None,
+    processes=None,
+    **kwargs,
+):
     """
     Animate TS diagrams.
 
@@ -328,6 +831,15 @@ def TS_diagram(od, display=True, FuncAnimation_kwargs=None, **kwargs):
         If True, display the animation.
     FuncAnimation_kwargs: dict
         Keyword arguments from :py:func:`matplotlib.animation.FuncAnimation`
+    filename: str
+        If provided, render the frames in parallel and save the video
+        (requires ffmpeg).
+    processes: int
+        Number of processes used to render the frames.
+        If None, use all CPUs.
+        With more than one process, processes are spawned and import
+        the ``__main__`` module, so scripts must call this function under
+        ``if __name__ == "__main__":``.
     **kwargs:
         Keyword arguments from :py:func:`oceanspy.plot.TS_diagram`
 
@@ -384,27 +896,7 @@ def TS_diagram(od, display=True, FuncAnimation_kwargs=None, **kwargs):
     # Fix density
     dens = kwargs.pop("dens", None)
     if dens is None:
-        t, s = _xr.broadcast(
-            _xr.DataArray(_np.linspace(Tlim[0], Tlim[-1], 100), dims=("t")),
-            _xr.DataArray(_np.linspace(Slim[0], Slim[-1], 100), dims=("s")),
-        )
-        odSigma0 = _ospy.OceanDataset(_xr.Dataset({"Temp": t, "S": s}))
-        odSigma0 = odSigma0.set_parameters(od.parameters)
-        odSigma0 = odSigma0.compute.potential_density_anomaly()
-        odSigma0._ds = odSigma0._ds.set_coords(["Temp", "S"])
-
-        # Freezing point
-        paramsList = ["tempFrz0", "dTempFrz_dS"]
-        params2use = {
-            par: od.parameters[par] for par in od.parameters if par in paramsList
-        }
-        tempFrz0 = params2use["tempFrz0"]
-        dTempFrz_dS = params2use["dTempFrz_dS"]
-        freez_point = tempFrz0 + odSigma0._ds["S"] * dTempFrz_dS
-
-        # Extract Density
-        dens = odSigma0._ds["Sigma0"]
-        dens = dens.where(odSigma0._ds["Temp"] > freez_point)
+        dens = _plot._isopycnals(od, Tlim, Slim)
     kwargs["dens"] = dens
 
     # Fix colorbar
@@ -436,6 +928,9 @@ def TS_diagram(od, display=True, FuncAnimation_kwargs=None, **kwargs):
         plot_func=plot_func,
         func_kwargs=kwargs,
         display=display,
+        frames_func=_TS_frames,
+        filename=filename,
+        processes=processes,
         **FuncAnimation_kwargs,
     )
     return anim
@@ -10,6 +10,7 @@ Create new variables using OceanDataset objects.
 #    using _add_missing_variables.
 # 4. Add new functions in _FUNC2VARS:
 #    key is name of the function, value is list of new DataArrays.
+#    If they use DataArrays computed by other functions, add them in _FUNC2INPUTS.
 # 5. Add new functions to _computeMethods
 # 6. Add new functions to docs/api.rst
 
@@ -22,6 +23,7 @@ Create new variables using OceanDataset objects.
 
 import copy as _copy
 import functools as _functools
+import re as _re
 import warnings as _warnings
 from collections import OrderedDict as _OrderedDict
 
@@ -35,11 +37,16 @@ import oceanspy as _ospy
 # From OceanSpy (private)
 from . import utils as _utils
 from ._ospy_utils import (
+    _cached_diagnostic,
     _check_ijk_components,
     _check_instance,
     _check_list_of_string,
+    _check_options,
+    _fused_stencil,
+    _fused_stencil_axis,
     _handle_aliased,
     _rename_aliased,
+    _streaming_moments,
 )
 
 # Hard coded  list of variables outputed by functions
@@ -91,11 +98,80 @@ _FUNC2VARS = _OrderedDict(
     missing_horizontal_spacing=["dxF", "dxV", "dyF", "dyU"],
 )
 
+# Hard coded list of variables used by functions
+# that can be computed by other functions (see _FUNC2VARS).
+# Used to plan the computation of missing variables.
+_FUNC2INPUTS = _OrderedDict(
+    Brunt_Vaisala_frequency=["Sigma0"],
+    Okubo_Weiss_parameter=["momVort3", "s_strain", "n_strain"],
+    Ertel_potential_vorticity=["momVort3", "N2", "momVort1", "momVort2"],
+)
+
+
+def _plan_missing_variables(
+    varList, available, FUNC2VARS=_FUNC2VARS, FUNC2INPUTS=_FUNC2INPUTS
+):
+    """
+    Plan the functions needed to compute missing variables.
+    Each function is called once, after the functions computing its inputs.
+
+    Parameters
+    ----------
+    varList: list
+        List of missing variables (strings).
+    available: list
+        List of variables already available (strings).
+    FUNC2VARS: dict
+        Dictionary that connect function names to computed variables.
+        Keys are functions, values are list of variables.
+    FUNC2INPUTS: dict
+        Dictionary that connect function names to the variables they use.
+        Keys are functions, values are list of variables.
+
+    Returns
+    -------
+    funcList: list
+        Functions, in the order they must be called.
+    """
+
+    # Pick functions. When more than one function computes a variable,
+    # use the one that computes most of the missing variables.
+    var2func = {}
+    missing = list(varList)
+    while len(missing) != 0:
+        var = missing.pop(0)
+        if var in available or var in var2func:
+            continue
+        funcs = [func for func in FUNC2VARS if var in FUNC2VARS[func]]
+        func = max(funcs, key=lambda f: len(set(FUNC2VARS[f]) & set(missing + [var])))
+        var2func = {**{VAR: func for VAR in FUNC2VARS[func]}, **var2func}
+        missing = missing + FUNC2INPUTS.get(func, [])
+
+    # Sort functions: inputs first
+    funcList = []
+
+    def _visit(func, path):
+        if func in path:
+            raise ValueError("Circular dependency: {}".format(path + [func]))
+        for var in FUNC2INPUTS.get(func, []):
+            if var in var2func and var2func[var] not in funcList:
+                _visit(var2func[var], path + [func])
+        if func not in funcList:
+            funcList.append(func)
+
+    for var in varList:
+        if var in var2func:
+            _visit(var2func[var], [])
+
+    return funcList
+
 
 def _add_missing_variables(od, varList, FUNC2VARS=_FUNC2VARS):
     """
     If any variable in varList is missing in the oceandataset,
     try to compute it.
+    Functions are called once, and variables shared by functions
+    (e.g., momVort3) are computed only once (see _plan_missing_variables).
 
     Parameters
     ----------
@@ -137,11 +213,18 @@ def _add_missing_variables(od, varList, FUNC2VARS=_FUNC2VARS):
             "".format(var_error)
         )
 
-    # Compute new variables
-    funcList = list(set([VAR2FUNC[var] for var in varList if var in VAR2FUNC]))
+    # Compute new variables.
+    # Intermediate variables are merged into a working oceandataset,
+    # so functions using them don't compute them again.
+    funcList = _plan_missing_variables(varList, list(od._ds.variables), FUNC2VARS)
     allds = []
+    _od = od
     for func in funcList:
-        allds = allds + [eval("{}(od)".format(func))]
+        ds = eval("{}(_od)".format(func))
+        allds = allds + [ds]
+        if func != funcList[-1]:
+            newvars = [var for var in ds.data_vars if var not in _od._ds.variables]
+            _od = _od.merge_into_oceandataset(ds[newvars])
     ds = _xr.merge(allds)
     ds = ds.drop_vars([var for var in ds.variables if var not in varList])
 
@@ -154,7 +237,8 @@ def _add_missing_variables(od, varList, FUNC2VARS=_FUNC2VARS):
 # ==========
 # SMART-NAME
 # ==========
-def gradient(od, varNameList=None, axesList=None, aliased=True):
+@_cached_diagnostic
+def gradient(od, varNameList=None, axesList=None, aliased=True, backend="xgcm"):
     """
     Compute gradient along specified axes, returning all terms (not summed).
 
@@ -175,6 +259,12 @@ def gradient(od, varNameList=None, axesList=None, aliased=True):
         List of axes. If None, compute gradient along all axes.
     aliased: bool
         Set it False when working with private ds and grid.
+    backend: str
+        Options: {'xgcm', 'numba'}
+        xgcm: compose xgcm differences.
+        numba: fused Numba kernels, differentiating and scaling
+        in a single pass per chunk. Only used along X and Y axes
+        that are not periodic or face-connected (otherwise, use xgcm).
 
     Returns
     -------
@@ -202,6 +292,7 @@ def gradient(od, varNameList=None, axesList=None, aliased=True):
         {"od": od, "aliased": aliased},
         {"od": "oceanspy.OceanDataset", "aliased": "bool"},
     )
+    _check_options("backend", backend, ["xgcm", "numba"])
 
     varNameList = _check_list_of_string(varNameList, "varNameList")
     if varNameList is None:
@@ -242,9 +333,20 @@ def gradient(od, varNameList=None, axesList=None, aliased=True):
                 continue
 
             # Numerator
-            dnum = od._grid.diff(
-                od._ds[varName], axis, boundary="fill", fill_value=_np.nan
-            )
+            stencil = None
+            if backend == "numba" and axis in ["X", "Y"]:
+                stencil = _fused_stencil_axis(od, axis, od._ds[varName])
+            if stencil is None:
+                dnum = od._grid.diff(
+                    od._ds[varName], axis, boundary="fill", fill_value=_np.nan
+                )
+                dims = dnum.dims
+            else:
+                in_dims, out_dims, index, offset = stencil
+                dims = [
+                    out_dims[in_dims.index(dim)] if dim in in_dims else dim
+                    for dim in od._ds[varName].dims
+                ]
 
             # Horizontal gradient
             if axis in ["X", "Y"]:
@@ -262,7 +364,7 @@ def gradient(od, varNameList=None, axesList=None, aliased=True):
                     pointList = pointList + ["U"]
                 ddenNames = ["d" + axis.lower() + point for point in pointList]
                 for ddenName in ddenNames:
-                    if set(od._ds[ddenName].dims).issubset(dnum.dims):
+                    if set(od._ds[ddenName].dims).issubset(dims):
                         dden = od._ds[ddenName]
                         continue
 
@@ -341,7 +443,18 @@ def gradient(od, varNameList=None, axesList=None, aliased=True):
 
             # Add and clear
             outName = "d" + varNameOUT + "_d" + axis
-            grad[outName] = dnum / dden
+            if stencil is None:
+                grad[outName] = dnum / dden
+                del dnum
+            else:
+                # Fused: difference and scaling in a single pass
+                grad[outName] = _fused_stencil(
+                    "diff",
+                    [od._ds[varName], dden, index, offset],
+                    [in_dims, out_dims, [], []],
+                    out_dims,
+                    od._grid,
+                )
             add_units = {
                 "X": " m",
                 "Y": " m",
@@ -354,12 +467,13 @@ def gradient(od, varNameList=None, axesList=None, aliased=True):
                 units = od._ds[varName].attrs["units"] + add_units[axis] + "^-1"
                 grad[outName].attrs["units"] = units
 
-            del dnum, dden
+            del dden
 
     return _xr.Dataset(grad, attrs=od.dataset.attrs)
 
 
-def divergence(od, iName=None, jName=None, kName=None, aliased=True):
+@_cached_diagnostic
+def divergence(od, iName=None, jName=None, kName=None, aliased=True, backend="xgcm"):
     """
     Compute divergence of a vector field.
 
@@ -381,6 +495,10 @@ def divergence(od, iName=None, jName=None, kName=None, aliased=True):
         Name of variable corresponding to k-component.
     aliased: bool
         Set it False when working with private ds and grid.
+    backend: str
+        Options: {'xgcm', 'numba'}
+        numba: fused Numba kernels (including HFac and metrics)
+        for i and j components. See gradient.
 
     Returns
     -------
@@ -410,6 +528,7 @@ def divergence(od, iName=None, jName=None, kName=None, aliased=True):
             "aliased": "bool",
         },
     )
+    _check_options("backend", backend, ["xgcm", "numba"])
 
     if iName == jName == kName is None:
         raise ValueError("At least 1 component must be provided.")
@@ -432,14 +551,29 @@ def divergence(od, iName=None, jName=None, kName=None, aliased=True):
 
         # Add div
         suf = "_dX"
-        grid = od._grid
-        diff = grid.diff(
-            od._ds[NameIN] * od._ds["HFacW"] * od._ds["dyG"],
-            suf[-1],
-            boundary="fill",
-            fill_value=_np.nan,
-        )
-        div[pref + NameOUT + suf] = diff / (od._ds["HFacC"] * od._ds["rA"])
+        stencil = None
+        if backend == "numba":
+            stencil = _fused_stencil_axis(od, suf[-1], od._ds[NameIN])
+        if stencil is None:
+            grid = od._grid
+            diff = grid.diff(
+                od._ds[NameIN] * od._ds["HFacW"] * od._ds["dyG"],
+                suf[-1],
+                boundary="fill",
+                fill_value=_np.nan,
+            )
+            div[pref + NameOUT + suf] = diff / (od._ds["HFacC"] * od._ds["rA"])
+        else:
+            # Fused: difference and scaling in a single pass
+            in_dims, out_dims, index, offset = stencil
+            args = [od._ds[var] for var in [NameIN, "HFacW", "dyG", "HFacC", "rA"]]
+            div[pref + NameOUT + suf] = _fused_stencil(
+                "wdiff",
+                args + [index, offset],
+                [in_dims] * 3 + [out_dims] * 2 + [[], []],
+                out_dims,
+                od._grid,
+            )
 
         # Units
         if "units" in od._ds[NameIN].attrs:
@@ -459,14 +593,29 @@ def divergence(od, iName=None, jName=None, kName=None, aliased=True):
 
         # Add div
         suf = "_dY"
-        grid = od._grid
-        diff = grid.diff(
-            od._ds[NameIN] * od._ds["HFacS"] * od._ds["dxG"],
-            suf[-1],
-            boundary="fill",
-            fill_value=_np.nan,
-        )
-        div[pref + NameOUT + suf] = diff / (od._ds["HFacC"] * od._ds["rA"])
+        stencil = None
+        if backend == "numba":
+            stencil = _fused_stencil_axis(od, suf[-1], od._ds[NameIN])
+        if stencil is None:
+            grid = od._grid
+            diff = grid.diff(
+                od._ds[NameIN] * od._ds["HFacS"] * od._ds["dxG"],
+                suf[-1],
+                boundary="fill",
+                fill_value=_np.nan,
+            )
+            div[pref + NameOUT + suf] = diff / (od._ds["HFacC"] * od._ds["rA"])
+        else:
+            # Fused: difference and scaling in a single pass
+            in_dims, out_dims, index, offset = stencil
+            args = [od._ds[var] for var in [NameIN, "HFacS", "dxG", "HFacC", "rA"]]
+            div[pref + NameOUT + suf] = _fused_stencil(
+                "wdiff",
+                args + [index, offset],
+                [in_dims] * 3 + [out_dims] * 2 + [[], []],
+                out_dims,
+                od._grid,
+            )
         # Units
         if "units" in od._ds[NameIN].attrs:
             units = od._ds[NameIN].attrs["units"] + " m^-1"
@@ -485,7 +634,7 @@ def divergence(od, iName=None, jName=None, kName=None, aliased=True):
         # Add div (same of gradient)
         suf = "_dZ"
         div[pref + NameOUT + suf] = gradient(
-            od, varNameList=NameIN, axesList=suf[-1], aliased=False
+            od, varNameList=NameIN, axesList=suf[-1], aliased=False, backend=backend
         )[pref + NameIN + suf]
 
         # Units
@@ -496,7 +645,8 @@ def divergence(od, iName=None, jName=None, kName=None, aliased=True):
     return _xr.Dataset(div, attrs=od.dataset.attrs)
 
 
-def curl(od, iName=None, jName=None, kName=None, aliased=True):
+@_cached_diagnostic
+def curl(od, iName=None, jName=None, kName=None, aliased=True, backend="xgcm"):
     """
     Compute curl of a vector field.
 
@@ -521,6 +671,9 @@ def curl(od, iName=None, jName=None, kName=None, aliased=True):
         Name of variable corresponding to k-component.
     aliased: bool
         Set it False when working with private ds and grid.
+    backend: str
+        Options: {'xgcm', 'numba'}
+        numba: fused Numba kernel for the k component. See gradient.
 
     Returns
     -------
@@ -552,6 +705,7 @@ def curl(od, iName=None, jName=None, kName=None, aliased=True):
             "aliased": "bool",
         },
     )
+    _check_options("backend", backend, ["xgcm", "numba"])
     if sum(x is None for x in [iName, jName, kName]) >= 2:
         raise ValueError("At least 2 out of 3 components must be provided.")
 
@@ -573,13 +727,36 @@ def curl(od, iName=None, jName=None, kName=None, aliased=True):
 
         # Add curl
         Name = "d" + jNameOUT + "_dX-d" + iNameOUT + "_dY"
-        grid = od._grid
-        crl[Name] = grid.diff(
-            od._ds[jNameIN] * od._ds["dyC"], "X", boundary="fill", fill_value=_np.nan
-        ) - grid.diff(
-            od._ds[iNameIN] * od._ds["dxC"], "Y", boundary="fill", fill_value=_np.nan
-        )
-        crl[Name] = crl[Name] / od._ds["rAz"]
+        stencilX = stencilY = None
+        if backend == "numba":
+            stencilX = _fused_stencil_axis(od, "X", od._ds[jNameIN])
+            stencilY = _fused_stencil_axis(od, "Y", od._ds[iNameIN])
+        if stencilX is None or stencilY is None:
+            grid = od._grid
+            crl[Name] = grid.diff(
+                od._ds[jNameIN] * od._ds["dyC"],
+                "X",
+                boundary="fill",
+                fill_value=_np.nan,
+            ) - grid.diff(
+                od._ds[iNameIN] * od._ds["dxC"],
+                "Y",
+                boundary="fill",
+                fill_value=_np.nan,
+            )
+            crl[Name] = crl[Name] / od._ds["rAz"]
+        else:
+            # Fused: differences and scaling in a single pass
+            inX, outX = [dims[stencilX[2]] for dims in stencilX[:2]]
+            inY, outY = [dims[stencilY[2]] for dims in stencilY[:2]]
+            args = [od._ds[var] for var in [jNameIN, "dyC", iNameIN, "dxC", "rAz"]]
+            crl[Name] = _fused_stencil(
+                "curl",
+                args + [stencilX[3], stencilY[3]],
+                [[outY, inX]] * 2 + [[inY, outX]] * 2 + [[outY, outX], [], []],
+                [outY, outX],
+                od._grid,
+            )
 
         # Units
         checks = ["units" in od._ds[iNameIN].attrs, "units" in od._ds[jNameIN].attrs]
@@ -603,8 +780,12 @@ def curl(od, iName=None, jName=None, kName=None, aliased=True):
         # Add curl using gradients
         Name = "d" + kNameOUT + "_dY-d" + jNameOUT + "_dZ"
         crl[Name] = (
-            gradient(od, kNameIN, "Y", aliased=False)["d" + kNameIN + "_dY"]
-            - gradient(od, jNameIN, "Z", aliased=False)["d" + jNameIN + "_dZ"]
+            gradient(od, kNameIN, "Y", aliased=False, backend=backend)[
+                "d" + kNameIN + "_dY"
+            ]
+            - gradient(od, jNameIN, "Z", aliased=False, backend=backend)[
+                "d" + jNameIN + "_dZ"
+            ]
         )
 
         # Units
@@ -629,8 +810,12 @@ def curl(od, iName=None, jName=None, kName=None, aliased=True):
         # Add curl using gradients
         Name = "d" + iNameOUT + "_dZ-d" + kNameOUT + "_dX"
         crl[Name] = (
-            gradient(od, iNameIN, "Z", aliased=False)["d" + iNameIN + "_dZ"]
-            - gradient(od, kNameIN, "X", aliased=False)["d" + kNameIN + "_dX"]
+            gradient(od, iNameIN, "Z", aliased=False, backend=backend)[
+                "d" + iNameIN + "_dZ"
+            ]
+            - gradient(od, kNameIN, "X", aliased=False, backend=backend)[
+                "d" + kNameIN + "_dX"
+            ]
         )
 
         # Units
@@ -643,7 +828,8 @@ def curl(od, iName=None, jName=None, kName=None, aliased=True):
     return _xr.Dataset(crl, attrs=od.dataset.attrs)
 
 
-def laplacian(od, varNameList=None, axesList=None, aliased=True):
+@_cached_diagnostic
+def laplacian(od, varNameList=None, axesList=None, aliased=True, backend="xgcm"):
     """
     Compute laplacian along specified axis
 
@@ -662,6 +848,9 @@ def laplacian(od, varNameList=None, axesList=None, aliased=True):
         List of axes. If None, compute gradient along all space axes.
     aliased: bool
         Set it False when working with private ds and grid.
+    backend: str
+        Options: {'xgcm', 'numba'}
+        Passed to gradient and divergence.
 
     Returns
     -------
@@ -685,6 +874,7 @@ def laplacian(od, varNameList=None, axesList=None, aliased=True):
         {"od": od, "aliased": aliased},
         {"od": "oceanspy.OceanDataset", "aliased": "bool"},
     )
+    _check_options("backend", backend, ["xgcm", "numba"])
 
     varNameList = _check_list_of_string(varNameList, "varNameList")
 
@@ -731,7 +921,9 @@ def laplacian(od, varNameList=None, axesList=None, aliased=True):
     lap = []
     for _, (varName, varNameOUT) in enumerate(zip(varNameListIN, varNameListOUT)):
         # Compute gradients
-        grad = gradient(od, varNameList=varName, axesList=axesList, aliased=False)
+        grad = gradient(
+            od, varNameList=varName, axesList=axesList, aliased=False, backend=backend
+        )
 
         # Add to od
         od = _copy.copy(od)
@@ -762,7 +954,8 @@ def laplacian(od, varNameList=None, axesList=None, aliased=True):
                 nameB = "dd{}_dZ_dZ".format(varNameOUT)
                 rename_dict[nameA] = nameB
 
-        div = divergence(od, **compNames, aliased=False).rename(rename_dict)
+        div = divergence(od, **compNames, aliased=False, backend=backend)
+        div = div.rename(rename_dict)
         lap = lap + [div]
 
     # Merge
@@ -856,6 +1049,191 @@ def integral(od, varNameList=None, axesList=None, aliased=True):
     )
 
 
+def _add_missing_weights(od, axesList):
+    """
+    Add spacing, area, and HFac needed by _integral_weights.
+    """
+    if set(["X", "Y"]).issubset(axesList):
+        od = _add_missing_variables(od, ["rA", "rAw", "rAs", "rAz"])
+    elif set(["Y"]).issubset(axesList):
+        od = _add_missing_variables(od, ["dyC", "dyF", "dyG", "dyU"])
+    elif set(["X"]).issubset(axesList):
+        od = _add_missing_variables(od, ["dxC", "dxF", "dxG", "dxV"])
+    if set(["Z"]).issubset(axesList):
+        od = _add_missing_variables(od, ["HFacC", "HFacW", "HFacS", "drC", "drF"])
+    return od
+
+
+def _integral_weights(od, dims, axesList):
+    """
+    Build the weights used to integrate and average variables
+    with dimensions dims (simple discretization).
+
+    Parameters
+    ----------
+    od: OceanDataset
+        oceandataset used to compute (with spacing, area, and HFac).
+    dims: 1D array_like
+        Dimensions of the variables.
+    axesList: list
+        List of axes.
+
+    Returns
+    -------
+    delta: xarray.DataArray or int
+        Weights (1 if there is nothing to integrate).
+    dims2sum: list
+        Dimensions to sum.
+    suf: list
+        Suffixes of the integral names.
+    units: list
+        Units of the weights.
+    """
+    delta = 1
+    suf = []
+    units = []
+    dims2sum = []
+
+    # ====
+    # TIME
+    # ====
+    if set(["time"]).issubset(axesList):
+        for t in ["time", "time_midp"]:
+            if t in dims:
+                grid = od._grid
+                diff = grid.diff(od._ds[t], "time", boundary="extend")
+                interp = grid.interp(
+                    diff / _np.timedelta64(1, "s"), "time", boundary="extend"
+                )
+                delta = delta * interp
+                dims2sum = dims2sum + list(od._ds[t].dims)
+                suf = suf + ["dtime"]
+                units = units + ["s"]
+
+    # =======
+    # MOORING
+    # =======
+    if set(["mooring"]).issubset(axesList):
+        for m in ["mooring", "mooring_midp"]:
+            if m in dims:
+                grid = od._grid
+                diff = grid.diff(od._ds[m + "_dist"], "mooring", boundary="extend")
+                interp = grid.interp(diff / 1.0e-3, "mooring", boundary="extend")
+                delta = delta * interp
+                dims2sum = dims2sum + list(od._ds[m + "_dist"].dims)
+                suf = suf + ["dmoor"]
+                units = units + ["m"]
+
+    # =======
+    # STATION
+    # =======
+    if set(["station"]).issubset(axesList):
+        for s in ["station", "station_midp"]:
+            if s in dims:
+                grid = od._grid
+                diff = grid.diff(od._ds[s + "_dist"], "station", boundary="extend")
+                interp = grid.interp(diff / 1.0e-3, "station", boundary="extend")
+                delta = delta * interp
+                dims2sum = dims2sum + list(od._ds[s + "_dist"].dims)
+                suf = suf + ["dstat"]
+                units = units + ["m"]
+
+    # ==========
+    # HORIZONTAL
+    # ==========
+    # Area
+    if set(["X", "Y"]).issubset(axesList):
+        areaList = ["rA", "rAw", "rAs", "rAz"]
+        for area in areaList:
+            if set(od._ds[area].dims).issubset(dims):
+                delta = delta * od._ds[area]
+                dims2sum = dims2sum + [
+                    dim for dim in od._ds[area].dims if dim[0] == "Y" or dim[0] == "X"
+                ]
+                suf = suf + ["dXdY"]
+                units = units + ["m^2"]
+                continue
+
+    # Y
+    elif set(["Y"]).issubset(axesList):
+        yList = ["dyC", "dyF", "dyG", "dyU"]
+        for y in yList:
+            if set(od._ds[y].dims).issubset(dims):
+                delta = delta * od._ds[y]
+                dims2sum = dims2sum + [dim for dim in od._ds[y].dims if dim[0] == "Y"]
+                suf = suf + ["dY"]
+                units = units + ["m"]
+                continue
+
+    # X
+    elif set(["X"]).issubset(axesList):
+        xList = ["dxC", "dxF", "dxG", "dxV"]
+        for x in xList:
+            if set(od._ds[x].dims).issubset(dims):
+                delta = delta * od._ds[x]
+                dims2sum = dims2sum + [dim for dim in od._ds[x].dims if dim[0] == "X"]
+                suf = suf + ["dX"]
+                units = units + ["m"]
+                continue
+
+    # ========
+    # VERTICAL
+    # ========
+    if set(["Z"]).issubset(axesList):
+        # Extract HFac
+        if set(["X", "Y"]).issubset(dims):
+            HFac = od._ds["HFacC"]
+        elif set(["Xp1", "Y"]).issubset(dims):
+            HFac = od._ds["HFacW"]
+        elif set(["X", "Yp1"]).issubset(dims):
+            HFac = od._ds["HFacS"]
+        elif set(["Xp1", "Yp1"]).issubset(dims):
+            HFac = od._grid.interp(
+                od._grid.interp(od._ds["HFacC"], "X", boundary="extend"),
+                "Y",
+                boundary="extend",
+            )
+        else:
+            HFac = None
+
+        zList = ["drC", "drF"]
+
+        foundZ = False
+        for z in zList:
+            if set(od._ds[z].dims).issubset(dims):
+                if z == "drC" and HFac is not None:
+                    HFac = od.grid.interp(HFac, "Z", to="outer", boundary="extend")
+                if HFac is None:
+                    HFac = 1
+                delta = delta * od._ds[z] * HFac
+                dims2sum = dims2sum + list(od._ds[z].dims)
+                suf = suf + ["dZ"]
+                units = units + ["m"]
+                foundZ = True
+                continue
+
+        if foundZ is False:
+            for coord in od._grid.axes["Z"].coords:
+                z = od._grid.axes["Z"].coords[coord]
+                if set([z]).issubset(dims):
+                    dr = od.grid.interp(
+                        od.dataset["drF"], "Z", to=coord, boundary="extend"
+                    )
+                    if HFac is not None:
+                        HFac = od._grid.interp(HFac, "Z", to=coord, boundary="extend")
+                    else:
+                        HFac = 1
+                    delta = delta * dr * HFac
+                    dims2sum = dims2sum + list(dr.dims)
+                    suf = suf + ["dZ"]
+                    units = units + ["m"]
+                    foundZ = True
+                    continue
+
+    return delta, list(set(dims2sum)), suf, units
+
+
+@_cached_diagnostic
 def _integral_and_mean(
     od,
     operation="integral",
@@ -898,180 +1276,46 @@ def _integral_and_mean(
     # Message
     print("Computing {}.".format(operation))
 
+    # Add missing spacing, area, and HFac
+    od = _add_missing_weights(od, axesList)
+
+    # Group variables by dimensions (i.e., grid point):
+    # weights are built once per group,
+    # and variables in a group are reduced together.
+    groups = _OrderedDict()
+    for varName in varNameListIN:
+        groups.setdefault(frozenset(od._ds[varName].dims), []).append(varName)
+
+    # Loop through groups
+    reduced = {}
+    for dims, group in groups.items():
+        delta, dims2sum, suf, units = _integral_weights(od, dims, axesList)
+        ds = od._ds[group]
+        if operation == "integral":
+            # Compute integral
+            ds = (ds * delta).sum(dims2sum)
+            reduced.update({var: (ds[var], None, suf, units) for var in group})
+        elif isinstance(delta, int):
+            reduced.update({var: (ds[var], delta, suf, units) for var in group})
+        else:
+            # Compute weighted mean
+            weight = {}
+            for var in group:
+                weight[var] = delta.where(ds[var].notnull())
+                # Keep dimensions in the right order
+                weight[var] = weight[var].transpose(
+                    *[dim for dim in ds[var].dims if dim in weight[var].dims]
+                )
+            weight = _xr.Dataset(weight)
+            ds = (ds * weight).sum(dims2sum) / weight.sum(dims2sum)
+            reduced.update({var: (ds[var], weight[var], suf, units) for var in group})
+
     # Loop through variables
     to_return = {}
     for _, (varName, varNameOUT) in enumerate(zip(varNameListIN, varNameListOUT)):
-        delta = 1
-        suf = []
-        units = []
-        dims2sum = []
         attrs = od._ds[varName].attrs
-        Int = od._ds[varName]
-
-        # ====
-        # TIME
-        # ====
-        if set(["time"]).issubset(axesList):
-            for t in ["time", "time_midp"]:
-                if t in Int.dims:
-                    grid = od._grid
-                    diff = grid.diff(od._ds[t], "time", boundary="extend")
-                    interp = grid.interp(
-                        diff / _np.timedelta64(1, "s"), "time", boundary="extend"
-                    )
-                    delta = delta * interp
-                    dims2sum = dims2sum + list(od._ds[t].dims)
-                    suf = suf + ["dtime"]
-                    units = units + ["s"]
-
-        # =======
-        # MOORING
-        # =======
-        if set(["mooring"]).issubset(axesList):
-            for m in ["mooring", "mooring_midp"]:
-                if m in Int.dims:
-                    grid = od._grid
-                    diff = grid.diff(od._ds[m + "_dist"], "mooring", boundary="extend")
-                    interp = grid.interp(diff / 1.0e-3, "mooring", boundary="extend")
-                    delta = delta * interp
-                    dims2sum = dims2sum + list(od._ds[m + "_dist"].dims)
-                    suf = suf + ["dmoor"]
-                    units = units + ["m"]
-
-        # =======
-        # STATION
-        # =======
-        if set(["station"]).issubset(axesList):
-            for s in ["station", "station_midp"]:
-                if s in Int.dims:
-                    grid = od._grid
-                    diff = grid.diff(od._ds[s + "_dist"], "station", boundary="extend")
-                    interp = grid.interp(diff / 1.0e-3, "station", boundary="extend")
-                    delta = delta * interp
-                    dims2sum = dims2sum + list(od._ds[s + "_dist"].dims)
-                    suf = suf + ["dstat"]
-                    units = units + ["m"]
-
-        # ==========
-        # HORIZONTAL
-        # ==========
-        # Area
-        if set(["X", "Y"]).issubset(axesList):
-            # Add missing variables
-            areaList = ["rA", "rAw", "rAs", "rAz"]
-            od = _add_missing_variables(od, areaList)
-
-            for area in areaList:
-                if set(od._ds[area].dims).issubset(Int.dims):
-                    delta = delta * od._ds[area]
-                    dims2sum = dims2sum + [
-                        dim
-                        for dim in od._ds[area].dims
-                        if dim[0] == "Y" or dim[0] == "X"
-                    ]
-                    suf = suf + ["dXdY"]
-                    units = units + ["m^2"]
-                    continue
-
-        # Y
-        elif set(["Y"]).issubset(axesList):
-            # Add missing variables
-            yList = ["dyC", "dyF", "dyG", "dyU"]
-            od = _add_missing_variables(od, yList)
-
-            for y in yList:
-                if set(od._ds[y].dims).issubset(Int.dims):
-                    delta = delta * od._ds[y]
-                    dims2sum = dims2sum + [
-                        dim for dim in od._ds[y].dims if dim[0] == "Y"
-                    ]
-                    suf = suf + ["dY"]
-                    units = units + ["m"]
-                    continue
-
-        # X
-        elif set(["X"]).issubset(axesList):
-            # Add missing variables
-            xList = ["dxC", "dxF", "dxG", "dxV"]
-            od = _add_missing_variables(od, xList)
-
-            for x in xList:
-                if set(od._ds[x].dims).issubset(Int.dims):
-                    delta = delta * od._ds[x]
-                    dims2sum = dims2sum + [
-                        dim for dim in od._ds[x].dims if dim[0] == "X"
-                    ]
-                    suf = suf + ["dX"]
-                    units = units + ["m"]
-                    continue
-
-        # ========
-        # VERTICAL
-        # ========
-        if set(["Z"]).issubset(axesList):
-            # Add missing variables
-            HFacList = ["HFacC", "HFacW", "HFacS"]
-            od = _add_missing_variables(od, HFacList)
-
-            # Extract HFac
-            if set(["X", "Y"]).issubset(Int.dims):
-                HFac = od._ds["HFacC"]
-            elif set(["Xp1", "Y"]).issubset(Int.dims):
-                HFac = od._ds["HFacW"]
-            elif set(["X", "Yp1"]).issubset(Int.dims):
-                HFac = od._ds["HFacS"]
-            elif set(["Xp1", "Yp1"]).issubset(Int.dims):
-                HFac = od._grid.interp(
-                    od._grid.interp(od._ds["HFacC"], "X", boundary="extend"),
-                    "Y",
-                    boundary="extend",
-                )
-            else:
-                HFac = None
-
-            # Add missing variables
-            zList = ["drC", "drF"]
-            od = _add_missing_variables(od, zList)
-
-            foundZ = False
-            for z in zList:
-                if set(od._ds[z].dims).issubset(Int.dims):
-                    if z == "drC" and HFac is not None:
-                        HFac = od.grid.interp(HFac, "Z", to="outer", boundary="extend")
-                    if HFac is None:
-                        HFac = 1
-                    delta = delta * od._ds[z] * HFac
-                    dims2sum = dims2sum + list(od._ds[z].dims)
-                    suf = suf + ["dZ"]
-                    units = units + ["m"]
-                    foundZ = True
-                    continue
-
-            if foundZ is False:
-                for coord in od._grid.axes["Z"].coords:
-                    z = od._grid.axes["Z"].coords[coord]
-                    if set([z]).issubset(Int.dims):
-                        dr = od.grid.interp(
-                            od.dataset["drF"], "Z", to=coord, boundary="extend"
-                        )
-                        if HFac is not None:
-                            HFac = od._grid.interp(
-                                HFac, "Z", to=coord, boundary="extend"
-                            )
-                        else:
-                            HFac = 1
-                        delta = delta * dr * HFac
-                        dims2sum = dims2sum + list(dr.dims)
-                        suf = suf + ["dZ"]
-                        units = units + ["m"]
-                        foundZ = True
-                        continue
-
-        dims2sum = list(set(dims2sum))
-        dims2ave = dims2sum
+        Int, weight, suf, units = reduced[varName]
         if operation == "integral":
-            # Compute integral
-            Int = (Int * delta).sum(dims2sum)
             to_return["I(" + varNameOUT + ")" + "".join(suf)] = Int
             if "units" in attrs:
                 Int.attrs["units"] = attrs["units"] + "*" + "*".join(units)
@@ -1079,20 +1323,8 @@ def _integral_and_mean(
                 Int.attrs["units"] = "*".join(units)
 
         else:
-            # Weighted mean
-            # Compute weighted mean
-            wMean = Int
-            weight = delta
-            if not isinstance(weight, int):
-                # Keep dimensions in the right order
-                weight = weight.where(wMean.notnull())
-                weight = weight.transpose(
-                    *[dim for dim in wMean.dims if dim in weight.dims]
-                )
-                wMean = (wMean * weight).sum(dims2ave)
-                wMean = wMean / (weight.sum(dims2ave))
-
             # Store wMean
+            wMean = Int
             wMean.attrs = attrs
             to_return["w_mean_" + varNameOUT] = wMean
             if storeWeights is True and not isinstance(weight, int):
@@ -1106,7 +1338,7 @@ def _integral_and_mean(
 # ================
 # FIXED-NAME
 # ================
-def potential_density_anomaly(od):
+def potential_density_anomaly(od, backend="numpy", dtype="float64"):
     """
     Compute potential density anomaly.
 
@@ -1122,6 +1354,10 @@ def potential_density_anomaly(od):
     ----------
     od: OceanDataset
         oceandataset used to compute.
+    backend: str
+        numpy or numba. See utils.densjmd95.
+    dtype: str
+        float64 or float32. See utils.densjmd95.
 
     Returns
     -------
@@ -1153,10 +1389,8 @@ def potential_density_anomaly(od):
     )
 
     # Create DataArray
-    Sigma0 = eval(
-        "_utils.dens{}(od._ds['S'], od._ds['Temp'], 0)-1000"
-        "".format(params2use["eq_state"])
-    )
+    dens = getattr(_utils, "dens{}".format(params2use["eq_state"]))
+    Sigma0 = dens(od._ds["S"], od._ds["Temp"], 0, backend=backend, dtype=dtype) - 1000
     Sigma0.attrs["units"] = "kg/m^3"
     Sigma0.attrs["long_name"] = "potential density anomaly"
     Sigma0.attrs["OceanSpy_parameters"] = str(params2use)
@@ -1167,7 +1401,7 @@ def potential_density_anomaly(od):
     return _ospy.OceanDataset(ds).dataset
 
 
-def Brunt_Vaisala_frequency(od):
+def Brunt_Vaisala_frequency(od, backend="numpy", dtype="float64"):
     """
     Compute Brunt-Väisälä Frequency.
 
@@ -1182,6 +1416,12 @@ def Brunt_Vaisala_frequency(od):
     ----------
     od: OceanDataset
         oceandataset used to compute.
+    backend: str
+        numpy or numba.
+        Used to compute Sigma0 if missing (see potential_density_anomaly).
+    dtype: str
+        float64 or float32.
+        Used to compute Sigma0 if missing (see potential_density_anomaly).
 
     Returns
     -------
@@ -1198,8 +1438,9 @@ def Brunt_Vaisala_frequency(od):
     _check_instance({"od": od}, "oceanspy.OceanDataset")
 
     # Add missing variables
-    varList = ["Sigma0"]
-    od = _add_missing_variables(od, varList)
+    if _rename_aliased(od, "Sigma0") not in od._ds.variables:
+        ds = potential_density_anomaly(od, backend=backend, dtype=dtype)
+        od = od.merge_into_oceandataset(ds)
 
     # Parameters
     paramsList = ["g", "rho0"]
@@ -1531,7 +1772,7 @@ def kinetic_energy(od):
     return _ospy.OceanDataset(ds).dataset
 
 
-def eddy_kinetic_energy(od):
+def eddy_kinetic_energy(od, streaming=False, time_mean=False):
     """
     Compute eddy kinetic energy.
 
@@ -1545,6 +1786,14 @@ def eddy_kinetic_energy(od):
     ----------
     od: OceanDataset
         oceandataset used to compute.
+    streaming: bool
+        If True, interpolate velocities to C points first,
+        then compute their time means and variances in a single pass
+        over time chunks (Welford/Chan reduction, see Notes).
+        If False, use weighted_mean (two passes).
+    time_mean: bool
+        If True, return the time mean of EKE.
+        If False, return EKE at each time step (lazy, if dask arrays).
 
     Parameters used:
         | eps_nh
@@ -1554,6 +1803,14 @@ def eddy_kinetic_energy(od):
     ds: xarray.Dataset
         | EKE: eddy kinetic energy
 
+    Notes
+    -----
+    With streaming=True and time_mean=True, the time mean of EKE
+    is half the sum of the velocity variances,
+    so velocities are read once (suitable for long time series).
+    Time means are weighted by time steps, as in weighted_mean.
+    Missing values are skipped for each component separately.
+
     References
     ----------
     Numerical Method:
@@ -1566,7 +1823,10 @@ def eddy_kinetic_energy(od):
     """
 
     # Check parameters
-    _check_instance({"od": od}, "oceanspy.OceanDataset")
+    _check_instance(
+        {"od": od, "streaming": streaming, "time_mean": time_mean},
+        {"od": "oceanspy.OceanDataset", "streaming": "bool", "time_mean": "bool"},
+    )
 
     # Add missing variables
     varList = ["U", "V"]
@@ -1581,10 +1841,11 @@ def eddy_kinetic_energy(od):
     V = od._ds["V"]
 
     # Compute anomalies
-    Umean = weighted_mean(od, "U", "time", False)
-    Vmean = weighted_mean(od, "V", "time", False)
-    U = U - Umean["w_mean_U"]
-    V = V - Vmean["w_mean_V"]
+    if not streaming:
+        Umean = weighted_mean(od, "U", "time", False)
+        Vmean = weighted_mean(od, "V", "time", False)
+        U = U - Umean["w_mean_U"]
+        V = V - Vmean["w_mean_V"]
 
     # Extract grid
     grid = od._grid
@@ -1603,7 +1864,12 @@ def eddy_kinetic_energy(od):
     V = grid.interp(V, "Y", boundary="fill", fill_value=_np.nan)
 
     # Sum squared values
-    sum2 = _np.power(U, 2) + _np.power(V, 2)
+    if streaming:
+        sum2 = _squared_time_anomalies(od, U, time_mean) + _squared_time_anomalies(
+            od, V, time_mean
+        )
+    else:
+        sum2 = _np.power(U, 2) + _np.power(V, 2)
 
     # Non-hydrostatic case
     if eps_nh:
@@ -1615,19 +1881,30 @@ def eddy_kinetic_energy(od):
         W = od._ds["W"]
 
         # Compute anomalies
-        Wmean = weighted_mean(od, "W", "time", False)
-        W = W - Wmean["w_mean_W"]
+        if not streaming:
+            Wmean = weighted_mean(od, "W", "time", False)
+            W = W - Wmean["w_mean_W"]
 
         # Interpolate vertical velocity
         W = grid.interp(W, "Z", to="center", boundary="fill", fill_value=_np.nan)
 
         # Sum squared values
-        sum2 = sum2 + eps_nh * _np.power(W, 2)
+        if streaming:
+            sum2 = sum2 + eps_nh * _squared_time_anomalies(od, W, time_mean)
+        else:
+            sum2 = sum2 + eps_nh * _np.power(W, 2)
 
     # Create DataArray
     EKE = sum2 / 2
+    if time_mean and not streaming:
+        delta, dims2sum, _, _ = _integral_weights(od, EKE.dims, ["time"])
+        if not isinstance(delta, int):
+            weight = delta.where(EKE.notnull())
+            EKE = (EKE * weight).sum(dims2sum) / weight.sum(dims2sum)
     EKE.attrs["units"] = "m^2 s^-2"
     EKE.attrs["long_name"] = "eddy kinetic energy"
+    if time_mean:
+        EKE.attrs["long_name"] = "time-mean " + EKE.attrs["long_name"]
     EKE.attrs["OceanSpy_parameters"] = str(params2use)
 
     # Create ds
@@ -1636,6 +1913,34 @@ def eddy_kinetic_energy(od):
     return _ospy.OceanDataset(ds).dataset
 
 
+def _squared_time_anomalies(od, vel, time_mean):
+    """
+    Squared time anomalies of a velocity component,
+    using single-pass moments (see _ospy_utils._streaming_moments).
+
+    Parameters
+    ----------
+    od: OceanDataset
+        oceandataset used to compute.
+    vel: xarray.DataArray
+        Velocity component (on C points).
+    time_mean: bool
+        If True, return the time mean of squared anomalies (i.e., variance).
+
+    Returns
+    -------
+    anom2: xarray.DataArray
+    """
+    delta, dims2sum, _, _ = _integral_weights(od, vel.dims, ["time"])
+    if isinstance(delta, int):
+        # No time dimension
+        return vel * 0
+    mean, var = _streaming_moments(vel, delta, dims2sum[0])
+    if time_mean:
+        return var
+    return _np.power(vel - mean, 2)
+
+
 def horizontal_divergence_velocity(od):
     """
     Compute horizontal divergence of the velocity field.
@@ -2034,6 +2339,76 @@ def mooring_volume_transport(od):
     """
 
     # Check parameters
+    od = _check_mooring_array(od)
+
+    # Message
+    print("Computing horizontal volume transport.")
+
+    return _mooring_volume_transport(od)
+
+
+def sections_volume_transport(sections):
+    """
+    Compute horizontal volume flux
+    through many mooring array sections at once.
+    Each section is processed as in mooring_volume_transport,
+    and results are concatenated along the new dimension `section`.
+    Sections are padded along `mooring` with NaNs,
+    so they can have different numbers of moorings.
+    No values are loaded: if sections are backed by dask,
+    all transports are part of the same lazy graph.
+
+    Parameters
+    ----------
+    sections: list or dict
+        oceandatasets subsampled using `subsample.mooring_array`.
+        If dict, keys are used as `section` coordinate.
+
+    Returns
+    -------
+    ds: xarray.Dataset
+        Same variables as mooring_volume_transport,
+        with the additional dimension `section`.
+
+    See Also
+    --------
+    mooring_volume_transport
+    subsample.mooring_array
+    """
+
+    # Check parameters
+    _check_instance({"sections": sections}, {"sections": ["list", "dict"]})
+    if isinstance(sections, dict):
+        names = list(sections.keys())
+        sections = list(sections.values())
+    else:
+        names = list(range(len(sections)))
+    if len(sections) == 0:
+        raise ValueError("`sections` must contain at least one oceandataset")
+    sections = [_check_mooring_array(od) for od in sections]
+
+    # Message
+    print("Computing horizontal volume transport of {} sections.".format(len(names)))
+
+    ds = _xr.concat(
+        [_mooring_volume_transport(od) for od in sections],
+        dim=_xr.DataArray(names, dims="section", name="section"),
+        data_vars="all",
+        coords="different",
+        compat="equals",
+        join="outer",
+    )
+    ds.attrs = sections[0].dataset.attrs
+
+    return _ospy.OceanDataset(ds).dataset
+
+
+def _check_mooring_array(od):
+    """
+    Check that od is a mooring array, and add the variables needed
+    by mooring_volume_transport.
+    """
+
     _check_instance({"od": od}, "oceanspy.OceanDataset")
 
     if "mooring" not in od._ds.dims:
@@ -2057,10 +2432,14 @@ def mooring_volume_transport(od):
         "XV",
         "YV",
     ]
-    od = _add_missing_variables(od, varList)
+    return _add_missing_variables(od, varList)
 
-    # Message
-    print("Computing horizontal volume transport.")
+
+def _mooring_volume_transport(od):
+    """
+    Horizontal volume flux through a checked mooring array.
+    See mooring_volume_transport.
+    """
 
     # Extract variables
     mooring = od._ds["mooring"]
@@ -2085,16 +2464,10 @@ def mooring_volume_transport(od):
     V1 = V_tran.isel(Yp1=1).fillna(0)
     V0 = V_tran.isel(Yp1=0).fillna(0)
 
-    # Initialize direction
-    U0_dir = _np.zeros((len(XC), 2))
-    U1_dir = _np.zeros((len(XC), 2))
-    V0_dir = _np.zeros((len(YC), 2))
-    V1_dir = _np.zeros((len(YC), 2))
-
     # Steps
     if set(["diffX", "diffY"]).issubset(od._ds.data_vars):
-        diffX = od._ds["diffX"]
-        diffY = od._ds["diffY"]
+        diffX = od._ds["diffX"].values
+        diffY = od._ds["diffY"].values
     else:
         Xind = od._ds["Xind"].squeeze(("Y", "X"))
         Yind = od._ds["Yind"].squeeze(("Y", "X"))
@@ -2110,105 +2483,25 @@ def mooring_volume_transport(od):
     else:
         closed = False
 
-    # Loop
-    Usign = 1
-    Vsign = 1
-    keepXf = False
-    keepYf = False
-    for i in range(len(diffX) - 1):
-        if diffY[i] == 0 and diffY[i + 1] == 0:  # Zonal
-            V1_dir[i + 1, :] = Vsign
-            V0_dir[i + 1, :] = Vsign
-        elif diffX[i] == 0 and diffX[i + 1] == 0:  # Meridional
-            U1_dir[i + 1, :] = Usign
-            U0_dir[i + 1, :] = Usign
-
-        # Corners
-        elif diffY[i] < 0 and diffX[i + 1] > 0:  # |_
-            Vsign = Usign
-            keepYf = keepXf
-            U0_dir[i + 1, :] = Usign
-            V0_dir[i + 1, :] = Vsign
-        elif diffY[i + 1] > 0 and diffX[i] < 0:
-            Usign = Vsign
-            keepXf = keepYf
-            U0_dir[i + 1, :] = Usign
-            V0_dir[i + 1, :] = Vsign
-
-        elif diffY[i] > 0 and diffX[i + 1] > 0:  # |‾
-            Vsign = -Usign
-            keepYf = not keepXf
-            U0_dir[i + 1, :] = Usign
-            V1_dir[i + 1, :] = Vsign
-        elif diffY[i + 1] < 0 and diffX[i] < 0:
-            Usign = -Vsign
-            keepXf = not keepYf
-            U0_dir[i + 1, :] = Usign
-            V1_dir[i + 1, :] = Vsign
-
-        elif diffX[i] > 0 and diffY[i + 1] < 0:  # ‾|
-            Usign = Vsign
-            keepXf = keepYf
-            V1_dir[i + 1, :] = Vsign
-            U1_dir[i + 1, :] = Usign
-        elif diffX[i + 1] < 0 and diffY[i] > 0:
-            Vsign = Usign
-            keepYf = keepXf
-            V1_dir[i + 1, :] = Vsign
-            U1_dir[i + 1, :] = Usign
-
-        elif diffX[i] > 0 and diffY[i + 1] > 0:  # _|
-            Usign = -Vsign
-            keepXf = not keepYf
-            V0_dir[i + 1, :] = Vsign
-            U1_dir[i + 1, :] = Usign
-        elif diffX[i + 1] < 0 and diffY[i] < 0:
-            Vsign = -Usign
-            keepYf = not keepXf
-            V0_dir[i + 1, :] = Vsign
-            U1_dir[i + 1, :] = Usign
-
-        if keepXf:
-            U1_dir[i + 1, 0] = 0
-            U0_dir[i + 1, 1] = 0
-        else:
-            U0_dir[i + 1, 0] = 0
-            U1_dir[i + 1, 1] = 0
-        if keepYf:
-            V1_dir[i + 1, 0] = 0
-            V0_dir[i + 1, 1] = 0
-        else:
-            V0_dir[i + 1, 0] = 0
-            V1_dir[i + 1, 1] = 0
+    # Directions
+    U0_dir, U1_dir, V0_dir, V1_dir = _mooring_directions(diffX, diffY, len(XC))
+
+    # Mask first mooring, and last if the array is open
+    masked = [0] if closed else [0, -1]
+    for this_dir in (U0_dir, U1_dir, V0_dir, V1_dir):
+        this_dir[masked] = _np.nan
 
     # Create direction DataArrays.
     # Add a switch to return this? Useful to debug and/or plot velocities.
-    U1_dir = _xr.DataArray(
-        U1_dir, coords={"mooring": mooring, "path": [0, 1]}, dims=("mooring", "path")
-    )
-    U0_dir = _xr.DataArray(
-        U0_dir, coords={"mooring": mooring, "path": [0, 1]}, dims=("mooring", "path")
-    )
-    V1_dir = _xr.DataArray(
-        V1_dir, coords={"mooring": mooring, "path": [0, 1]}, dims=("mooring", "path")
-    )
-    V0_dir = _xr.DataArray(
-        V0_dir, coords={"mooring": mooring, "path": [0, 1]}, dims=("mooring", "path")
+    U0_dir, U1_dir, V0_dir, V1_dir = (
+        _xr.DataArray(
+            this_dir,
+            coords={"mooring": mooring, "path": [0, 1]},
+            dims=("mooring", "path"),
+        )
+        for this_dir in (U0_dir, U1_dir, V0_dir, V1_dir)
     )
 
-    # Mask first mooring
-    U1_dir = U1_dir.where(U1_dir["mooring"] != U1_dir["mooring"].isel(mooring=0))
-    U0_dir = U0_dir.where(U0_dir["mooring"] != U0_dir["mooring"].isel(mooring=0))
-    V1_dir = V1_dir.where(V1_dir["mooring"] != V1_dir["mooring"].isel(mooring=0))
-    V0_dir = V0_dir.where(V0_dir["mooring"] != V0_dir["mooring"].isel(mooring=0))
-
-    if not closed:
-        # Mask first mooring
-        U1_dir = U1_dir.where(U1_dir["mooring"] != U1_dir["mooring"].isel(mooring=-1))
-        U0_dir = U0_dir.where(U0_dir["mooring"] != U0_dir["mooring"].isel(mooring=-1))
-        V1_dir = V1_dir.where(V1_dir["mooring"] != V1_dir["mooring"].isel(mooring=-1))
-        V0_dir = V0_dir.where(V0_dir["mooring"] != V0_dir["mooring"].isel(mooring=-1))
-
     # Compute transport
     transport = (U1 * U1_dir + U0 * U0_dir + V1 * V1_dir + V0 * V0_dir) * 1.0e-6
     transport.attrs["units"] = "Sv"
@@ -2278,6 +2571,109 @@ def mooring_volume_transport(od):
     return _ospy.OceanDataset(ds).dataset
 
 
+def _mooring_directions(diffX, diffY, size):
+    """
+    Direction of the zonal and meridional transports
+    on both sides of each mooring.
+
+    Every pair of consecutive steps is classified (zonal, meridional,
+    or one of the corner types), and corners propagate the sign of one
+    component to the other.
+    The sign carried by each corner only depends on the closest corner
+    it inherits from, so signs are resolved at once by pointer jumping
+    rather than walking the array.
+
+    Parameters
+    ----------
+    diffX, diffY: 1D array_like
+        Index steps between moorings.
+    size: int
+        Number of moorings.
+
+    Returns
+    -------
+    U0_dir, U1_dir, V0_dir, V1_dir: numpy.ndarray
+        Directions with shape (size, 2), where the second axis is `path`.
+    """
+
+    diffX = _np.asarray(diffX)
+    diffY = _np.asarray(diffY)
+    dX0, dX1 = diffX[:-1], diffX[1:]
+    dY0, dY1 = diffY[:-1], diffY[1:]
+
+    # Step types, in order of precedence.
+    # Columns: target of the sign update (0: none, 1: U, 2: V),
+    #          sign flip, U0, U1, V0, V1
+    conditions = [
+        (dY0 == 0) & (dY1 == 0),  # Zonal
+        (dX0 == 0) & (dX1 == 0),  # Meridional
+        (dY0 < 0) & (dX1 > 0),  # |_
+        (dY1 > 0) & (dX0 < 0),
+        (dY0 > 0) & (dX1 > 0),  # |‾
+        (dY1 < 0) & (dX0 < 0),
+        (dX0 > 0) & (dY1 < 0),  # ‾|
+        (dX1 < 0) & (dY0 > 0),
+        (dX0 > 0) & (dY1 > 0),  # _|
+        (dX1 < 0) & (dY0 < 0),
+    ]
+    table = _np.array(
+        [
+            [0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 1, 1],
+            [0, 0, 1, 1, 0, 0],
+            [2, 0, 1, 0, 1, 0],
+            [1, 0, 1, 0, 1, 0],
+            [2, 1, 1, 0, 0, 1],
+            [1, 1, 1, 0, 0, 1],
+            [1, 0, 0, 1, 0, 1],
+            [2, 0, 0, 1, 0, 1],
+            [1, 1, 0, 1, 1, 0],
+            [2, 1, 0, 1, 1, 0],
+        ]
+    )
+    steps = table[_np.select(conditions, range(1, len(conditions) + 1), 0)]
+    target, flip = steps[:, 0], steps[:, 1].astype(bool)
+    nsteps = len(steps)
+    index = _np.arange(nsteps)
+
+    # Last corner updating U (V) at or before each step (-1: none)
+    last = {
+        t: (
+            _np.maximum.accumulate(_np.where(target == t, index, -1))
+            if nsteps
+            else index
+        )
+        for t in (1, 2)
+    }
+
+    # Each corner inherits from the last corner updating the other component
+    source = _np.full(nsteps, -1)
+    for t, other in ((1, 2), (2, 1)):
+        corners = index[(target == t) & (index > 0)]
+        source[corners] = last[other][corners - 1]
+
+    # Resolve flip parity along the chains of corners
+    parity = flip.copy()
+    while (source >= 0).any():
+        linked = source >= 0
+        parity = _np.where(linked, parity ^ parity[source], parity)
+        source = _np.where(linked, source[source], -1)
+
+    Usign, Vsign = (_np.where(last[t] >= 0, 1 - 2 * parity[last[t]], 1) for t in (1, 2))
+
+    # Fill directions and keep one side per path
+    dirs = []
+    for col, sign, keep in zip(range(2, 6), (Usign, Usign, Vsign, Vsign), (1, 0, 1, 0)):
+        this_dir = _np.zeros((size, 2))
+        values = _np.where(steps[:, col] == 1, sign, 0)
+        flipped = sign == -1
+        this_dir[1 : nsteps + 1, 0] = _np.where(flipped == keep, values, 0)
+        this_dir[1 : nsteps + 1, 1] = _np.where(flipped != keep, values, 0)
+        dirs.append(this_dir)
+
+    return tuple(dirs)
+
+
 def geographical_aligned_velocities(od):
     """
     Compute zonal and meridional velocities
@@ -2516,36 +2912,15 @@ def heat_budget(od):
     See Also
     --------
     salt_budget
+    tracer_budgets
     gradient
     """
 
     # Check parameters
     _check_instance({"od": od}, "oceanspy.OceanDataset")
 
-    # Add missing variables
-    varList = [
-        "Temp",
-        "Eta",
-        "Depth",
-        "ADVx_TH",
-        "ADVy_TH",
-        "ADVr_TH",
-        "DFrI_TH",
-        "KPPg_TH",
-        "TFLUX",
-        "oceQsw_AVG",
-        "time",
-        "HFacC",
-        "HFacW",
-        "HFacS",
-        "drF",
-        "rA",
-        "Zp1",
-    ]
-    od = _add_missing_variables(od, varList)
-
     # Parameters
-    paramsList = ["rho0", "c_p"]
+    paramsList = _BUDGET_TRACERS["heat"]["params"]
     params2use = {par: od.parameters[par] for par in od.parameters if par in paramsList}
 
     # Message
@@ -2554,97 +2929,7 @@ def heat_budget(od):
         " the following parameters: {}.".format(params2use)
     )
 
-    # Extract variables
-    Temp = od._ds["Temp"]
-    Eta = od._ds["Eta"]
-    Depth = od._ds["Depth"]
-    ADVx_TH = od._ds["ADVx_TH"]
-    ADVy_TH = od._ds["ADVy_TH"]
-    ADVr_TH = od._ds["ADVr_TH"]
-    DFrI_TH = od._ds["DFrI_TH"]
-    KPPg_TH = od._ds["KPPg_TH"]
-    TFLUX = od._ds["TFLUX"]
-    oceQsw_AVG = od._ds["oceQsw_AVG"]
-    HFacC = od._ds["HFacC"]
-    HFacW = od._ds["HFacW"]
-    HFacS = od._ds["HFacS"]
-    drF = od._ds["drF"]
-    rA = od._ds["rA"]
-    Zp1 = od._ds["Zp1"]
-
-    # Extract parameters
-    rho0 = od.parameters["rho0"]
-    c_p = od.parameters["c_p"]
-
-    # Extract grid
-    grid = od._grid
-
-    # Compute useful variables
-    dzMat = drF * HFacC
-    CellVol = rA * dzMat
-
-    # Initialize dataset
-    ds = _xr.Dataset({})
-
-    # Total tendency
-    z_star_scale = 1 + Eta / Depth
-    tomerge = (Temp * z_star_scale).where(HFacC != 0).rename("Tscaled")
-    od = od.merge_into_oceandataset(tomerge)
-    units = "degC/s"
-    ds["tendH"] = gradient(od, "Tscaled", "time")["dTscaled_dtime"]
-    ds["tendH"].attrs["units"] = units
-    ds["tendH"].attrs["long_name"] = "Heat total tendency"
-    ds["tendH"].attrs["OceanSpy_parameters"] = str(params2use)
-
-    # Horizontal convergence
-    ds["adv_hConvH"] = -(
-        grid.diff(ADVx_TH.where(HFacW != 0), "X", boundary="fill", fill_value=_np.nan)
-        + grid.diff(ADVy_TH.where(HFacS != 0), "Y", boundary="fill", fill_value=_np.nan)
-    )
-    ds["adv_hConvH"] = ds["adv_hConvH"] / CellVol
-    ds["adv_hConvH"].attrs["units"] = units
-    long_name = "Heat horizontal advective convergence"
-    ds["adv_hConvH"].attrs["long_name"] = long_name
-    ds["adv_hConvH"].attrs["OceanSpy_parameters"] = str(params2use)
-
-    # Vertical convergence
-    for i, (var_in, name_out, long_name) in enumerate(
-        zip(
-            [ADVr_TH, DFrI_TH, KPPg_TH],
-            ["adv_vConvH", "dif_vConvH", "kpp_vConvH"],
-            ["advective", "diffusive", "kpp"],
-        )
-    ):
-        ds[name_out] = grid.diff(var_in, "Z", boundary="fill", fill_value=_np.nan)
-        ds[name_out] = ds[name_out].where(HFacC != 0) / CellVol
-        ds[name_out].attrs["units"] = units
-        ds[name_out].attrs["long_name"] = "Heat vertical {} convergence" "".format(
-            long_name
-        )
-        ds[name_out].attrs["OceanSpy_parameters"] = str(params2use)
-
-    # Surface flux
-    # TODO: add these to parameters list?
-    R = 0.62
-    zeta1 = 0.6
-    zeta2 = 20
-    q = R * _np.exp(Zp1 / zeta1) + (1 - R) * _np.exp(Zp1 / zeta2)
-    q = q.where(Zp1 >= -200, 0)
-    forcH = -grid.diff(q, "Z").where(HFacC != 0)
-    if Zp1.isel(Zp1=0) == 0:
-        forcH_surf = (TFLUX - (1 - forcH.isel(Z=0)) * oceQsw_AVG).expand_dims(
-            "Z", Temp.dims.index("Z")
-        )
-        forcH_bott = forcH.isel(Z=slice(1, None)) * oceQsw_AVG
-        forcH = _xr.concat([forcH_surf, forcH_bott], dim="Z")
-    else:
-        forcH = forcH * oceQsw_AVG
-    ds["forcH"] = forcH / (rho0 * c_p * dzMat)
-    ds["forcH"].attrs["units"] = units
-    ds["forcH"].attrs["long_name"] = "Heat surface forcing"
-    ds["forcH"].attrs["OceanSpy_parameters"] = str(params2use)
-
-    return _ospy.OceanDataset(ds).dataset
+    return _tracer_budgets(od, ["heat"], residual=False)
 
 
 def salt_budget(od):
@@ -2692,36 +2977,15 @@ def salt_budget(od):
     See Also
     --------
     heat_budget
+    tracer_budgets
     gradient
     """
 
     # Check parameters
     _check_instance({"od": od}, "oceanspy.OceanDataset")
 
-    # Add missing variables
-    varList = [
-        "S",
-        "Eta",
-        "Depth",
-        "ADVx_SLT",
-        "ADVy_SLT",
-        "ADVr_SLT",
-        "DFrI_SLT",
-        "KPPg_SLT",
-        "SFLUX",
-        "oceSPtnd",
-        "time",
-        "HFacC",
-        "HFacW",
-        "HFacS",
-        "drF",
-        "rA",
-        "Zp1",
-    ]
-    od = _add_missing_variables(od, varList)
-
     # Parameters
-    paramsList = ["rho0"]
+    paramsList = _BUDGET_TRACERS["salt"]["params"]
     params2use = {par: od.parameters[par] for par in od.parameters if par in paramsList}
 
     # Message
@@ -2730,26 +2994,161 @@ def salt_budget(od):
         " using the following parameters: {}.".format(params2use)
     )
 
-    # Extract variables
-    S = od._ds["S"]
+    return _tracer_budgets(od, ["salt"], residual=False)
+
+
+def tracer_budgets(od, tracers=None, residual=True):
+    """
+    Compute terms to close the budgets of several tracers at once.
+
+    Budgets are computed as in heat_budget and salt_budget,
+    but terms shared by all tracers (e.g., cell volumes,
+    z* scaling, masks) are only computed once
+    and all tendencies are obtained with a single call to gradient.
+    Passive tracers (e.g., TRAC01) are supported
+    using the MITgcm diagnostics of their fluxes (e.g., ADVxTr01),
+    and have no surface forcing term.
+
+    .. math::
+        \\text{res = tend - (adv_hConv + adv_vConv
+         + dif_vConv + kpp_vConv + forc)}
+
+    Parameters used:
+        | c_p
+        | rho0
+
+    Parameters
+    ----------
+    od: OceanDataset
+        oceandataset used to compute
+    tracers: list or None
+        Tracers to compute budgets of:
+        'heat', 'salt', or names of passive tracers (e.g., 'TRAC01').
+        If None, ['heat', 'salt'].
+    residual: bool
+        If True, also return the budget residuals.
+
+    Returns
+    -------
+    ds: xarray.Dataset
+        | tendH, adv_hConvH, ...: Heat budget terms (see heat_budget)
+        | tendS, adv_hConvS, ...: Salt budget terms (see salt_budget)
+        | tendTRAC01, adv_hConvTRAC01, ...: Passive tracer budget terms
+        | resH, resS, resTRAC01, ...: Budget residuals
+
+    See Also
+    --------
+    heat_budget
+    salt_budget
+    """
+
+    # Check parameters
+    _check_instance(
+        {"od": od, "tracers": tracers, "residual": residual},
+        {
+            "od": "oceanspy.OceanDataset",
+            "tracers": ["type(None)", "list"],
+            "residual": "bool",
+        },
+    )
+    if tracers is None:
+        tracers = ["heat", "salt"]
+    if len(tracers) == 0:
+        raise ValueError("`tracers` must contain at least one tracer")
+
+    # Parameters
+    paramsList = [par for tracer in tracers for par in _budget_tracer(tracer)["params"]]
+    params2use = {par: od.parameters[par] for par in od.parameters if par in paramsList}
+
+    # Message
+    print(
+        "Computing budget terms of {} using"
+        " the following parameters: {}.".format(tracers, params2use)
+    )
+
+    return _tracer_budgets(od, tracers, residual=residual)
+
+
+# Tracers with dedicated budget functions.
+# Passive tracers are handled by _budget_tracer.
+_BUDGET_TRACERS = _OrderedDict(
+    heat=dict(
+        name="Temp",
+        scaled="Tscaled",
+        suffix="H",
+        long_name="Heat",
+        units="degC/s",
+        fluxes=["ADVx_TH", "ADVy_TH", "ADVr_TH", "DFrI_TH", "KPPg_TH"],
+        forcing=["TFLUX", "oceQsw_AVG"],
+        params=["rho0", "c_p"],
+    ),
+    salt=dict(
+        name="S",
+        scaled="Sscaled",
+        suffix="S",
+        long_name="Salt",
+        units="psu/s",
+        fluxes=["ADVx_SLT", "ADVy_SLT", "ADVr_SLT", "DFrI_SLT", "KPPg_SLT"],
+        forcing=["SFLUX", "oceSPtnd"],
+        params=["rho0"],
+    ),
+)
+
+
+def _budget_tracer(tracer):
+    """
+    Return names, units, and parameters used to close the budget of tracer.
+    """
+
+    if tracer in _BUDGET_TRACERS:
+        return _BUDGET_TRACERS[tracer]
+
+    match = _re.match(r"^TRAC(\w{2})$", str(tracer))
+    if match is None:
+        raise ValueError(
+            "`{}` is not a valid tracer."
+            " Options are 'heat', 'salt', or passive tracers"
+            " (e.g., 'TRAC01')".format(tracer)
+        )
+    return dict(
+        name=tracer,
+        scaled=tracer + "scaled",
+        suffix=tracer,
+        long_name="Passive tracer {}".format(tracer),
+        units=None,
+        fluxes=[
+            flux + "Tr" + match.group(1)
+            for flux in ["ADVx", "ADVy", "ADVr", "DFrI", "KPPg"]
+        ],
+        forcing=[],
+        params=[],
+    )
+
+
+def _tracer_budgets(od, tracers, residual):
+    """
+    Compute budget terms of tracers, sharing the terms they have in common.
+    See tracer_budgets.
+    """
+
+    infos = [_budget_tracer(tracer) for tracer in tracers]
+
+    # Add missing variables
+    varList = ["Eta", "Depth", "time", "HFacC", "HFacW", "HFacS", "drF", "rA", "Zp1"]
+    for info in infos:
+        varList += [info["name"]] + info["fluxes"] + info["forcing"]
+    od = _add_missing_variables(od, list(_OrderedDict.fromkeys(varList)))
+
+    # Extract shared variables
     Eta = od._ds["Eta"]
     Depth = od._ds["Depth"]
-    ADVx_SLT = od._ds["ADVx_SLT"]
-    ADVy_SLT = od._ds["ADVy_SLT"]
-    ADVr_SLT = od._ds["ADVr_SLT"]
-    DFrI_SLT = od._ds["DFrI_SLT"]
-    KPPg_SLT = od._ds["KPPg_SLT"]
-    SFLUX = od._ds["SFLUX"]
-    oceSPtnd = od._ds["oceSPtnd"]
     HFacC = od._ds["HFacC"]
     HFacW = od._ds["HFacW"]
     HFacS = od._ds["HFacS"]
     drF = od._ds["drF"]
     rA = od._ds["rA"]
     Zp1 = od._ds["Zp1"]
-
-    # Extract parameters
-    rho0 = od.parameters["rho0"]
+    surface = bool(Zp1.isel(Zp1=0) == 0)
 
     # Extract grid
     grid = od._grid
@@ -2757,67 +3156,120 @@ def salt_budget(od):
     # Compute useful variables
     dzMat = drF * HFacC
     CellVol = rA * dzMat
+    maskC = HFacC != 0
+    maskW = HFacW != 0
+    maskS = HFacS != 0
+
+    # Total tendencies
+    z_star_scale = 1 + Eta / Depth
+    tomerge = _xr.merge(
+        [
+            (od._ds[info["name"]] * z_star_scale).where(maskC).rename(info["scaled"])
+            for info in infos
+        ]
+    )
+    od = od.merge_into_oceandataset(tomerge)
+    tend = gradient(od, [info["scaled"] for info in infos], "time")
 
     # Initialize dataset
     ds = _xr.Dataset({})
 
-    # Total tendency
-    z_star_scale = 1 + Eta / Depth
-    var2merge = (S * z_star_scale).where(HFacC != 0).rename("Sscaled")
-    od = od.merge_into_oceandataset(var2merge)
-    units = "psu/s"
-    ds["tendS"] = gradient(od, "Sscaled", "time")["dSscaled_dtime"]
-    ds["tendS"].attrs["units"] = units
-    ds["tendS"].attrs["long_name"] = "Salt total tendency"
-    ds["tendS"].attrs["OceanSpy_parameters"] = str(params2use)
-
-    # Horizontal convergence
-    ds["adv_hConvS"] = (
-        -(
-            grid.diff(
-                ADVx_SLT.where(HFacW != 0), "X", boundary="fill", fill_value=_np.nan
-            )
-            + grid.diff(
-                ADVy_SLT.where(HFacS != 0), "Y", boundary="fill", fill_value=_np.nan
+    for info in infos:
+        suf = info["suffix"]
+        units = info["units"]
+        if units is None and "units" in od._ds[info["name"]].attrs:
+            units = "{}/s".format(od._ds[info["name"]].attrs["units"])
+        params2use = {
+            par: od.parameters[par] for par in od.parameters if par in info["params"]
+        }
+        ADVx, ADVy, ADVr, DFrI, KPPg = (od._ds[flux] for flux in info["fluxes"])
+        names = ["tend" + suf, "adv_hConv" + suf]
+
+        # Total tendency
+        ds["tend" + suf] = tend["d{}_dtime".format(info["scaled"])]
+        long_names = ["{} total tendency".format(info["long_name"])]
+
+        # Horizontal convergence
+        ds["adv_hConv" + suf] = (
+            -(
+                grid.diff(ADVx.where(maskW), "X", boundary="fill", fill_value=_np.nan)
+                + grid.diff(ADVy.where(maskS), "Y", boundary="fill", fill_value=_np.nan)
             )
+            / CellVol
         )
-        / CellVol
-    )
-    ds["adv_hConvS"].attrs["units"] = units
-    long_name = "Salt horizontal advective convergence"
-    ds["adv_hConvS"].attrs["long_name"] = long_name
-    ds["adv_hConvS"].attrs["OceanSpy_parameters"] = str(params2use)
+        long_names += ["{} horizontal advective convergence".format(info["long_name"])]
 
-    # Vertical convergence
-    for i, (var_in, name_out, long_name) in enumerate(
-        zip(
-            [ADVr_SLT, DFrI_SLT, KPPg_SLT],
-            ["adv_vConvS", "dif_vConvS", "kpp_vConvS"],
+        # Vertical convergence
+        for var_in, name_out, long_name in zip(
+            [ADVr, DFrI, KPPg],
+            ["adv_vConv" + suf, "dif_vConv" + suf, "kpp_vConv" + suf],
             ["advective", "diffusive", "kpp"],
-        )
-    ):
-        ds[name_out] = grid.diff(var_in, "Z", boundary="fill", fill_value=_np.nan)
-        ds[name_out] = ds[name_out].where(HFacC != 0) / CellVol
-        ds[name_out].attrs["units"] = units
-        ds[name_out].attrs["long_name"] = "Salt vertical {} convergence" "".format(
-            long_name
-        )
-        ds[name_out].attrs["OceanSpy_parameters"] = str(params2use)
+        ):
+            ds[name_out] = grid.diff(var_in, "Z", boundary="fill", fill_value=_np.nan)
+            ds[name_out] = ds[name_out].where(maskC) / CellVol
+            names += [name_out]
+            long_names += [
+                "{} vertical {} convergence".format(info["long_name"], long_name)
+            ]
+
+        # Surface flux
+        if info["forcing"]:
+            ds["forc" + suf] = _budget_forcing(od, info, surface, dzMat, maskC)
+            names += ["forc" + suf]
+            long_names += ["{} surface forcing".format(info["long_name"])]
+
+        # Residual
+        if residual:
+            ds["res" + suf] = ds[names[0]] - sum(ds[name] for name in names[1:])
+            names += ["res" + suf]
+            long_names += ["{} budget residual".format(info["long_name"])]
+
+        for name, long_name in zip(names, long_names):
+            if units is not None:
+                ds[name].attrs["units"] = units
+            ds[name].attrs["long_name"] = long_name
+            ds[name].attrs["OceanSpy_parameters"] = str(params2use)
 
-    # Surface flux
-    forcS = oceSPtnd
-    if Zp1.isel(Zp1=0) == 0:
-        forcS_surf = (SFLUX + forcS.isel(Z=0)).expand_dims("Z", S.dims.index("Z"))
-        forcS_bott = forcS.isel(Z=slice(1, None))
-        forcS = _xr.concat([forcS_surf, forcS_bott], dim="Z")
+    return _ospy.OceanDataset(ds).dataset
 
-    # Use same chunking
-    ds["forcS"] = forcS / (rho0 * dzMat)
-    ds["forcS"].attrs["units"] = units
-    ds["forcS"].attrs["long_name"] = "Salt surface forcing"
-    ds["forcS"].attrs["OceanSpy_parameters"] = str(params2use)
 
-    return _ospy.OceanDataset(ds).dataset
+def _budget_forcing(od, info, surface, dzMat, maskC):
+    """
+    Surface forcing term of heat and salt budgets.
+    """
+
+    rho0 = od.parameters["rho0"]
+    tracer = od._ds[info["name"]]
+
+    if info["suffix"] == "H":
+        TFLUX, oceQsw_AVG = (od._ds[var] for var in info["forcing"])
+        Zp1 = od._ds["Zp1"]
+
+        # Shortwave penetration
+        # TODO: add these to parameters list?
+        R = 0.62
+        zeta1 = 0.6
+        zeta2 = 20
+        q = R * _np.exp(Zp1 / zeta1) + (1 - R) * _np.exp(Zp1 / zeta2)
+        q = q.where(Zp1 >= -200, 0)
+        forc = -od._grid.diff(q, "Z").where(maskC)
+        if surface:
+            forc_surf = (TFLUX - (1 - forc.isel(Z=0)) * oceQsw_AVG).expand_dims(
+                "Z", tracer.dims.index("Z")
+            )
+            forc_bott = forc.isel(Z=slice(1, None)) * oceQsw_AVG
+            forc = _xr.concat([forc_surf, forc_bott], dim="Z")
+        else:
+            forc = forc * oceQsw_AVG
+        return forc / (rho0 * od.parameters["c_p"] * dzMat)
+
+    SFLUX, oceSPtnd = (od._ds[var] for var in info["forcing"])
+    forc = oceSPtnd
+    if surface:
+        forc_surf = (SFLUX + forc.isel(Z=0)).expand_dims("Z", tracer.dims.index("Z"))
+        forc_bott = forc.isel(Z=slice(1, None))
+        forc = _xr.concat([forc_surf, forc_bott], dim="Z")
+    return forc / (rho0 * dzMat)
 
 
 def missing_horizontal_spacing(od):
@@ -3016,6 +3468,11 @@ class _computeMethods(object):
         ds = salt_budget(self._od, **kwargs)
         return self._od.merge_into_oceandataset(ds, overwrite=overwrite)
 
+    @_functools.wraps(tracer_budgets)
+    def tracer_budgets(self, overwrite=False, **kwargs):
+        ds = tracer_budgets(self._od, **kwargs)
+        return self._od.merge_into_oceandataset(ds, overwrite=overwrite)
+
     @_functools.wraps(missing_horizontal_spacing)
     def missing_horizontal_spacing(self, overwrite=False, **kwargs):
         ds = missing_horizontal_spacing(self._od, **kwargs)
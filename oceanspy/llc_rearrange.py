@@ -12,6 +12,7 @@ import xarray as _xr
 from shapely import Point, Polygon
 from xarray import DataArray, Dataset
 
+from ._ospy_utils import _cached_spatial_index
 from .utils import _rel_lon, _reset_range, connector, get_maskH, reset_dim
 
 # metric variables defined at vector points, defined as global within this file
@@ -32,6 +33,9 @@ metrics = [
     "YV",
 ]
 
+# horizontal coordinates always carried by the transformation (see _LLC_check_sizes)
+_geometry = ["XC", "YC", "XG", "YG"]
+
 
 class LLCtransformation(object):
     """A class containing the transformation types of LLCgrids."""
@@ -81,8 +85,8 @@ class LLCtransformation(object):
             lies at the center of the domain.
             This option is only relevant when transforming the entire dataset.
         persist: bool.
-            If `False` (default), transformation of rotated and arctic data is not
-            persisted. See `xarray.Dataset.persist()`.
+            If `False` (default), the transformed dataset is not persisted.
+            See `xarray.Dataset.persist()`.
 
         Returns
         -------
@@ -97,6 +101,16 @@ class LLCtransformation(object):
         internally by subsample.cutout when extracting cutout regions of datasets with
         face as a dimension.
 
+        The transformation only moves data around. The face, j and i index of each
+        point of the transformed dataset (and the sign flips of vector components)
+        are computed once for the given grid, faces and ranges, and stored as
+        blocks that are (possibly transposed and flipped) slices of the original
+        faces. All variables are then assembled from those slices. Plans are
+        cached in memory, and they are computed only once for each grid, faces and
+        ranges. Set the environment variable OCEANSPY_CACHE_DIR to also store them
+        on disk, so they can be reused across sessions. Cached plans are
+        unpickled, so only use a trusted directory.
+
 
         References
         ----------
@@ -115,292 +129,682 @@ class LLCtransformation(object):
         if "face" not in ds.dims:
             raise ValueError("face does not appear as a dimension of the dataset")
 
-        ds = _copy.deepcopy(mates(ds.reset_coords()))
+        ds = mates(ds.reset_coords())
 
-        DIMS_c = [
-            dim for dim in ds["XC"].dims if dim not in ["face"]
-        ]  # horizontal dimensions on tracer points.
-        DIMS_g = [
-            dim for dim in ds["XG"].dims if dim not in ["face"]
-        ]  # horizontal dimensions on corner points
-        dims_c = Dims(DIMS_c[::-1])  # j, i format
-        dims_g = Dims(DIMS_g[::-1])
+        if varList is None:
+            varList = ds.data_vars
+        varList = list(varList)
+        varList = varList + [var for var in _geometry if var not in varList]
 
-        Nx = len(ds[dims_c.X])
+        tracers, specs = _plan_tracers(ds, varList)
+        args = (YRange, XRange, add_Hbdr, faces, centered)
+        grid = tuple(ds[var].data for var in _geometry)
+        fingerprint = (ds["XC"].dims,) + grid + (specs,) + args
 
-        if Nx == 90:
-            add_Hbdr = add_Hbdr + 2  # ECCO
-        else:  # pragma: no cover
-            add_Hbdr = add_Hbdr + 0.25
+        def build():
+            return _arctic_crown_plan(ds, specs, *args)
 
-        if varList is None:
-            varList = ds.data_vars
+        plan = _cached_spatial_index("arctic_crown_blocks", fingerprint, build)
+        DS = _apply_arctic_crown_plan(ds, varList, plan, tracers, specs)
+        if persist:  # pragma: no cover
+            DS = DS.persist()
 
-        varList = list(varList)
+        return DS
 
-        # store original attributes
-        attrs = {}
-        for var in varList:
-            attrs = {var: ds[var].attrs, **attrs}
 
-        #
-        if faces is None:
-            faces = _np.arange(13)
+def _arctic_crown(
+    ds,
+    varList,
+    YRange=None,
+    XRange=None,
+    add_Hbdr=0,
+    faces=None,
+    centered=None,
+    persist=False,
+):
+    """Transformation behind `LLCtransformation.arctic_crown`, done one variable at
+    a time. Only used to trace the index fields that make up the transform plan.
+    See `_arctic_crown_plan`.
+    """
 
-        if XRange is not None and YRange is not None:
-            XRange = _np.array(XRange)
-            YRange = _np.array(YRange)
-            if _np.max(abs(XRange)) > 180 or _np.max(abs(YRange)) > 90:
-                raise ValueError("Range of lat and/or lon is not acceptable.")
-            else:
-                XRange, ref_lon = _reset_range(XRange)
-                maskH, dmaskH, XRange, YRange = get_maskH(
-                    ds, add_Hbdr, XRange, YRange, ref_lon=ref_lon
-                )
-                faces = list(dmaskH["face"].values)
-                ds = mask_var(ds, XRange, YRange, ref_lon)  # masks latitude
-                _var_ = "nYG"  # copy variable created in mask_var. Will discard
-                varList = varList + [_var_]
-                cuts = arc_limits_mask(ds, _var_, faces, dims_g, XRange, YRange)
+    DIMS_c = [
+        dim for dim in ds["XC"].dims if dim not in ["face"]
+    ]  # horizontal dimensions on tracer points.
+    DIMS_g = [
+        dim for dim in ds["XG"].dims if dim not in ["face"]
+    ]  # horizontal dimensions on corner points
+    dims_c = Dims(DIMS_c[::-1])  # j, i format
+    dims_g = Dims(DIMS_g[::-1])
+
+    Nx = len(ds[dims_c.X])
+
+    if Nx == 90:
+        add_Hbdr = add_Hbdr + 2  # ECCO
+    else:  # pragma: no cover
+        add_Hbdr = add_Hbdr + 0.25
+
+    if varList is None:
+        varList = ds.data_vars
 
-                opt = True
+    varList = list(varList)
+
+    # store original attributes
+    attrs = {}
+    for var in varList:
+        attrs = {var: ds[var].attrs, **attrs}
+
+    #
+    if faces is None:
+        faces = _np.arange(13)
+
+    if XRange is not None and YRange is not None:
+        XRange = _np.array(XRange)
+        YRange = _np.array(YRange)
+        if _np.max(abs(XRange)) > 180 or _np.max(abs(YRange)) > 90:
+            raise ValueError("Range of lat and/or lon is not acceptable.")
         else:
-            opt = False
-            cuts = None
-
-        print("faces in the cutout", faces)
-
-        #
-        dsa2 = []
-        dsa5 = []
-        dsa7 = []
-        dsa10 = []
-        ARCT = [dsa2, dsa5, dsa7, dsa10]
-
-        for var_name in varList:
-            if "face" in ds[var_name].dims:
-                arc_faces, *nnn, DS = arct_connect(
-                    ds,
-                    var_name,
-                    faces=faces,
-                    masking=False,
-                    opt=opt,
-                    ranges=cuts,
-                    persist=persist,
-                )
-                ARCT[0].append(DS[0])
-                ARCT[1].append(DS[1])
-                ARCT[2].append(DS[2])
-                ARCT[3].append(DS[3])
-            else:
-                ARCT[0].append(ds[var_name])
-                ARCT[1].append(ds[var_name])
-                ARCT[2].append(ds[var_name])
-                ARCT[3].append(ds[var_name])
-
-        for i in range(len(ARCT)):
-            if all(not isinstance(item, int) for item in ARCT[i]):
-                ARCT[i] = _xr.merge(ARCT[i])
-
-        DSa2, DSa5, DSa7, DSa10 = ARCT
-        if not isinstance(DSa2, Dataset):
-            DSa2 = 0
-        if not isinstance(DSa5, Dataset):
-            DSa5 = 0
-        if not isinstance(DSa7, Dataset):
-            DSa7 = 0
-        if not isinstance(DSa10, Dataset):
-            DSa10 = 0
-
-        DSa7 = shift_dataset(DSa7, dims_c.X, dims_g.X)
-
-        DSa10 = shift_dataset(DSa10, dims_c.Y, dims_g.Y)
-        DSa10 = rotate_dataset(DSa10, dims_c, dims_g, rev_x=False, rev_y=True)
-        DSa10 = rotate_vars(DSa10)
-
-        DSa2 = rotate_dataset(
-            DSa2, dims_c, dims_g, rev_x=True, rev_y=False, transpose=True
+            XRange, ref_lon = _reset_range(XRange)
+            maskH, dmaskH, XRange, YRange = get_maskH(
+                ds, add_Hbdr, XRange, YRange, ref_lon=ref_lon
+            )
+            faces = list(dmaskH["face"].values)
+            ds = mask_var(ds, XRange, YRange, ref_lon)  # masks latitude
+            _var_ = "nYG"  # copy variable created in mask_var. Will discard
+            varList = varList + [_var_]
+            cuts = arc_limits_mask(ds, _var_, faces, dims_g, XRange, YRange)
+
+            opt = True
+    else:
+        opt = False
+        cuts = None
+
+    print("faces in the cutout", faces)
+
+    #
+    dsa2 = []
+    dsa5 = []
+    dsa7 = []
+    dsa10 = []
+    ARCT = [dsa2, dsa5, dsa7, dsa10]
+
+    for var_name in varList:
+        if "face" in ds[var_name].dims:
+            arc_faces, *nnn, DS = arct_connect(
+                ds,
+                var_name,
+                faces=faces,
+                masking=False,
+                opt=opt,
+                ranges=cuts,
+                persist=persist,
+            )
+            ARCT[0].append(DS[0])
+            ARCT[1].append(DS[1])
+            ARCT[2].append(DS[2])
+            ARCT[3].append(DS[3])
+        else:
+            ARCT[0].append(ds[var_name])
+            ARCT[1].append(ds[var_name])
+            ARCT[2].append(ds[var_name])
+            ARCT[3].append(ds[var_name])
+
+    for i in range(len(ARCT)):
+        if all(not isinstance(item, int) for item in ARCT[i]):
+            ARCT[i] = _xr.merge(ARCT[i])
+
+    DSa2, DSa5, DSa7, DSa10 = ARCT
+    if not isinstance(DSa2, Dataset):
+        DSa2 = 0
+    if not isinstance(DSa5, Dataset):
+        DSa5 = 0
+    if not isinstance(DSa7, Dataset):
+        DSa7 = 0
+    if not isinstance(DSa10, Dataset):
+        DSa10 = 0
+
+    DSa7 = shift_dataset(DSa7, dims_c.X, dims_g.X)
+
+    DSa10 = shift_dataset(DSa10, dims_c.Y, dims_g.Y)
+    DSa10 = rotate_dataset(DSa10, dims_c, dims_g, rev_x=False, rev_y=True)
+    DSa10 = rotate_vars(DSa10)
+
+    DSa2 = rotate_dataset(DSa2, dims_c, dims_g, rev_x=True, rev_y=False, transpose=True)
+    DSa2 = rotate_vars(DSa2)
+
+    # =====
+    # Determine the facets involved in the cutout
+    _facet1 = [k for k in range(7, 10)]
+    _facet2 = [k for k in range(10, 13)]
+    _facet3 = [k for k in range(3)]
+    _facet4 = [k for k in range(3, 6)]
+
+    faces1 = []
+    faces2 = []
+    faces3 = []
+    faces4 = []
+
+    for k in _np.arange(13):
+        if k in faces:
+            if k in _facet1:
+                faces1.append(ds.isel(face=k))
+            elif k in _facet2:
+                faces2.append(ds.isel(face=k))
+            elif k in _facet3:
+                faces3.append(ds.isel(face=k))
+            elif k in _facet4:
+                faces4.append(ds.isel(face=k))
+        else:
+            if k in _facet1:
+                faces1.append(0)
+            elif k in _facet2:
+                faces2.append(0)
+            elif k in _facet3:
+                faces3.append(0)
+            elif k in _facet4:
+                faces4.append(0)
+
+    # =====
+    # Below are list for each facets containin either zero of a surviving face.
+
+    faces1 = [DSa7] + faces1
+    faces2 = [DSa10] + faces2
+    faces3.append(DSa2)
+    faces4.append(DSa5)
+
+    # Slicing the faces to remove nan-edges.
+    # Only when XRange and YRange given.
+    if XRange is not None and YRange is not None:
+        for axis in range(2):
+            edges1 = _edge_facet_data(faces1, _var_, dims_g, axis)
+            faces1 = slice_datasets(faces1, dims_c, dims_g, edges1, axis)
+            edges2 = _edge_facet_data(faces2, _var_, dims_g, axis)
+            faces2 = slice_datasets(faces2, dims_c, dims_g, edges2, axis)
+            edges3 = _edge_facet_data(faces3, _var_, dims_g, axis)
+            faces3 = slice_datasets(faces3, dims_c, dims_g, edges3, axis)
+            edges4 = _edge_facet_data(faces4, _var_, dims_g, axis)
+            faces4 = slice_datasets(faces4, dims_c, dims_g, edges4, axis)
+
+        # Here, address shifts in Arctic
+        # arctic exchange with face 10
+        if isinstance(faces2[0], Dataset):
+            faces2[0]["Yp1"] = faces2[0]["Yp1"] + 1
+
+        # Arctic exchange with face 2
+        if isinstance(faces3[3], Dataset):
+            faces3[3]["Xp1"] = faces3[3]["Xp1"] + 1
+
+    # =====
+    # Facet 1
+
+    Facet1 = shift_list_ds(faces1, dims_c.X, dims_g.X, Nx)
+    DSFacet1 = combine_list_ds(Facet1)
+    DSFacet1 = flip_v(DSFacet1)
+    DSFacet1 = reverse_dataset(DSFacet1, dims_c.X, dims_g.X)
+    DSFacet1 = rotate_dataset(DSFacet1, dims_c, dims_g)
+    DSFacet1 = rotate_vars(DSFacet1)
+
+    # =====
+    # Facet 2
+
+    Facet2 = shift_list_ds(faces2, dims_c.X, dims_g.X, Nx)
+    DSFacet2 = combine_list_ds(Facet2)
+    DSFacet2 = flip_v(DSFacet2)
+    DSFacet2 = reverse_dataset(DSFacet2, dims_c.X, dims_g.X)
+    DSFacet2 = rotate_dataset(DSFacet2, dims_c, dims_g)
+    DSFacet2 = rotate_vars(DSFacet2)
+
+    # =====
+    # combining Facet 1 & 2
+    # =====
+
+    FACETS = [DSFacet1, DSFacet2]
+    fFACETS = shift_list_ds(FACETS, dims_c.X, dims_g.X, Nx, facet=12)
+    DSFacet12 = combine_list_ds(fFACETS)
+
+    # =====
+    # Facet 3
+
+    fFacet3 = shift_list_ds(faces3, dims_c.Y, dims_g.Y, Nx, facet=3)
+    DSFacet3 = combine_list_ds(fFacet3)
+
+    # =====
+    # Facet 4
+    fFacet4 = shift_list_ds(faces4, dims_c.Y, dims_g.Y, Nx, facet=4)
+    DSFacet4 = combine_list_ds(fFacet4)
+
+    # =====
+    # combining Facet 3 & 4
+    # =====
+
+    FACETS = [DSFacet3, DSFacet4]
+    fFACETS = shift_list_ds(FACETS, dims_c.X, dims_g.X, Nx, facet=34)
+    DSFacet34 = combine_list_ds(fFACETS)
+    DSFacet34 = shift_dataset(DSFacet34, dims_c.Y, dims_g.Y)
+
+    # =====
+    # determine `centered` , i.e. order in which facets are combined
+    # only a factor is there is data in facets with different topology
+    # =====
+
+    if centered is None:  # estimates the centering based on cutout
+        centered = "Atlantic"  # default, below scenarios to change this
+    if isinstance(DSFacet3, int):
+        centered = "Pacific"
+
+    # =====
+    # combining all facets
+    # =====
+
+    # First, check if there is data in both DSFacet12 and DSFacet34.
+    # If not, then there is no need to transpose data in DSFacet12.
+
+    if isinstance(DSFacet12, Dataset):
+        if isinstance(DSFacet34, Dataset):
+            # two lines below asserts correct
+            # staggering of center and corner points
+            # in latitude (otherwise, lat has a jump)
+            if YRange is not None:
+                DSFacet12["Y"] = DSFacet12["Y"] - 1
+                DSFacet12 = DSFacet12.isel(Y=slice(0, -1))
+            elif YRange is None:
+                DSFacet34["Yp1"] = DSFacet34["Yp1"] - 1
+                DSFacet34 = DSFacet34.isel(Yp1=slice(0, -1))
+            for _var in DSFacet12.data_vars:
+                DIMS = [dim for dim in DSFacet12[_var].dims]
+                dims = Dims(DIMS[::-1])
+                if len(dims) > 1 and "nv" not in DIMS:
+                    dtr = list(dims)[::-1]
+                    dtr[-1], dtr[-2] = dtr[-2], dtr[-1]
+                    DSFacet12[_var] = DSFacet12[_var].transpose(*dtr)
+            if persist:  # pragma : no cover
+                DSFacet12 = DSFacet12.persist()
+
+    if centered == "Pacific":
+        FACETS = [DSFacet34, DSFacet12]  # centered on Pacific ocean
+    elif centered == "Atlantic":
+        FACETS = [DSFacet12, DSFacet34]  # centered at Atlantic ocean
+
+    fFACETS = shift_list_ds(FACETS, dims_c.X, dims_g.X, 2 * Nx, facet=1234)
+    DS = combine_list_ds(fFACETS)
+
+    if "face" in DS.coords:
+        # only relevant when the transformation involves a single face
+        DS = DS.drop_vars(["face"])
+
+    # #  shift
+    DS = shift_dataset(DS, dims_c.X, dims_g.X)
+    DS = shift_dataset(DS, dims_c.Y, dims_g.Y)
+
+    if isinstance(DSFacet34, int):
+        DS = _reorder_ds(DS, dims_c, dims_g).persist()
+
+    DS = _LLC_check_sizes(DS)
+
+    if "nYG" in DS.reset_coords().data_vars:
+        DS = DS.drop_vars(_var_)
+
+    # restore original attrs if lost
+    for var in varList:
+        if var in DS.reset_coords().data_vars:
+            DS[var].attrs = attrs[var]
+
+    return DS
+
+
+def _plan_key(ds, varName):
+    """Horizontal dimensions of a variable and the name-based rule that sets its
+    sign in `arct_connect` and `flip_v`. Variables with the same key are moved in
+    the same way by the transformation.
+    """
+    hdims = ["face"] + list(ds["XC"].dims) + list(ds["XG"].dims)
+    dims = tuple(dim for dim in ds[varName].dims if dim in hdims)
+    if varName in ["CS", "SN"]:
+        rule = varName
+    elif varName in metrics:
+        rule = "metric"
+    else:
+        rule = "vector"
+    return dims, rule
+
+
+def _plan_tracers(ds, varList):
+    """Assigns to each variable with `face` as a dimension the index field (tracer)
+    that follows it through the transformation.
+
+    Returns `tracers`, a dict {varName: tracerName}, and `specs`, a dict
+    {tracerName: (dims, offset)}. Scalar fields share one tracer per grid location.
+    Vector pairs (see `mates`) share one pair of tracers per key, named after the
+    first pair found since `arct_connect` and `flip_v` use the variable names. The
+    mate of a tracer holds indexes starting at `offset`, so that values swapped by
+    `rotate_vars` can be traced back to their source.
+    """
+    keys = {}
+    tracers = {}
+    specs = {}
+    for varName in varList:
+        if "face" not in ds[varName].dims:
+            continue
+        mate = ds[varName].attrs.get("mate", None)
+        dims, rule = _plan_key(ds, varName)
+        if mate is None:
+            key = (dims, None)
+            if key not in keys:
+                keys[key] = "_index_" + "_".join(dims)
+                specs[keys[key]] = (dims, 0)
+            tracers[varName] = keys[key]
+        else:
+            key = ((dims, rule), _plan_key(ds, mate))
+            if key not in keys:
+                keys[key] = varName
+                keys[key[::-1]] = mate
+                size = int(_np.prod([len(ds[dim]) for dim in dims]))
+                specs[varName] = (dims, 0)
+                specs[mate] = (key[1][0], size)
+            tracers[varName] = keys[key]
+            tracers[mate] = keys[key[::-1]]
+    return tracers, specs
+
+
+def _arctic_crown_plan(
+    ds, specs, YRange=None, XRange=None, add_Hbdr=0, faces=None, centered=None
+):
+    """Computes the transform plan of `LLCtransformation.arctic_crown`.
+
+    For a given grid, faces and [XRange, YRange], each block of the transformed
+    dataset is a (possibly transposed and flipped) slice of one face of the
+    original dataset, with a sign flip for some vector components. The blocks are
+    found by transforming index fields (1-based position in the flattened face
+    data, see `_plan_tracers`) instead of the data. The index fields are read a
+    few rows at a time and compressed into blocks, see `_plan_blocks`.
+    Returns a dict {tracerName: (dims, coords, blocks)}.
+    """
+    _ds = ds[_geometry].copy()
+    if _ds["XC"].size <= 2**24:  # e.g. ECCO. Small enough to trace in memory
+        _ds = _ds.compute()
+    for name, (dims, offset) in specs.items():
+        shape = tuple(len(ds[dim]) for dim in dims)
+        size = int(_np.prod(shape))
+        if _ds["XC"].chunks is None:
+            index = _np.arange(offset + 1, offset + size + 1, dtype="float64")
+        else:  # one chunk per face
+            index = dask.array.arange(
+                offset + 1, offset + size + 1, chunks=size // shape[0], dtype="float64"
+            )
+        _ds[name] = DataArray(index.reshape(shape), dims=dims)
+    _ds = mates(_ds)
+
+    varList = list(specs) + _geometry
+    args = dict(YRange=YRange, XRange=XRange, add_Hbdr=add_Hbdr, faces=faces)
+    DS = _arctic_crown(_ds, varList, centered=centered, **args)
+
+    plan = {}
+    for name, (dims, offset) in specs.items():
+        sources = [(offset, tuple(len(ds[dim]) for dim in dims))]
+        mate = _ds[name].attrs.get("mate", None)
+        if mate is not None:
+            mate_dims, mate_offset = specs[mate]
+            sources += [(mate_offset, tuple(len(ds[dim]) for dim in mate_dims))]
+        code = DS[name].reset_coords(drop=True)
+        coords = {dim: code[dim].values for dim in code.dims}
+        plan[name] = (code.dims, coords, _plan_blocks(code, sources))
+    return plan
+
+
+# (a, b, c, d) such that j = j0 + a * y + b * x and i = i0 + c * y + d * x, i.e.
+# the slices, transposes and flips that move a face into the transformed dataset.
+_plan_steps = [
+    (1, 0, 0, 1),
+    (-1, 0, 0, 1),
+    (1, 0, 0, -1),
+    (-1, 0, 0, -1),
+    (0, 1, 1, 0),
+    (0, -1, 1, 0),
+    (0, 1, -1, 0),
+    (0, -1, -1, 0),
+]
+
+
+def _plan_decode(code, sources):
+    """Decodes a few rows of a traced index field into the key (face, source and
+    sign, -1 where there is no data), and j and i index of each point."""
+    valid = _np.isfinite(code)
+    index = _np.abs(_np.where(valid, code, 1)).astype("int64") - 1
+    offset, shape = sources[0]
+    source = _np.logical_or(index < offset, index >= offset + _np.prod(shape))
+    face = _np.zeros(code.shape, dtype="int64")
+    j = _np.zeros(code.shape, dtype="int64")
+    i = _np.zeros(code.shape, dtype="int64")
+    for n, (offset, shape) in enumerate(sources):
+        where = _np.logical_and(valid, source == n)
+        face[where], j[where], i[where] = _np.unravel_index(
+            index[where] - offset, shape
         )
-        DSa2 = rotate_vars(DSa2)
-
-        # =====
-        # Determine the facets involved in the cutout
-        _facet1 = [k for k in range(7, 10)]
-        _facet2 = [k for k in range(10, 13)]
-        _facet3 = [k for k in range(3)]
-        _facet4 = [k for k in range(3, 6)]
-
-        faces1 = []
-        faces2 = []
-        faces3 = []
-        faces4 = []
-
-        for k in _np.arange(13):
-            if k in faces:
-                if k in _facet1:
-                    faces1.append(ds.isel(face=k))
-                elif k in _facet2:
-                    faces2.append(ds.isel(face=k))
-                elif k in _facet3:
-                    faces3.append(ds.isel(face=k))
-                elif k in _facet4:
-                    faces4.append(ds.isel(face=k))
-            else:
-                if k in _facet1:
-                    faces1.append(0)
-                elif k in _facet2:
-                    faces2.append(0)
-                elif k in _facet3:
-                    faces3.append(0)
-                elif k in _facet4:
-                    faces4.append(0)
-
-        # =====
-        # Below are list for each facets containin either zero of a surviving face.
-
-        faces1 = [DSa7] + faces1
-        faces2 = [DSa10] + faces2
-        faces3.append(DSa2)
-        faces4.append(DSa5)
-
-        # Slicing the faces to remove nan-edges.
-        # Only when XRange and YRange given.
-        if XRange is not None and YRange is not None:
-            for axis in range(2):
-                edges1 = _edge_facet_data(faces1, _var_, dims_g, axis)
-                faces1 = slice_datasets(faces1, dims_c, dims_g, edges1, axis)
-                edges2 = _edge_facet_data(faces2, _var_, dims_g, axis)
-                faces2 = slice_datasets(faces2, dims_c, dims_g, edges2, axis)
-                edges3 = _edge_facet_data(faces3, _var_, dims_g, axis)
-                faces3 = slice_datasets(faces3, dims_c, dims_g, edges3, axis)
-                edges4 = _edge_facet_data(faces4, _var_, dims_g, axis)
-                faces4 = slice_datasets(faces4, dims_c, dims_g, edges4, axis)
-
-            # Here, address shifts in Arctic
-            # arctic exchange with face 10
-            if isinstance(faces2[0], Dataset):
-                faces2[0]["Yp1"] = faces2[0]["Yp1"] + 1
-
-            # Arctic exchange with face 2
-            if isinstance(faces3[3], Dataset):
-                faces3[3]["Xp1"] = faces3[3]["Xp1"] + 1
-
-        # =====
-        # Facet 1
-
-        Facet1 = shift_list_ds(faces1, dims_c.X, dims_g.X, Nx)
-        DSFacet1 = combine_list_ds(Facet1)
-        DSFacet1 = flip_v(DSFacet1)
-        DSFacet1 = reverse_dataset(DSFacet1, dims_c.X, dims_g.X)
-        DSFacet1 = rotate_dataset(DSFacet1, dims_c, dims_g)
-        DSFacet1 = rotate_vars(DSFacet1)
-
-        # =====
-        # Facet 2
-
-        Facet2 = shift_list_ds(faces2, dims_c.X, dims_g.X, Nx)
-        DSFacet2 = combine_list_ds(Facet2)
-        DSFacet2 = flip_v(DSFacet2)
-        DSFacet2 = reverse_dataset(DSFacet2, dims_c.X, dims_g.X)
-        DSFacet2 = rotate_dataset(DSFacet2, dims_c, dims_g)
-        DSFacet2 = rotate_vars(DSFacet2)
-
-        # =====
-        # combining Facet 1 & 2
-        # =====
-
-        FACETS = [DSFacet1, DSFacet2]
-        fFACETS = shift_list_ds(FACETS, dims_c.X, dims_g.X, Nx, facet=12)
-        DSFacet12 = combine_list_ds(fFACETS)
-
-        # =====
-        # Facet 3
-
-        fFacet3 = shift_list_ds(faces3, dims_c.Y, dims_g.Y, Nx, facet=3)
-        DSFacet3 = combine_list_ds(fFacet3)
-
-        # =====
-        # Facet 4
-        fFacet4 = shift_list_ds(faces4, dims_c.Y, dims_g.Y, Nx, facet=4)
-        DSFacet4 = combine_list_ds(fFacet4)
-
-        # =====
-        # combining Facet 3 & 4
-        # =====
-
-        FACETS = [DSFacet3, DSFacet4]
-        fFACETS = shift_list_ds(FACETS, dims_c.X, dims_g.X, Nx, facet=34)
-        DSFacet34 = combine_list_ds(fFACETS)
-        DSFacet34 = shift_dataset(DSFacet34, dims_c.Y, dims_g.Y)
-
-        # =====
-        # determine `centered` , i.e. order in which facets are combined
-        # only a factor is there is data in facets with different topology
-        # =====
-
-        if centered is None:  # estimates the centering based on cutout
-            centered = "Atlantic"  # default, below scenarios to change this
-        if isinstance(DSFacet3, int):
-            centered = "Pacific"
-
-        # =====
-        # combining all facets
-        # =====
-
-        # First, check if there is data in both DSFacet12 and DSFacet34.
-        # If not, then there is no need to transpose data in DSFacet12.
-
-        if isinstance(DSFacet12, Dataset):
-            if isinstance(DSFacet34, Dataset):
-                # two lines below asserts correct
-                # staggering of center and corner points
-                # in latitude (otherwise, lat has a jump)
-                if YRange is not None:
-                    DSFacet12["Y"] = DSFacet12["Y"] - 1
-                    DSFacet12 = DSFacet12.isel(Y=slice(0, -1))
-                elif YRange is None:
-                    DSFacet34["Yp1"] = DSFacet34["Yp1"] - 1
-                    DSFacet34 = DSFacet34.isel(Yp1=slice(0, -1))
-                for _var in DSFacet12.data_vars:
-                    DIMS = [dim for dim in DSFacet12[_var].dims]
-                    dims = Dims(DIMS[::-1])
-                    if len(dims) > 1 and "nv" not in DIMS:
-                        dtr = list(dims)[::-1]
-                        dtr[-1], dtr[-2] = dtr[-2], dtr[-1]
-                        DSFacet12[_var] = DSFacet12[_var].transpose(*dtr)
-                if persist:  # pragma : no cover
-                    DSFacet12 = DSFacet12.persist()
-
-        if centered == "Pacific":
-            FACETS = [DSFacet34, DSFacet12]  # centered on Pacific ocean
-        elif centered == "Atlantic":
-            FACETS = [DSFacet12, DSFacet34]  # centered at Atlantic ocean
-
-        fFACETS = shift_list_ds(FACETS, dims_c.X, dims_g.X, 2 * Nx, facet=1234)
-        DS = combine_list_ds(fFACETS)
-
-        if "face" in DS.coords:
-            # only relevant when the transformation involves a single face
-            DS = DS.drop_vars(["face"])
-
-        # #  shift
-        DS = shift_dataset(DS, dims_c.X, dims_g.X)
-        DS = shift_dataset(DS, dims_c.Y, dims_g.Y)
-
-        if isinstance(DSFacet34, int):
-            DS = _reorder_ds(DS, dims_c, dims_g).persist()
-
-        DS = _LLC_check_sizes(DS)
-
-        if "nYG" in DS.reset_coords().data_vars:
-            DS = DS.drop_vars(_var_)
-
-        # restore original attrs if lost
-        for var in varList:
-            if var in DS.reset_coords().data_vars:
-                DS[var].attrs = attrs[var]
+    key = 4 * face + 2 * source + (code < 0)
+    return _np.where(valid, key, -1), j, i
+
+
+def _plan_fits(block, step, y1, x0, x1):
+    """Whether `block`, grown to rows [y0, y1) and columns [x0, x1), stays within
+    the source face when moved with `step`."""
+    ya, xa, ja, ia = block["anchor"]
+    a, b, c, d = step
+    nj, ni = block["shape"]
+    for y in [block["y0"], y1 - 1]:
+        for x in [x0, x1 - 1]:
+            j = ja + a * (y - ya) + b * (x - xa)
+            i = ia + c * (y - ya) + d * (x - xa)
+            if not (0 <= j < nj and 0 <= i < ni):
+                return False
+    return True
+
+
+def _plan_blocks(code, sources, size=2**22):
+    """Compresses a traced index field into blocks.
+
+    Each row is split into runs of points taken from consecutive points of one
+    face, which are merged with the block of the previous rows that moves them in
+    the same way. Blocks may contain points with no data (e.g. the triangular
+    arctic regions), as long as they do not overlap. Rows are read `size` points
+    at a time, so that the index field is never loaded in full.
+
+    Returns a list of blocks (y0, y1, x0, x1, source, face, j0, i0, step, sign,
+    rows), where (j0, i0) is the index of the point (y0, x0) in face `face` of the
+    variable (source=0) or of its mate (source=1), `step` is one of `_plan_steps`
+    and rows is None, or the [start, stop) columns with data of each row.
+    """
+    ydim, xdim = code.dims
+    ny, nx = code.shape
+    nrows = max(1, size // nx)
+    blocks = []
+    opened = []
+    for Y0 in range(0, ny, nrows):
+        values = code.isel({ydim: slice(Y0, Y0 + nrows)}).values
+        keys, jj, ii = _plan_decode(values, sources)
+        dj, di = _np.diff(jj, axis=1), _np.diff(ii, axis=1)
+        link = _np.logical_and(keys[:, 1:] == keys[:, :-1], keys[:, 1:] >= 0)
+        link = _np.logical_and(link, _np.abs(dj) + _np.abs(di) == 1)
+        turn = _np.logical_or(dj[:, 1:] != dj[:, :-1], di[:, 1:] != di[:, :-1])
+        link[:, 1:] = _np.logical_and(link[:, 1:], ~(link[:, :-1] & turn))
+        for n in range(len(values)):
+            y = Y0 + n
+            edge = _np.concatenate([[False], link[n], [False]])
+            starts = _np.flatnonzero(_np.logical_and(keys[n] >= 0, ~edge[:-1]))
+            stops = _np.flatnonzero(_np.logical_and(keys[n] >= 0, ~edge[1:])) + 1
+            runs = [(int(x0), int(x1)) for x0, x1 in zip(starts, stops)]
+            grown = []
+            for x0, x1 in runs:
+                key, j0, i0 = int(keys[n, x0]), int(jj[n, x0]), int(ii[n, x0])
+                if x1 - x0 > 1:
+                    run_steps = [
+                        step
+                        for step in _plan_steps
+                        if (step[1], step[3]) == (dj[n, x0], di[n, x0])
+                    ]
+                else:
+                    run_steps = _plan_steps
+                block = None
+                for candidate in opened:
+                    if candidate["key"] != key or candidate in grown:
+                        continue
+                    ya, xa, ja, ia = candidate["anchor"]
+                    steps = [
+                        (a, b, c, d)
+                        for a, b, c, d in candidate["steps"]
+                        if (a, b, c, d) in run_steps
+                        and ja + a * (y - ya) + b * (x0 - xa) == j0
+                        and ia + c * (y - ya) + d * (x0 - xa) == i0
+                    ]
+                    X0, X1 = min(candidate["x0"], x0), max(candidate["x1"], x1)
+                    steps = [
+                        step
+                        for step in steps
+                        if _plan_fits(candidate, step, y + 1, X0, X1)
+                    ]
+                    overlap = any(
+                        other is not candidate
+                        and other["y1"] > candidate["y0"]
+                        and other["x0"] < X1
+                        and other["x1"] > X0
+                        for other in blocks
+                    ) or any(x0_ < X1 and x1_ > X0 for x0_, x1_ in runs if x0_ != x0)
+                    if steps and not overlap:
+                        block = candidate
+                        block.update(steps=steps, y1=y + 1, x0=X0, x1=X1)
+                        block["rows"] += [(x0, x1)]
+                        break
+                if block is None:
+                    shape = sources[(key // 2) % 2][1]
+                    block = dict(
+                        key=key,
+                        y0=y,
+                        y1=y + 1,
+                        x0=x0,
+                        x1=x1,
+                        rows=[(x0, x1)],
+                        anchor=(y, x0, j0, i0),
+                        shape=shape[1:],
+                    )
+                    block["steps"] = [
+                        step
+                        for step in run_steps
+                        if _plan_fits(block, step, y + 1, x0, x1)
+                    ]
+                    blocks += [block]
+                grown += [block]
+            opened = grown
+
+    plan = []
+    for block in blocks:
+        y0, x0 = block["y0"], block["x0"]
+        ya, xa, ja, ia = block["anchor"]
+        a, b, c, d = step = block["steps"][0]
+        j0 = ja + a * (y0 - ya) + b * (x0 - xa)
+        i0 = ia + c * (y0 - ya) + d * (x0 - xa)
+        rows = _np.array(block["rows"], dtype="int64") - x0
+        if (rows == [0, block["x1"] - x0]).all():
+            rows = None
+        key = block["key"]
+        sign = -1 if key % 2 else 1
+        args = (y0, block["y1"], x0, block["x1"], (key // 2) % 2, key // 4)
+        plan += [args + (j0, i0, step, sign, rows)]
+    return plan
+
+
+def _plan_order(da, dims, out_dims):
+    """Dimensions of `da` once transformed, with the horizontal dimensions of the
+    transformed dataset where `face` was."""
+    order = [dim for dim in da.dims if dim not in dims[1:]]
+    order[order.index(dims[0]) : order.index(dims[0]) + 1] = out_dims
+    return order
+
+
+def _plan_piece(data, block):
+    """A block (see `_plan_blocks`), taken from the face data of a variable, with
+    dimensions (..., face, j, i)."""
+    y0, y1, x0, x1, source, face, j0, i0, (a, b, c, d), sign, rows = block
+    j = [j0 + a * (y - y0) + b * (x - x0) for y in [y0, y1 - 1] for x in [x0, x1 - 1]]
+    i = [i0 + c * (y - y0) + d * (x - x0) for y in [y0, y1 - 1] for x in [x0, x1 - 1]]
+    piece = data[..., face, min(j) : max(j) + 1, min(i) : max(i) + 1]
+    piece = piece[..., :: -1 if a + b < 0 else 1, :: -1 if c + d < 0 else 1]
+    if not a:
+        piece = dask.array.swapaxes(piece, -1, -2)
+    if sign < 0:
+        piece = -piece
+    if rows is not None:
+        rows = dask.array.from_array(rows[:, :, None])
+        x = dask.array.arange(x1 - x0)
+        mask = dask.array.logical_and(x >= rows[:, 0], x < rows[:, 1])
+        fill = _np.array(_np.nan, dtype=_np.promote_types(data.dtype, "float32"))
+        piece = dask.array.where(mask, piece, fill)
+    return piece
+
+
+def _apply_arctic_crown_plan(ds, varList, plan, tracers, specs):
+    """Applies the plan of `_arctic_crown_plan` to all variables in `varList`. The
+    transformed variables are assembled from slices of the original faces, one row
+    of blocks at a time."""
+    DS = Dataset()
+    chunks = {}
+    for varName in varList:
+        da = ds[varName]
+        if "face" not in da.dims:
+            DS[varName] = da
+            continue
+        out_dims, coords, blocks = plan[tracers[varName]]
+        chunks.update({dim: len(coords[dim]) for dim in out_dims})
+        ny, nx = (len(coords[dim]) for dim in out_dims)
+        dims = specs[tracers[varName]][0]
+        other = [dim for dim in da.dims if dim not in dims]
+        sources = [da.transpose(*other, *dims).data]
+        mate = da.attrs.get("mate", None)
+        if mate is not None:
+            mate_dims = specs[tracers[mate]][0]
+            sources += [ds[mate].transpose(*other, *mate_dims).data]
+        sources = [dask.array.asarray(data) for data in sources]
+        # no data: NaN, in the dtype of where
+        dtype = _np.promote_types(sources[0].dtype, "float32")
+        empty = dask.array.full(sources[0].shape[:-3] + (ny, nx), _np.nan, dtype=dtype)
+
+        pieces = [_plan_piece(sources[block[4]], block) for block in blocks]
+        edges = sorted({0, ny} | {b[0] for b in blocks} | {b[1] for b in blocks})
+        bands = []
+        for ya, yb in zip(edges[:-1], edges[1:]):
+            band = []
+            x = 0
+            for block, piece in sorted(zip(blocks, pieces), key=lambda bp: bp[0][2]):
+                if block[0] > ya or block[1] < yb:
+                    continue
+                if block[2] > x:
+                    band += [empty[..., : yb - ya, : block[2] - x]]
+                band += [piece[..., ya - block[0] : yb - block[0], :]]
+                x = block[3]
+            if x < nx:
+                band += [empty[..., : yb - ya, : nx - x]]
+            bands += [band]
+
+        coords = {
+            **{name: coord for name, coord in da.coords.items() if name in other},
+            **coords,
+        }
+        _da = DataArray(dask.array.block(bands), dims=other + list(out_dims))
+        _da = _da.assign_coords(coords).transpose(*_plan_order(da, dims, out_dims))
+        _da.attrs = da.attrs
+        DS[varName] = _da.rename(varName)
+
+    for varName in ds.data_vars:
+        if varName not in DS and "face" not in ds[varName].dims:
+            DS[varName] = ds[varName]
+
+    # coordinates not carried by any variable (e.g. time), except horizontal ones
+    hdims = {dim for dims, _ in specs.values() for dim in dims}
+    coords = {
+        name: coord
+        for name, coord in ds.coords.items()
+        if name not in DS.coords and not hdims & set(coord.dims)
+    }
+    DS = DS.assign_coords(coords)
 
-        return DS
+    return DS.chunk(**chunks)
 
 
 def arct_connect(
@@ -657,7 +1061,7 @@ def rotate_vars(_ds):
     grid.
     """
     if isinstance(_ds, Dataset):  # if a dataset transform otherwise pass
-        _ds = _copy.deepcopy(_ds)
+        _ds = _ds.copy()
         _vars = [var for var in _ds.variables]
         rot_names = {}
         for v in _vars:
@@ -685,7 +1089,7 @@ def shift_dataset(_ds, dims_c, dims_g):
 
     """
     if isinstance(_ds, Dataset):  # if a dataset transform otherwise pass
-        _ds = _copy.deepcopy(_ds)
+        _ds = _ds.copy()
         for _dim in [dims_c, dims_g]:
             if int(_ds[_dim][0].data) < int(_ds[_dim][1].data):
                 _ds["n" + _dim] = _ds[_dim] - int(_ds[_dim][0].data)
@@ -706,7 +1110,7 @@ def reverse_dataset(_ds, dims_c, dims_g, transpose=False):
     The pair most correspond to the same dimension."""
 
     if isinstance(_ds, Dataset):  # if a dataset transform otherwise pass
-        _ds = _copy.deepcopy(_ds)
+        _ds = _ds.copy()
 
         for _dim in [dims_c, dims_g]:  # This part should be different for j_g points?
             _ds["n" + _dim] = -_ds[_dim] + int(_ds[_dim][-1].data)
@@ -740,7 +1144,7 @@ def rotate_dataset(
     being manipulated. Nij is no longer the size of the face.
     """
     if isinstance(_ds, Dataset):  # if a dataset transform otherwise pass
-        _ds = _copy.deepcopy(_ds)
+        _ds = _ds.copy()
         Nij = max(len(_ds[dims_c.X]), len(_ds[dims_c.Y]))
 
         if rev_x is False:
@@ -783,7 +1187,7 @@ def shift_list_ds(_DS, dims_c, dims_g, Ni, facet=1):
     gets shifted along the dimensions provided (by dims_c and dims_g) so that there
     is no overlap of values between them.
     """
-    _DS = _copy.deepcopy(_DS)
+    _DS = [ds.copy() if isinstance(ds, Dataset) else ds for ds in _DS]
     fac = 1
     if facet in [1, 2]:
         facs = [0.5, 1, 1, 1]
@@ -838,10 +1242,10 @@ def combine_list_ds(_DSlist):
             with dask.config.set(**{"array.slicing.split_large_chunks": False}):
                 _DSFacet = _DSlist[0].combine_first(_DSlist[1])  #
     elif len(_DSlist) > 2:
-        _DSFacet = _copy.deepcopy(_DSlist[0])
+        _DSFacet = _DSlist[0]
         for ii in range(1, len(_DSlist)):
             with dask.config.set(**{"array.slicing.split_large_chunks": False}):
-                _DSFacet = _DSFacet.combine_first(_copy.deepcopy(_DSlist[ii]))
+                _DSFacet = _DSFacet.combine_first(_DSlist[ii])
 
         _DSFacet = mates(_DSFacet)
 
@@ -907,9 +1311,9 @@ def mask_var(_ds, XRange=None, YRange=None, ref_lon=180):
     extend of actual data to be retained.
     """
 
-    _ds = _copy.deepcopy(mates(_ds.reset_coords()))
+    _ds = mates(_ds.reset_coords())
 
-    nYG = _copy.deepcopy(_ds["YG"])
+    nYG = _ds["YG"].copy()
     _ds["nYG"] = nYG
 
     if YRange is None:
@@ -1056,7 +1460,7 @@ def slice_datasets(_DSfacet, dims_c, dims_g, _edges, _axis):
         _dim_c = dims_c.X
         _dim_g = dims_g.X
 
-    _DSFacet = _copy.deepcopy(_DSfacet)
+    _DSFacet = list(_DSfacet)
     for i in range(len(_DSFacet)):
         # print(i)
         if isinstance(_DSFacet[i], Dataset):
@@ -1076,12 +1480,12 @@ def _LLC_check_sizes(_DS):
     """
     Checks and asserts len of center and corner points are in agreement.
     """
-    YG = _DS["YG"].dropna("Yp1", "all")
+    YG = _DS["YG"].dropna("Yp1", how="all")
     y0 = int(YG["Yp1"][0])
     y1 = int(YG["Yp1"][-1]) + 1
 
-    _DS = _copy.deepcopy(_DS.isel(Yp1=slice(y0, y1)))
-    _DS = _copy.deepcopy(_DS.isel(Y=slice(y0, y1 - 1)))
+    _DS = _DS.isel(Yp1=slice(y0, y1))
+    _DS = _DS.isel(Y=slice(y0, y1 - 1))
 
     DIMS = [dim for dim in _DS["XC"].dims]
     dims_c = Dims(DIMS[::-1])
@@ -1097,7 +1501,7 @@ def _LLC_check_sizes(_DS):
 
     if Nx_c == Nx_g:
         arg = {dims_c.X: slice(0, -1)}
-        _DS = _copy.deepcopy(_DS.isel(**arg))
+        _DS = _DS.isel(**arg)
         Nx_c = len(_DS[dims_c.X])
     else:
         delta = Nx_g - Nx_c
@@ -1109,12 +1513,12 @@ def _LLC_check_sizes(_DS):
         else:
             if delta == 2:  # len(_g) = len(_c)+2. Can but shouldn't happen.
                 arg = {dims_g.X: slice(0, -1)}
-                _DS = _copy.deepcopy(_DS.isel(**arg))
+                _DS = _DS.isel(**arg)
                 Nx_g = len(_DS[dims_g.X])
 
     if Ny_c == Ny_g:
         arg = {dims_c.Y: slice(0, -1)}
-        _DS = _copy.deepcopy(_DS.isel(**arg))
+        _DS = _DS.isel(**arg)
         Ny_c = len(_DS[dims_c.Y])
 
     # lastly, make sure that core dimensions are chunked consistently
@@ -1128,7 +1532,7 @@ def _reorder_ds(_ds, dims_c, dims_g):
     """Only needed when Pacific-centered data. Corrects the ordering
     of y-dim and transposes the data, all lazily."""
 
-    _DS = _copy.deepcopy(_ds)
+    _DS = _ds.copy()
     for _dim in [dims_c.Y, dims_g.Y]:
         _DS["n" + _dim] = -(_DS[_dim] - (int(_DS[_dim][0].data)))
         _DS = (
@@ -18,14 +18,15 @@ import pandas as _pd
 import xarray as _xr
 from xarray import DataArray
 
-import oceanspy as _ospy
-
 # From oceanspy (private)
 from . import compute as _compute
+from . import utils as _utils
 from ._ospy_utils import (
     _check_instance,
     _check_mean_and_int_axes,
     _check_options,
+    _histogram2d,
+    _nearest_grid_points,
     _rename_aliased,
 )
 from .compute import _add_missing_variables
@@ -40,6 +41,7 @@ from .utils import circle_path_array, connector
 # Additional dependencies (private)
 try:
     import matplotlib.pyplot as _plt
+    from matplotlib.colors import LogNorm as _LogNorm
 except ImportError:  # pragma: no cover
     pass
 try:
@@ -60,6 +62,8 @@ def TS_diagram(
     meanAxes=None,
     colorName=None,
     plotFreez=True,
+    binned=False,
+    bins=100,
     ax=None,
     cmap_kwargs=None,
     contour_kwargs=None,
@@ -92,6 +96,15 @@ def TS_diagram(
         If None, uses plot insted of scatter (much faster)
     plotFreez: bool
         If True, plot freezing line in blue.
+    binned: bool
+        If True, bin points in T-S space and plot
+        the volume of each bin (weights are the same used by
+        :py:func:`oceanspy.compute.integral`),
+        or the volume-weighted mean of colorName.
+        Dask arrays are binned chunk by chunk,
+        so memory use does not depend on the number of points.
+    bins: int or array_like with 2 elements
+        Number of bins along S and Temp (used if binned is True).
     ax: matplotlib.pyplot.axes
         If None, uses the current axis.
     cmap_kwargs: dict
@@ -106,6 +119,8 @@ def TS_diagram(
         Keyword arguments for
         :py:func:`oceanspy.subsample.cutout`
     **kwargs:
+        If binned is True:
+        Kewyword arguments for :py:func:`matplotlib.pytplot.pcolormesh`
         If colorName is None:
         Kewyword arguments for :py:func:`matplotlib.pytplot.plot`
         Otherwise,
@@ -131,6 +146,7 @@ def TS_diagram(
             "od": od,
             "colorName": colorName,
             "plotFreez": plotFreez,
+            "binned": binned,
             "ax": ax,
             "cmap_kwargs": cmap_kwargs,
             "contour_kwargs": contour_kwargs,
@@ -142,6 +158,7 @@ def TS_diagram(
             "od": "oceanspy.OceanDataset",
             "colorName": ["type(None)", "str"],
             "plotFreez": "bool",
+            "binned": "bool",
             "ax": ["type(None)", "matplotlib.pyplot.Axes"],
             "cmap_kwargs": ["type(None)", "dict"],
             "contour_kwargs": ["type(None)", "dict"],
@@ -163,6 +180,17 @@ def TS_diagram(
             raise ValueError("`Slim` must contain 2 elements")
         Slim = Slim.reshape(2)
 
+    bins = _np.asarray(bins)
+    if bins.size == 1:
+        bins = _np.repeat(bins, 2)
+    if (
+        bins.size != 2
+        or not _np.issubdtype(bins.dtype, _np.integer)
+        or (bins < 1).any()
+    ):
+        raise ValueError("`bins` must be a positive int or contain 2 positive ints")
+    bins = bins.reshape(2)
+
     if dens is not None and not set(["Temp", "S"]).issubset(dens.coords):
         raise ValueError("`dens` must have coordinates (Temp, S)")
 
@@ -184,7 +212,161 @@ def TS_diagram(
     if len(cutout_kwargs) != 0:
         od = od.subsample.cutout(**cutout_kwargs)
 
-    # Check and extract T and S
+    # Check and extract T and S, and color field
+    od, T, S, color, lost_coords = _TS_fields(od, meanAxes, colorName)
+
+    # Compute density
+    if binned:
+        # Don't load T and S: find limits in a single pass
+        lims = _xr.Dataset(
+            {"Tmin": T.min(), "Tmax": T.max(), "Smin": S.min(), "Smax": S.max()}
+        ).compute()
+        if Tlim is None:
+            Tlim = [lims["Tmin"].values, lims["Tmax"].values]
+        if Slim is None:
+            Slim = [lims["Smin"].values, lims["Smax"].values]
+    else:
+        T = T.persist()
+        S = S.persist()
+
+    if Tlim is None:
+        Tlim = [T.min().values, T.max().values]
+
+    if Slim is None:
+        Slim = [S.min().values, S.max().values]
+    if dens is None:
+        dens = _isopycnals(od, Tlim, Slim)
+
+    # Create axis
+    if ax is None:
+        ax = _plt.gca()
+
+    # Use pcolormesh if binned,
+    # plot if colorless (faster!), otherwise use scatter
+    if binned:
+        edges = [
+            _np.linspace(min(lim), max(lim), n + 1)
+            for lim, n in zip([Slim, Tlim], bins)
+        ]
+        weight, label = _TS_weights(od, T)
+        field = _TS_binned(S, T, color, weight, edges)
+        if colorName is None:
+            cmap_kwargs.setdefault("norm", _LogNorm())
+        else:
+            label = _xr.plot.utils.label_from_attrs(color)
+
+        # Create colorbar (stolen from xarray)
+        cmap_kwargs["plot_data"] = field.compressed()
+        cmap_params = _xr.plot.utils._determine_cmap_params(**cmap_kwargs)
+        extend = cmap_params.pop("extend")
+        _ = cmap_params.pop("levels")
+        kwargs = {**cmap_params, **kwargs}
+        mesh = ax.pcolormesh(*edges, field, **kwargs)
+        _plt.colorbar(mesh, label=label, extend=extend)
+    elif colorName is None:
+        default_kwargs = {"color": "k", "linestyle": "None", "marker": "."}
+        kwargs = {**default_kwargs, **kwargs}
+        ax.plot(S.values.flatten(), T.values.flatten(), **kwargs)
+    else:
+        # Mask points out of axes
+        c = _TS_color(S, T, color, Tlim, Slim)
+
+        # Create colorbar (stolen from xarray)
+        cmap_kwargs["plot_data"] = c
+        cmap_params = _xr.plot.utils._determine_cmap_params(**cmap_kwargs)
+        extend = cmap_params.pop("extend")
+        _ = cmap_params.pop("levels")
+        kwargs = {**cmap_params, **kwargs}
+        # Scatter
+        sc = ax.scatter(S.values.flatten(), T.values.flatten(), c=c, **kwargs)
+        _plt.colorbar(sc, label=_xr.plot.utils.label_from_attrs(color), extend=extend)
+
+    # Plot isopycnals
+    t = dens["Temp"]
+    s = dens["S"]
+    col_keys = ["colors", "cmap"]
+    default_contour_kwargs = {key: contour_kwargs.pop(key, None) for key in col_keys}
+    if all(default_contour_kwargs[key] is None for key in col_keys):
+        default_contour_kwargs["colors"] = "gray"
+    contour_kwargs = {**default_contour_kwargs, **contour_kwargs}
+    CS = ax.contour(s.values, t.values, dens.values, **contour_kwargs)
+    ax.clabel(CS, **clabel_kwargs)
+
+    # Plot freezing point
+    if plotFreez:
+        paramsList = ["tempFrz0", "dTempFrz_dS"]
+        params2use = {
+            par: od.parameters[par] for par in od.parameters if par in paramsList
+        }
+        tempFrz0 = params2use["tempFrz0"]
+        dTempFrz_dS = params2use["dTempFrz_dS"]
+        s = _np.unique(s.values.flatten())
+        ax.plot(s, tempFrz0 + s * dTempFrz_dS, "b")
+
+    # Set labels and limits
+    ax.set_xlabel(_xr.plot.utils.label_from_attrs(S))
+    ax.set_ylabel(_xr.plot.utils.label_from_attrs(T))
+    ax.set_xlim(Slim)
+    ax.set_ylim(Tlim)
+
+    # Set title
+    ax.set_title(_TS_title(od, T, lost_coords))
+
+    return ax
+
+
+def _TS_weights(od, T):
+    """
+    Weights used to bin TS diagrams:
+    volume of the grid cells, or area for mooring arrays and surveys
+    (same weights used by integral).
+
+    Returns
+    -------
+    weight: xarray.DataArray
+        Weights.
+    label: str
+        Colorbar label.
+    """
+    # Sections are weighted by their area
+    if any(dim in od._ds.dims for dim in ["mooring", "station"]):
+        axesList = ["mooring", "station", "Z"]
+    else:
+        axesList = ["X", "Y", "Z"]
+    axesList = [axis for axis in axesList if axis in od.grid_coords]
+    od = _compute._add_missing_weights(od, axesList)
+    delta, _, _, units = _compute._integral_weights(od, T.dims, axesList)
+    if isinstance(delta, int):
+        return _xr.DataArray(float(delta)), "Count"
+
+    # Combine units (e.g., m^2 and m in m^3)
+    powers = {}
+    for unit in units:
+        base, _, power = unit.partition("^")
+        powers[base] = powers.get(base, 0) + int(power or 1)
+    units = " ".join(
+        base if power == 1 else "{}^{}".format(base, power)
+        for base, power in powers.items()
+    )
+    name = {"m": "Length", "m^2": "Area", "m^3": "Volume"}.get(units, "Weight")
+    return delta, "{} [{}]".format(name, units)
+
+
+def _TS_fields(od, meanAxes, colorName):
+    """
+    Extract the fields of TS diagrams
+    (shared by plot.TS_diagram and animate.TS_diagram).
+
+    Returns
+    -------
+    od: OceanDataset
+        oceandataset with missing variables added.
+    T, S, color: xarray.DataArray
+        Temperature, salinity, and color field (None if colorName is None).
+    lost_coords: list
+        Coordinates removed by meanAxes.
+    """
+    # Extract T and S
     varList = ["Temp", "S"]
     od = _add_missing_variables(od, varList)
 
@@ -206,6 +388,7 @@ def TS_diagram(
         lost_coords = []
 
     # Extract color field, and interpolate if needed
+    color = None
     if colorName is not None:
         # Add missing variables (use private)
         _colorName = _rename_aliased(od, colorName)
@@ -246,92 +429,37 @@ def TS_diagram(
         # Broadcast, in case color has different dimensions
         T, S, color = _xr.broadcast(T, S, color)
 
-    # Compute density
-    T = T.persist()
-    S = S.persist()
+    return od, T, S, color, lost_coords
 
-    if Tlim is None:
-        Tlim = [T.min().values, T.max().values]
 
-    if Slim is None:
-        Slim = [S.min().values, S.max().values]
-    if dens is None:
-        print("Isopycnals: ", end="")
-        tlin = _xr.DataArray(_np.linspace(Tlim[0], Tlim[-1], 100), dims=("t"))
-        slin = _xr.DataArray(_np.linspace(Slim[0], Slim[-1], 100), dims=("s"))
-        t, s = _xr.broadcast(tlin, slin)
-        odSigma0 = _ospy.OceanDataset(_xr.Dataset({"Temp": t, "S": s}))
-        odSigma0 = odSigma0.set_parameters(od.parameters)
-        odSigma0 = odSigma0.compute.potential_density_anomaly()
-        odSigma0._ds = odSigma0._ds.set_coords(["Temp", "S"])
-
-        # Freezing point
-        paramsList = ["tempFrz0", "dTempFrz_dS"]
-        params2use = {
-            par: od.parameters[par] for par in od.parameters if par in paramsList
-        }
-        tempFrz0 = params2use["tempFrz0"]
-        dTempFrz_dS = params2use["dTempFrz_dS"]
-        freez_point = tempFrz0 + odSigma0._ds["S"] * dTempFrz_dS
-
-        # Extract Density
-        dens = odSigma0._ds["Sigma0"].where(odSigma0._ds["Temp"] > freez_point)
-
-    # Create axis
-    if ax is None:
-        ax = _plt.gca()
-
-    # Use plot if colorless (faster!), otherwise use scatter
-    if colorName is None:
-        default_kwargs = {"color": "k", "linestyle": "None", "marker": "."}
-        kwargs = {**default_kwargs, **kwargs}
-        ax.plot(S.values.flatten(), T.values.flatten(), **kwargs)
-    else:
-        # Mask points out of axes
-        color = color.where(_np.logical_and(T > min(Tlim), T < max(Tlim)))
-        color = color.where(_np.logical_and(S > min(Slim), T < max(Slim)))
-        color = color.stack(all_dims=color.dims)
-        c = color.values
-
-        # Create colorbar (stolen from xarray)
-        cmap_kwargs["plot_data"] = c
-        cmap_params = _xr.plot.utils._determine_cmap_params(**cmap_kwargs)
-        extend = cmap_params.pop("extend")
-        _ = cmap_params.pop("levels")
-        kwargs = {**cmap_params, **kwargs}
-        # Scatter
-        sc = ax.scatter(S.values.flatten(), T.values.flatten(), c=c, **kwargs)
-        _plt.colorbar(sc, label=_xr.plot.utils.label_from_attrs(color), extend=extend)
+def _TS_binned(S, T, color, weight, edges):
+    """
+    Binned field of TS diagrams: weight, or weighted mean of color.
+    Returns a masked array (empty bins are masked) with shape (T, S).
+    """
+    weights = [weight]
+    if color is not None:
+        weights = weights + [weight * color]
+    hist = _histogram2d(S, T, weights, edges)
+    with _np.errstate(invalid="ignore", divide="ignore"):
+        field = hist[0] if color is None else hist[1] / hist[0]
+    return _np.ma.masked_where(hist[0] == 0, field).T
 
-    # Plot isopycnals
-    t = dens["Temp"]
-    s = dens["S"]
-    col_keys = ["colors", "cmap"]
-    default_contour_kwargs = {key: contour_kwargs.pop(key, None) for key in col_keys}
-    if all(default_contour_kwargs[key] is None for key in col_keys):
-        default_contour_kwargs["colors"] = "gray"
-    contour_kwargs = {**default_contour_kwargs, **contour_kwargs}
-    CS = ax.contour(s.values, t.values, dens.values, **contour_kwargs)
-    ax.clabel(CS, **clabel_kwargs)
 
-    # Plot freezing point
-    if plotFreez:
-        paramsList = ["tempFrz0", "dTempFrz_dS"]
-        params2use = {
-            par: od.parameters[par] for par in od.parameters if par in paramsList
-        }
-        tempFrz0 = params2use["tempFrz0"]
-        dTempFrz_dS = params2use["dTempFrz_dS"]
-        s = _np.unique(s.values.flatten())
-        ax.plot(s, tempFrz0 + s * dTempFrz_dS, "b")
+def _TS_color(S, T, color, Tlim, Slim):
+    """
+    Flattened color of TS scatter plots, NaN out of axes.
+    """
+    color = color.where(_np.logical_and(T > min(Tlim), T < max(Tlim)))
+    color = color.where(_np.logical_and(S > min(Slim), T < max(Slim)))
+    color = color.stack(all_dims=color.dims)
+    return color.values
 
-    # Set labels and limits
-    ax.set_xlabel(_xr.plot.utils.label_from_attrs(S))
-    ax.set_ylabel(_xr.plot.utils.label_from_attrs(T))
-    ax.set_xlim(Slim)
-    ax.set_ylim(Tlim)
 
-    # Set title
+def _TS_title(od, T, lost_coords):
+    """
+    Title of TS diagrams.
+    """
     title = []
     all_coords = list(lost_coords) + list(T.coords)
     skip_coords = ["X", "Y", "Xp1", "Yp1"]
@@ -348,7 +476,7 @@ def TS_diagram(
                 pref = ""
                 suf = ""
             rng = [da[coord].min().values, da[coord].max().values]
-            units = da[coord].attrs.pop("units", "")
+            units = da[coord].attrs.get("units", "")
             if units.lower() == "none":
                 units = ""
             if "time" in coord:
@@ -362,9 +490,69 @@ def TS_diagram(
                 rng = "from {} to {}".format(rng[0], rng[1])
             title = title + ["{}{}{}: {} {}" "".format(pref, coord, suf, rng, units)]
 
-    ax.set_title("\n".join(title))
+    return "\n".join(title)
 
-    return ax
+
+def _isopycnals(od, Tlim, Slim, resolution=100):
+    """
+    Potential density anomaly on a regular (Temp, S) grid,
+    masked below the freezing point.
+    Used as background of TS diagrams.
+    Grids are cached, so animations and repeated plots
+    evaluate the equation of state only once.
+
+    Parameters
+    ----------
+    od: OceanDataset
+        Provides eq_state, tempFrz0, and dTempFrz_dS.
+    Tlim, Slim: array_like with 2 elements
+        Temperature and salinity limits.
+    resolution: int
+        Number of grid points along Temp and S.
+
+    Returns
+    -------
+    dens: xarray.DataArray
+        Sigma0 with coordinates (Temp, S).
+    """
+    params = od.parameters
+    print(
+        "Computing isopycnals using the following parameters:"
+        " {}.".format({"eq_state": params["eq_state"]})
+    )
+    dens = _cached_isopycnals(
+        tuple(float(lim) for lim in Tlim),
+        tuple(float(lim) for lim in Slim),
+        params["eq_state"],
+        float(params["tempFrz0"]),
+        float(params["dTempFrz_dS"]),
+        resolution,
+    )
+    return dens.copy()
+
+
+@_functools.lru_cache(maxsize=32)
+def _cached_isopycnals(Tlim, Slim, eq_state, tempFrz0, dTempFrz_dS, resolution):
+    """
+    Isopycnal grid of _isopycnals, cached by hashable parameters.
+    Do not modify the output in place (_isopycnals returns a copy).
+    """
+    tlin = _xr.DataArray(_np.linspace(Tlim[0], Tlim[-1], resolution), dims=("t"))
+    slin = _xr.DataArray(_np.linspace(Slim[0], Slim[-1], resolution), dims=("s"))
+    t, s = _xr.broadcast(tlin, slin)
+
+    # Density
+    dens = getattr(_utils, "dens{}".format(eq_state))(s, t, 0) - 1000
+    dens = dens.assign_coords(Temp=t, S=s).rename("Sigma0")
+
+    # Freezing point
+    freez_point = tempFrz0 + s * dTempFrz_dS
+    dens = dens.where(t > freez_point)
+    dens.attrs["units"] = "kg/m^3"
+    dens.attrs["long_name"] = "potential density anomaly"
+    dens.attrs["OceanSpy_parameters"] = str({"eq_state": eq_state})
+
+    return dens
 
 
 def time_series(
@@ -472,6 +660,8 @@ def horizontal_section(
     contour_kwargs=None,
     clabel_kwargs=None,
     cutout_kwargs=None,
+    coarsen=False,
+    pyramid=None,
     **kwargs,
 ):
     """
@@ -510,6 +700,17 @@ def horizontal_section(
     cutout_kwargs: dict
         Keyword arguments for
         :py:func:`oceanspy.subsample.cutout`
+    coarsen: bool
+        If True, block-average fields along X and Y (lazily, before compute)
+        to the number of pixels of the axes (figure size times dpi).
+    pyramid: str
+        Path to a zarr store with fields coarsened in advance.
+        Each group is named after its coarsening factor (e.g., '2', '4', '8'),
+        and contains variables of the oceandataset block-averaged along X and Y
+        (e.g., ``ds.coarsen(X=4, Y=4, boundary="trim").mean().to_zarr(path,
+        group="4")``).
+        If coarsen is True, the closest level is used when available
+        (only without meanAxes and intAxes).
     **kwargs:
         Kewyword arguments for :py:mod:`xarray.plot`.plotType
 
@@ -537,6 +738,8 @@ def horizontal_section(
             "contour_kwargs": contour_kwargs,
             "clabel_kwargs": clabel_kwargs,
             "cutout_kwargs": cutout_kwargs,
+            "coarsen": coarsen,
+            "pyramid": pyramid,
         },
         {
             "od": "oceanspy.OceanDataset",
@@ -547,6 +750,8 @@ def horizontal_section(
             "contour_kwargs": ["type(None)", "dict"],
             "clabel_kwargs": ["type(None)", "dict"],
             "cutout_kwargs": ["type(None)", "dict"],
+            "coarsen": "bool",
+            "pyramid": ["type(None)", "str"],
         },
     )
 
@@ -674,6 +879,15 @@ def horizontal_section(
     sargs = {dims_var.X: xslice, dims_var.Y: yslice}
     da = da.isel(**sargs)
 
+    # Level of detail
+    if coarsen:
+        if meanAxes is not False or intAxes is not False:
+            pyramid = None
+        figsize = kwargs.get("figsize", None)
+        da = _coarsen_to_pixels(od, da, ax, figsize, pyramid)
+        if contourName is not None:
+            da_contour = _coarsen_to_pixels(od, da_contour, ax, figsize, pyramid)
+
     # Projection
     if ax is None:
         if subplot_kws is None:
@@ -786,6 +1000,79 @@ def horizontal_section(
         return p
 
 
+def _coarsen_to_pixels(od, da, ax, figsize, pyramid=None):
+    """
+    Block-average da along X and Y to the number of pixels of the axes.
+    Coarsening is lazy, so only the coarse field is computed.
+    If available, start from the closest level of a pyramid.
+    """
+    dims = [
+        [dim for dim in od.grid_coords[axis] if dim in da.dims][0]
+        for axis in ["X", "Y"]
+    ]
+
+    # Number of pixels
+    if ax is not None:
+        bbox = ax.get_window_extent()
+        pixels = [bbox.width, bbox.height]
+    else:
+        fig = _plt.gcf()
+        if figsize is None:
+            figsize = fig.get_size_inches()
+        pixels = _np.asarray(figsize) * fig.dpi
+    factors = {
+        dim: max(int(da.sizes[dim] // pixel), 1) for dim, pixel in zip(dims, pixels)
+    }
+
+    # Use the coarsest level that is not coarser than needed
+    if pyramid is not None:
+        for level in range(min(factors.values()), 1, -1):
+            try:
+                ds = _xr.open_zarr(pyramid, group=str(level))
+            except (KeyError, ValueError, OSError):
+                continue
+            if da.name not in ds.data_vars:
+                continue
+            # Same selection of da
+            sel = {
+                dim: da[dim].values
+                for dim in ds[da.name].dims
+                if dim in da.coords and dim not in dims
+            }
+            for dim in dims:
+                sel[dim] = slice(da[dim].min().values, da[dim].max().values)
+            da = ds[da.name].sel(sel)
+            factors = {dim: max(factor // level, 1) for dim, factor in factors.items()}
+            break
+
+    factors = {dim: factor for dim, factor in factors.items() if factor > 1}
+    if len(factors) != 0:
+        # Longitudes are averaged across the dateline
+        coord_func = {}
+        if od.parameters["rSphere"] is not None:
+            coord_func = {
+                coord: _longitude_mean
+                for coord in ["XC", "XG", "XU", "XV"]
+                if coord in da.coords
+            }
+        da = da.coarsen(factors, boundary="trim", coord_func=coord_func).mean()
+    return da
+
+
+def _longitude_mean(lon, axis):
+    """
+    Block-average longitudes (degrees), used as coarsen coord_func.
+    Longitudes are unwrapped around the first longitude of each block,
+    so blocks crossing the dateline are not averaged to the other side
+    of the globe.
+    """
+    first = lon[
+        tuple(slice(0, 1) if i in axis else slice(None) for i in range(lon.ndim))
+    ]
+    lon = lon + 360 * _np.round((first - lon) / 360)
+    return lon.mean(axis=axis)
+
+
 def vertical_section(
     od,
     varName,
@@ -1129,12 +1416,9 @@ def faces_array(
             "\nAvailable options: {}"
             "".format(xoak_index, _xoak.IndexRegistry())
         )
-    ds_grid.xoak.set_index(["XC", "YC"], xoak_index)
-    cdata = {"XC": ("mooring", Xmoor), "YC": ("mooring", Ymoor)}
-    ds_data = _xr.Dataset(cdata)  # mooring data
 
-    # find nearest points to given data.
-    nds = ds_grid.xoak.sel(XC=ds_data["XC"], YC=ds_data["YC"])
+    # find nearest points to given data (spatial index is cached).
+    nds = _nearest_grid_points(ds_grid, Xmoor, Ymoor, "mooring", xoak_index)
     iX, iY, iface = (nds[f"{i}"].data for i in ("X", "Y", "face"))
     _dat = nds.face.values
     ll = _np.where(abs(_np.diff(_dat)))[0]
@@ -33,7 +33,9 @@ from ._ospy_utils import (
     _check_native_grid,
     _check_part_position,
     _check_range,
+    _nearest_grid_points,
     _rename_aliased,
+    _resample_time_mean,
 )
 from .llc_rearrange import LLCtransformation as _llc_trans
 from .llc_rearrange import (
@@ -48,6 +50,7 @@ from .llc_rearrange import (
     station_singleface,
 )
 from .utils import (
+    _index_range,
     _rel_lon,
     _reset_range,
     circle_path_array,
@@ -58,10 +61,6 @@ from .utils import (
 )
 
 # Recommended dependencies (private)
-try:
-    from geopy.distance import great_circle as _great_circle
-except ImportError:  # pragma: no cover
-    pass
 try:
     import xesmf as _xe
 except ImportError:  # pragma: no cover
@@ -247,32 +246,14 @@ def cutout(
     # ---------------------------
     # Time CUTOUT
     # ---------------------------
-    # Initialize vertical mask
-    maskT = _xr.ones_like(ds["time"]).astype("int")
-
     if timeRange is not None:
         # Use arrays
         timeRange = _np.asarray([_np.min(timeRange), _np.max(timeRange)]).astype(
             ds["time"].dtype
         )
 
-        # Get the closest
-        for i, time in enumerate(timeRange):
-            if _np.issubdtype(ds["time"].dtype, _np.datetime64):
-                diff = _np.fabs(ds["time"].astype("float64") - time.astype("float64"))
-            else:
-                diff = _np.fabs(ds["time"] - time)
-            timeRange[i] = ds["time"].where(diff == diff.min(), drop=True).min().values
-        maskT = maskT.where(
-            _np.logical_and(ds["time"] >= timeRange[0], ds["time"] <= timeRange[-1]), 0
-        )
-
-        # Find time indexes
-        maskT = maskT.assign_coords(time=_np.arange(len(maskT["time"])))
-        dmaskT = maskT.where(maskT.compute(), drop=True)
-        dtime = dmaskT["time"].values
-        iT = [min(dtime), max(dtime)]
-        maskT["time"] = ds["time"]
+        # Find time indexes of the closest (no compute)
+        iT, timeRange = _index_range(ds["time"].values, timeRange)
 
         # Indexis
         if iT[0] == iT[1]:
@@ -298,9 +279,6 @@ def cutout(
     # ---------------------------
     # Vertical CUTOUT
     # ---------------------------
-    # Initialize vertical mask
-    maskV = _xr.ones_like(ds["Zp1"])
-
     if add_Vbdr is True:
         add_Vbdr = _np.fabs(od._ds["Zp1"].diff("Zp1")).max().values
     elif add_Vbdr is False:
@@ -311,20 +289,8 @@ def cutout(
         ZRange = _np.asarray([_np.min(ZRange) - add_Vbdr, _np.max(ZRange) + add_Vbdr])
         ZRange = ZRange.astype(ds["Zp1"].dtype)
 
-        # Get the closest
-        for i, Z in enumerate(ZRange):
-            diff = _np.fabs(ds["Zp1"] - Z)
-            ZRange[i] = ds["Zp1"].where(diff == diff.min()).min().values
-        maskV = maskV.where(
-            _np.logical_and(ds["Zp1"] >= ZRange[0], ds["Zp1"] <= ZRange[-1]), 0
-        )
-
-        # Find vertical indexes
-        maskV = maskV.assign_coords(Zp1=_np.arange(len(maskV["Zp1"])))
-        dmaskV = maskV.where(maskV.compute(), drop=True)
-        dZp1 = dmaskV["Zp1"].values
-        iZ = [_np.min(dZp1), _np.max(dZp1)]
-        maskV["Zp1"] = ds["Zp1"]
+        # Find vertical indexes of the closest (no compute)
+        iZ, ZRange = _index_range(ds["Zp1"].values, ZRange)
 
         # Indexis
         if iZ[0] == iZ[1]:
@@ -506,60 +472,35 @@ def cutout(
             minX = ds["XG"].min().values
             maxX = ds["XG"].max().values
 
-        maskC = _xr.where(
-            _np.logical_and(
-                _np.logical_and(ds["YC"] >= minY, ds["YC"] <= maxY),
-                _np.logical_and(
-                    _rel_lon(ds["XC"], ref_lon) >= _rel_lon(minX, ref_lon),
-                    _rel_lon(ds["XC"], ref_lon) <= _rel_lon(maxX, ref_lon),
-                ),
-            ),
-            1,
-            0,
-        ).persist()
-        maskG = _xr.where(
-            _np.logical_and(
-                _np.logical_and(ds["YG"] >= minY, ds["YG"] <= maxY),
-                _np.logical_and(
-                    _rel_lon(ds["XG"], ref_lon) >= _rel_lon(minX, ref_lon),
-                    _rel_lon(ds["XG"], ref_lon) <= _rel_lon(maxX, ref_lon),
-                ),
-            ),
-            1,
-            0,
-        ).persist()
-        maskU = _xr.where(
-            _np.logical_and(
-                _np.logical_and(ds["YU"] >= minY, ds["YU"] <= maxY),
-                _np.logical_and(
-                    _rel_lon(ds["XU"], ref_lon) >= _rel_lon(minX, ref_lon),
-                    _rel_lon(ds["XU"], ref_lon) <= _rel_lon(maxX, ref_lon),
-                ),
-            ),
-            1,
-            0,
-        ).persist()
-        maskV = _xr.where(
-            _np.logical_and(
-                _np.logical_and(ds["YV"] >= minY, ds["YV"] <= maxY),
+        # Compute all masks at once (in memory)
+        points = {
+            "C": ["X", "Y"],
+            "G": ["Xp1", "Yp1"],
+            "U": ["Xp1", "Y"],
+            "V": ["X", "Yp1"],
+        }
+        masks = {}
+        for point in points:
+            X, Y = ds["X" + point], ds["Y" + point]
+            masks[point] = _np.logical_and(
+                _np.logical_and(Y >= minY, Y <= maxY),
                 _np.logical_and(
-                    _rel_lon(ds["XV"], ref_lon) >= _rel_lon(minX, ref_lon),
-                    _rel_lon(ds["XV"], ref_lon) <= _rel_lon(maxX, ref_lon),
+                    _rel_lon(X, ref_lon) >= _rel_lon(minX, ref_lon),
+                    _rel_lon(X, ref_lon) <= _rel_lon(maxX, ref_lon),
                 ),
-            ),
-            1,
-            0,
-        ).persist()
+            )
+        masks = _xr.Dataset(masks).reset_coords(drop=True).compute()
 
+        # Mask variables lazily, one pass for each grid location
+        varLists = {point: [] for point in points}
         for var in ds.data_vars:
-            if set(["X", "Y"]).issubset(ds[var].dims):
-                ds[var] = ds[var].where(maskC.compute(), drop=True)
-            elif set(["Xp1", "Yp1"]).issubset(ds[var].dims):
-                ds[var] = ds[var].where(maskG.compute(), drop=True)
-            elif set(["Xp1", "Y"]).issubset(ds[var].dims):
-                ds[var] = ds[var].where(maskU.compute(), drop=True)
-            elif set(["X", "Yp1"]).issubset(ds[var].dims):
-                ds[var] = ds[var].where(maskV.compute(), drop=True)
+            for point, dims in points.items():
+                if set(dims).issubset(ds[var].dims):
+                    varLists[point].append(var)
+                    break
+        for point, varList in varLists.items():
+            if varList:
+                ds.update(ds[varList].where(masks[point]))
 
     # ---------------------------
     # TIME RESAMPLING
@@ -597,14 +538,21 @@ def cutout(
             # Snapshot
             if sampMethod == "snapshot":
                 # Find new times
-                time2sel = ds["time"].resample(time=timeFreq).first()
-                newtime = ds["time"].sel(time=time2sel)
+                times = ds.indexes["time"]
+                if isinstance(times, _pd.DatetimeIndex):
+                    # First position in each bin
+                    first = _pd.Series(_np.arange(len(times)), index=times)
+                    first = first.resample(timeFreq).first().dropna()
+                    newtime = times.values[first.values.astype("int")]
+                else:
+                    newtime = ds["time"].resample(time=timeFreq).first().values
+                inds = _np.flatnonzero(_np.isin(times.values, newtime))
 
                 # Use slice when possible
-                inds = [
-                    i for i, t in enumerate(ds["time"].values) if t in newtime.values
-                ]
-                inds = _xr.DataArray(inds, dims="time")
+                steps = _np.unique(_np.diff(inds))
+                if len(inds) and len(steps) <= 1:
+                    step = steps[0] if len(steps) else 1
+                    inds = slice(inds[0], inds[-1] + 1, step)
                 ds = ds.isel(time=inds)
 
             else:
@@ -621,8 +569,11 @@ def cutout(
                     [var for var in ds.variables if "time" in ds[var].dims]
                 )
 
-                # Resample
-                ds_time = ds_time.resample(time=timeFreq).mean("time")
+                # Resample (chunk-aligned if possible)
+                resampled = _resample_time_mean(ds_time, timeFreq)
+                if resampled is None:
+                    resampled = ds_time.resample(time=timeFreq).mean("time")
+                ds_time = resampled
 
                 # Add all dimensions to ds, and fix attributes
                 for dim in ds_time.dims:
@@ -707,7 +658,7 @@ def mooring_array(od, Ymoor, Xmoor, xoak_index="scipy_kdtree", **kwargs):
             "Ycoords": Ymoor,
             "dim_name": "mooring",
         }
-        od = _copy.deepcopy(od)
+        od = _copy.copy(od)
 
         # indexes needed for transport
         Yind, Xind = _xr.broadcast(od._ds["Y"], od._ds["X"])
@@ -761,13 +712,8 @@ def mooring_array(od, Ymoor, Xmoor, xoak_index="scipy_kdtree", **kwargs):
                 "".format(xoak_index, _xoak.IndexRegistry())
             )
 
-        ds_grid.xoak.set_index(["XC", "YC"], xoak_index)
-
-        cdata = {"XC": ("mooring", Xmoor), "YC": ("mooring", Ymoor)}
-        ds_data = _xr.Dataset(cdata)  # mooring data
-
-        # find nearest points to given data.
-        nds = ds_grid.xoak.sel(XC=ds_data["XC"], YC=ds_data["YC"])
+        # find nearest points to given data (spatial index is cached).
+        nds = _nearest_grid_points(ds_grid, Xmoor, Ymoor, "mooring", xoak_index)
 
         ix, iy = (nds["i" + f"{i}"].data for i in ("X", "Y"))
 
@@ -799,15 +745,10 @@ def mooring_array(od, Ymoor, Xmoor, xoak_index="scipy_kdtree", **kwargs):
 
     # Add distance (0 always first element)
     if R is not None:
-        dists = _np.array(
-            [0]
-            + [
-                _great_circle(
-                    (near_Y[i + 1], near_X[i + 1]), (near_Y[i], near_X[i]), radius=R
-                ).km
-                for i in range(len(near_Y) - 1)
-            ]
+        dists = _utils.great_circle_distance(
+            near_Y[1:], near_X[1:], near_Y[:-1], near_X[:-1], R
         )
+        dists = _np.insert(dists, 0, 0)  # add zero as 1st element
         unit = "km"
     else:
         dists = _np.sqrt(
@@ -1214,7 +1155,7 @@ def stations(
     print(message)
 
     # Unpack ds
-    od = _copy.deepcopy(od)
+    od = _copy.copy(od)
     ds = od._ds
     face_connections = od.face_connections["face"]
 
@@ -1260,13 +1201,8 @@ def stations(
                 "\nAvailable options: {}"
                 "".format(xoak_index, _xoak.IndexRegistry())
             )
-        ds_grid.xoak.set_index(["XC", "YC"], xoak_index)
-
-        cdata = {"XC": (dim_name, Xcoords), "YC": (dim_name, Ycoords)}
-        ds_data = _xr.Dataset(cdata)
-
-        # find nearest points to given data.
-        nds = ds_grid.xoak.sel(XC=ds_data["XC"], YC=ds_data["YC"])
+        # find nearest points to given data (spatial index is cached).
+        nds = _nearest_grid_points(ds_grid, Xcoords, Ycoords, dim_name, xoak_index)
 
         if "face" not in ds.dims:  # pragma: no cover
             iX, iY = (nds[f"{i}"].data for i in ("X", "Y"))
@@ -1,6 +1,8 @@
 # TODO: add tests for aliased datasets.
 
 # Import modules
+import glob
+
 # From matplotlib (keep it below oceanspy!)
 import matplotlib.pyplot as plt
 import numpy as np
@@ -9,6 +11,7 @@ import xarray as xr
 from matplotlib.animation import FuncAnimation
 
 # From OceanSpy
+import oceanspy.animate
 from oceanspy import open_oceandataset
 from oceanspy.animate import TS_diagram, horizontal_section, vertical_section
 
@@ -106,6 +109,81 @@ def test_anim_Hsection(od_in, varName, meanAxes, FuncAnimation_kwargs, cutout_kw
     assert isinstance(anim, FuncAnimation)
 
 
+@pytest.mark.parametrize("od_in", [od])
+def test_anim_update_artists(od_in):
+    # Frames after the first one only update the artists
+    plt.close()
+    anim = horizontal_section(od_in, varName="Eta", use_coords=False, display=False)
+    for i in [0, len(od_in.dataset["time"]) - 1, 1]:
+        anim._func(i)
+        ax = plt.gcf().axes[0]
+        expected = od_in.dataset["Eta"].isel(time=i).transpose("Y", "X")
+        mesh = np.ma.filled(ax.collections[0].get_array(), np.nan)
+        assert np.allclose(mesh, expected.values, equal_nan=True)
+        assert str(expected["time"].values)[:10] in ax.get_title()
+
+    plt.close()
+    anim = TS_diagram(od_in, display=False)
+    for i in [0, len(od_in.dataset["time"]) - 1, 1]:
+        anim._func(i)
+        line = plt.gcf().axes[0].lines[0]
+        expected = od_in.dataset["S"].isel(time=i).values.flatten()
+        assert np.allclose(line.get_xdata(), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("od_in", [od])
+def test_anim_save_frames(od_in, tmp_path, monkeypatch):
+    # Frames are rendered in order, then encoded once
+    encoded = []
+
+    def encode_frames(pattern, filename, fps):
+        frames = sorted(glob.glob(pattern.replace("%06d", "*")))
+        encoded.append((len(frames), filename, fps))
+
+    monkeypatch.setattr(oceanspy.animate, "_encode_frames", encode_frames)
+    filename = str(tmp_path / "anim.mp4")
+    plt.close()
+    anim = horizontal_section(
+        od_in,
+        varName="Eta",
+        display=False,
+        filename=filename,
+        processes=1,
+        FuncAnimation_kwargs={"interval": 100},
+    )
+    assert isinstance(anim, FuncAnimation)
+    assert encoded == [(len(od_in.dataset["time"]), filename, 10)]
+
+    with pytest.raises(ValueError):
+        horizontal_section(
+            od_in, varName="Eta", display=False, filename=filename, processes=0
+        )
+
+
+@pytest.mark.parametrize("od_in", [od])
+def test_anim_save_frames_processes(od_in, tmp_path, monkeypatch):
+    # Frames rendered by spawned processes are the same of the serial ones
+    encoded = {}
+
+    def encode_frames(pattern, filename, fps):
+        frames = sorted(glob.glob(pattern.replace("%06d", "*")))
+        encoded[filename] = [open(frame, "rb").read() for frame in frames]
+
+    monkeypatch.setattr(oceanspy.animate, "_encode_frames", encode_frames)
+    for processes in [1, 2]:
+        plt.close()
+        horizontal_section(
+            od_in,
+            varName="Eta",
+            display=False,
+            filename=str(tmp_path / "anim{}.mp4".format(processes)),
+            processes=processes,
+        )
+    serial, parallel = encoded.values()
+    assert len(parallel) == len(od_in.dataset["time"])
+    assert parallel == serial
+
+
 # ================
 # Vertical section
 # ================
@@ -300,6 +300,38 @@ def test_laplacian(od, varNameList, axesList):
         laplacian(od, varNameList=varNameList, axesList=axesList)
 
 
+# FUSED BACKEND
+@pytest.mark.parametrize("od", [od4calc])
+@pytest.mark.parametrize(
+    "func, kwargs",
+    [
+        (gradient, dict(varNameList=["Temp", "U", "V", "Eta"], axesList=["X", "Y"])),
+        (gradient, dict(varNameList="Temp", axesList=["X", "Y", "Z"])),
+        (divergence, dict(iName="U", jName="V", kName="W")),
+        (curl, dict(iName="U", jName="V", kName="W")),
+        (laplacian, dict(varNameList="Temp", axesList=["X", "Y"])),
+    ],
+)
+@pytest.mark.parametrize("chunks", [None, {"time": 1}])
+def test_fused_backend(od, func, kwargs, chunks):
+    ds = od.dataset
+    ds = ds.assign(
+        {
+            var: ds[var].assign_attrs(long_name=var, units="m s^-1")
+            for var in ["Temp", "U", "V", "W"]
+        }
+    )
+    od = OceanDataset(ds)
+    expected = func(od, **kwargs)
+    if chunks:
+        od = OceanDataset(od.dataset.chunk(chunks))
+    ds = func(od, **kwargs, backend="numba")
+    xr.testing.assert_identical(expected, ds.compute())
+
+    with pytest.raises(ValueError):
+        func(od, **kwargs, backend="wrong")
+
+
 # MEAN
 @pytest.mark.parametrize("od", [od4calc])
 @pytest.mark.parametrize("varNameList", ["Temp"])
@@ -378,6 +410,20 @@ def test_int_mean_options(od, varNameList, axesList, storeWeights):
         )
 
 
+@pytest.mark.parametrize("od", [od4calc])
+@pytest.mark.parametrize("func", [integral, weighted_mean])
+@pytest.mark.parametrize("axesList", [None, "X", ["X", "Y"], ["X", "Y", "Z"]])
+def test_int_mean_grouped(od, func, axesList):
+    # Variables on the same grid point share weights
+    varNameList = ["Temp", "S", "U", "V", "W", "Eta", "HFacC"]
+    ds = func(od, varNameList=varNameList, axesList=axesList)
+    check = xr.merge(
+        [func(od, varNameList=var, axesList=axesList) for var in varNameList]
+    )
+    assert list(ds.data_vars) == list(check.data_vars)
+    xr.testing.assert_identical(ds, check)
+
+
 # Test shortcuts
 @pytest.mark.parametrize("od_in", [od4calc])
 def test_shortcuts(od_in):
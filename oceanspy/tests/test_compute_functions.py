@@ -12,6 +12,8 @@ from oceanspy.compute import (
     Brunt_Vaisala_frequency,
     Ertel_potential_vorticity,
     Okubo_Weiss_parameter,
+    _add_missing_variables,
+    _plan_missing_variables,
     curl,
     divergence,
     eddy_kinetic_energy,
@@ -26,8 +28,10 @@ from oceanspy.compute import (
     potential_density_anomaly,
     relative_vorticity,
     salt_budget,
+    sections_volume_transport,
     shear_strain,
     survey_aligned_velocities,
+    tracer_budgets,
     velocity_magnitude,
     vertical_relative_vorticity,
 )
@@ -100,6 +104,33 @@ def test_potential_density_anomaly(od_in, eq_state):
     ds_out_IN_od_out(ds_out, od_out)
 
 
+@pytest.mark.parametrize("eq_state", AVAILABLE_PARAMETERS["eq_state"])
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_potential_density_anomaly_numba(eq_state, dtype):
+    pytest.importorskip("numba")
+    od_in = od.set_parameters({"eq_state": eq_state})
+    expected = potential_density_anomaly(od_in)["Sigma0"]
+    Sigma0 = potential_density_anomaly(od_in, backend="numba", dtype=dtype)["Sigma0"]
+    assert Sigma0.dtype == dtype
+    assert Sigma0.attrs == expected.attrs
+    assert_allclose(Sigma0.values, expected.values, atol=7.0e-5)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_Brunt_Vaisala_frequency_numba(dtype):
+    pytest.importorskip("numba")
+    expected = Brunt_Vaisala_frequency(od)["N2"]
+    N2 = Brunt_Vaisala_frequency(od, backend="numba", dtype=dtype)["N2"]
+    assert N2.attrs == expected.attrs
+
+    # Sigma0 errors (see test_potential_density_anomaly_numba) over the smallest dZ
+    atol = 1.0e-12
+    if dtype == "float32":
+        dZ = np.abs(np.diff(od.dataset["Z"].values)).min()
+        atol = 2 * 7.0e-5 / dZ * od.parameters["g"] / od.parameters["rho0"]
+    assert_allclose(N2.values, expected.values, atol=atol)
+
+
 @pytest.mark.parametrize("od_in", [od, alias_od])
 def test_Brunt_Vaisala_frequency(od_in):
     # Compute N2
@@ -288,6 +319,25 @@ def test_eddy_kinetic_energy(od_in, eps_nh):
     ds_out_IN_od_out(ds_out, od_out)
 
 
+@pytest.mark.parametrize("od_in", [od])
+@pytest.mark.parametrize("eps_nh", [1, 0])
+@pytest.mark.parametrize("chunks", [None, {"time": 1}])
+def test_eddy_kinetic_energy_streaming(od_in, eps_nh, chunks):
+    od_in = od_in.set_parameters({"eps_nh": eps_nh})
+    if chunks:
+        od_in = ospy.OceanDataset(od_in.dataset.chunk(chunks))
+
+    # Same of two-pass
+    for time_mean in [False, True]:
+        ds_out = eddy_kinetic_energy(od_in, streaming=True, time_mean=time_mean)
+        check = eddy_kinetic_energy(od_in, time_mean=time_mean)
+        assert ds_out["EKE"].attrs == check["EKE"].attrs
+        assert ds_out["EKE"].dims == check["EKE"].dims
+        assert_allclose(check["EKE"].values, ds_out["EKE"].values)
+    assert "time" not in ds_out["EKE"].dims
+    assert ds_out["EKE"].attrs["long_name"] == "time-mean eddy kinetic energy"
+
+
 @pytest.mark.parametrize("od_in", [od, alias_od])
 def test_horizontal_divergence_velocity(od_in):
     # Compute hor_div_vel
@@ -459,6 +509,39 @@ def test_mooring_volume_transport(od_in, mooring, closed, flippedX, flippedY):
             mooring_volume_transport(od_in)
 
 
+def test_sections_volume_transport():
+    Xmin, Xmax = od.dataset["X"].min().values, od.dataset["X"].max().values
+    Ymin, Ymax = od.dataset["Y"].min().values, od.dataset["Y"].max().values
+    sections = {
+        "open": od.subsample.mooring_array(Xmoor=[Xmin, Xmax], Ymoor=[Ymin, Ymax]),
+        "closed": od.subsample.mooring_array(
+            Xmoor=[Xmin, Xmax, Xmax, Xmin, Xmin], Ymoor=[Ymin, Ymin, Ymax, Ymax, Ymin]
+        ),
+    }
+    ds_out = sections_volume_transport(sections)
+    assert list(ds_out["section"].values) == list(sections)
+
+    # Same as one section at a time, padded along mooring
+    for name, od_moor in sections.items():
+        ds_moor = mooring_volume_transport(od_moor)
+        this_ds = ds_out.sel(section=name).isel(
+            mooring=slice(None, len(ds_moor["mooring"]))
+        )
+        for var in ["transport", "dir_Utransport", "dir_Vtransport"]:
+            assert_allclose(
+                this_ds[var].transpose(*ds_moor[var].dims).values,
+                ds_moor[var].values,
+            )
+        assert this_ds["transport"].attrs == ds_moor["transport"].attrs
+
+    with pytest.raises(TypeError):
+        sections_volume_transport(sections["open"])
+    with pytest.raises(ValueError):
+        sections_volume_transport([od])
+    with pytest.raises(ValueError):
+        sections_volume_transport([])
+
+
 @pytest.mark.parametrize(
     "od_in, gridtype", [(od, "rect"), (alias_od, "rect"), (od_curv, "curv")]
 )
@@ -565,6 +648,37 @@ def test_salt_budget(od_in):
     ds_out_IN_od_out(ds_out, od_out)
 
 
+@pytest.mark.parametrize("od_in", [od_bdg])
+def test_tracer_budgets(od_in):
+    ds_out = tracer_budgets(od_in)
+    ds_sep = xr.merge([heat_budget(od_in), salt_budget(od_in)])
+    for var in ds_sep.data_vars:
+        xr.testing.assert_equal(ds_out[var], ds_sep[var])
+        assert ds_out[var].attrs == ds_sep[var].attrs
+
+    # Residuals close the budgets
+    for suf, rtol in zip(["H", "S"], [1.0e-7, 1.0e-6]):
+        res = ds_out["res" + suf]
+        check_params(ds_out, "res" + suf, ["rho0"])
+        assert res.attrs["units"] == ds_out["tend" + suf].attrs["units"]
+        tend = ds_out["tend" + suf].where(res.notnull())
+        assert_allclose(res.fillna(0).values, 0, atol=rtol * float(np.fabs(tend).max()))
+
+    ds_out = tracer_budgets(od_in, tracers=["salt"], residual=False)
+    assert set(ds_out.data_vars) == set(ds_sep.data_vars) - set(
+        heat_budget(od_in).data_vars
+    )
+
+    with pytest.raises(ValueError):
+        tracer_budgets(od_in, tracers=["wrong"])
+    with pytest.raises(ValueError):
+        tracer_budgets(od_in, tracers=[])
+
+    # Test shortcut
+    od_out = od_in.compute.tracer_budgets()
+    ds_out_IN_od_out(tracer_budgets(od_in), od_out)
+
+
 def check_params(ds, varName, params):
     for par in params:
         assert par in ds[varName].attrs["OceanSpy_parameters"]
@@ -573,3 +687,44 @@ def check_params(ds, varName, params):
 def ds_out_IN_od_out(ds_out, od_out):
     for var in ds_out.data_vars:
         assert_array_equal(od_out.dataset[var].values, ds_out[var].values)
+
+
+@pytest.mark.parametrize(
+    "varList, available, expected",
+    [
+        (["momVort3"], [], ["vertical_relative_vorticity"]),
+        (["momVort3", "momVort1"], [], ["relative_vorticity"]),
+        (
+            ["N2", "Sigma0"],
+            [],
+            ["potential_density_anomaly", "Brunt_Vaisala_frequency"],
+        ),
+        (["N2"], ["Sigma0"], ["Brunt_Vaisala_frequency"]),
+        (
+            ["Okubo_Weiss", "momVort3"],
+            [],
+            [
+                "vertical_relative_vorticity",
+                "shear_strain",
+                "normal_strain",
+                "Okubo_Weiss_parameter",
+            ],
+        ),
+    ],
+)
+def test_plan_missing_variables(varList, available, expected):
+    assert _plan_missing_variables(varList, available) == expected
+
+
+@pytest.mark.parametrize("od_in", [od])
+def test_add_missing_variables(od_in, capsys):
+    varList = ["Okubo_Weiss", "momVort3", "N2", "Sigma0"]
+    new_od = _add_missing_variables(od_in, varList)
+    assert all(var in new_od.dataset for var in varList)
+    assert "N2" not in od_in.dataset
+
+    # Shared variables are computed once
+    out = capsys.readouterr().out
+    assert out.count("Computing potential density anomaly") == 1
+    assert out.count("Computing vertical component of relative vorticity") == 1
+    assert_allclose(new_od.dataset["N2"], Brunt_Vaisala_frequency(od_in)["N2"])
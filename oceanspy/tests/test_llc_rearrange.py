@@ -8,13 +8,16 @@ from xarray.core.dataarray import DataArray, Dataset
 
 # From OceanSpy
 from oceanspy import open_oceandataset
+from oceanspy._ospy_utils import _SPATIAL_INDEX_CACHE
 from oceanspy.llc_rearrange import (
     Dims,
 )
 from oceanspy.llc_rearrange import LLCtransformation as LLC
 from oceanspy.llc_rearrange import (
+    _arctic_crown,
     _edge_arc_data,
     _edge_facet_data,
+    _plan_blocks,
     arc_limits_mask,
     arct_connect,
     arct_diffs,
@@ -2391,6 +2394,67 @@ def test_transformation(od, faces, varList, XRange, YRange, X0, X1, Y0, Y1):
         assert yf == Y1
 
 
+@pytest.mark.parametrize(
+    "faces, XRange, YRange, centered",
+    [
+        (None, None, None, None),
+        (None, None, None, "Pacific"),
+        ([2, 5, 6, 7, 10], None, None, None),
+        ([0, 3, 12], None, None, None),
+        (None, [-31, 25], [58, 85.2], None),
+        (None, [160, -150], [58, 85.2], None),
+    ],
+)
+def test_arctic_crown_plan(faces, XRange, YRange, centered):
+    """The transform plan gives the same result as transforming each variable."""
+    ds = mates(od._ds.reset_coords())
+    varList = ["T", "U", "V", "XG", "YG", "XC", "YC"]
+    args = {"faces": faces, "XRange": XRange, "YRange": YRange, "centered": centered}
+    expected = _arctic_crown(ds, varList, **args)
+    new_ds = LLC.arctic_crown(ds, varList=varList, **args)
+    for var in varList:
+        _xr.testing.assert_identical(
+            new_ds[var].reset_coords(drop=True), expected[var].reset_coords(drop=True)
+        )
+
+    # Coordinates of non-horizontal dimensions are kept with static fields only
+    static = LLC.arctic_crown(ds, varList=["XC", "YC"], **args)
+    hdims = set(ds["XC"].dims) | set(ds["XG"].dims)
+    coords = [name for name in ds.coords if not hdims & set(ds[name].dims)]
+    assert coords
+    for name in coords:
+        _xr.testing.assert_identical(static[name], ds[name])
+
+
+def test_arctic_crown_plan_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("OCEANSPY_CACHE_DIR", str(tmp_path))
+    _SPATIAL_INDEX_CACHE.clear()
+    args = {"ds": od._ds, "varList": ["T", "U", "V"]}
+    args = {**args, "XRange": [-31, 25], "YRange": [58, 85.2]}
+    expected = LLC.arctic_crown(**args)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # Plans are reused across sessions
+    _SPATIAL_INDEX_CACHE.clear()
+    _xr.testing.assert_identical(LLC.arctic_crown(**args), expected)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_plan_blocks():
+    """Traced index fields are stored as (transposed, flipped) slices of faces."""
+    index = _np.arange(2 * 4 * 4).reshape(2, 4, 4) + 1.0
+    # face 1 transposed, next to a triangle of face 0 with a sign flip
+    left = index[1].T[::-1]
+    right = _np.where(_np.tri(4, dtype=bool), -index[0], _np.nan)
+    code = DataArray(_np.concatenate([left, right], axis=1), dims=("Y", "X"))
+    for size in [4, 32]:  # read one row or all rows at a time
+        blocks = _plan_blocks(code, [(0, (2, 4, 4))], size=size)
+        assert len(blocks) == 2
+        assert blocks[0] == (0, 4, 0, 4, 0, 1, 0, 3, (0, 1, -1, 0), 1, None)
+        assert blocks[1][:10] == (0, 4, 4, 8, 0, 0, 0, 0, (1, 0, 0, 1), -1)
+        assert (blocks[1][10] == [[0, 1], [0, 2], [0, 3], [0, 4]]).all()
+
+
 DIMS_c = [dim for dim in od.dataset["XC"].dims if dim not in ["face"]]
 DIMS_g = [dim for dim in od.dataset["XG"].dims if dim not in ["face"]]
 dims_c = Dims(DIMS_c[::-1])
@@ -15,6 +15,8 @@ from oceanspy import (
     OceanDataset,
     open_oceandataset,
 )
+from oceanspy._oceandataset import _DECODED_ATTRS
+from oceanspy._ospy_utils import _SPATIAL_INDEX_CACHE, _cached_spatial_index
 
 # Directory
 Datadir = "./oceanspy/tests/Data/"
@@ -77,6 +79,19 @@ def test_OceanDataset(dataset):
         repr(new_od)
 
 
+@pytest.mark.parametrize("od", [od, alias_od])
+def test_copy_on_write(od):
+    new_od = od.set_name("cow", overwrite=True).set_parameters({"rho0": 1})
+
+    # Data are shared
+    for var in od._ds.data_vars:
+        assert new_od._ds[var].variable._data is od._ds[var].variable._data
+
+    # Metadata diverge
+    assert new_od.name == "cow" and od.name != "cow"
+    assert new_od.parameters["rho0"] == 1 and od.parameters["rho0"] != 1
+
+
 # ===========
 # ATTRIBUTES
 # ===========
@@ -333,6 +348,91 @@ def test_grid(od, grid_coords):
             new_od._grid = new_od._grid
 
 
+@pytest.mark.parametrize("od", [od, alias_od])
+def test_grid_cache(od):
+    new_od = OceanDataset(od.dataset)
+    assert new_od.grid_cache_info == {"hits": 0, "misses": 0, "currsize": 0}
+
+    # Build once, then reuse
+    grid = new_od._grid
+    assert new_od._grid is grid
+    assert new_od.grid_cache_info == {"hits": 1, "misses": 1, "currsize": 1}
+
+    # Rebuild when dimensions change
+    new_od._ds = new_od._ds.isel(X=slice(1, None), Xp1=slice(1, None))
+    assert new_od._grid is not grid
+    assert new_od.grid_cache_info["misses"] == 2
+
+    # Rebuild when grid metadata change
+    grid = new_od._grid
+    new_od = new_od.set_grid_periodic(["X"])
+    assert new_od._grid is not grid
+    assert new_od.grid_cache_info["misses"] == 1
+
+
+@pytest.mark.parametrize("od", [od, alias_od])
+def test_diagnostics_cache(od):
+    new_od = OceanDataset(od.dataset)
+    assert new_od.diagnostics_cache_info is None
+    assert new_od.enable_diagnostics_cache().diagnostics_cache_info is not None
+    assert new_od.diagnostics_cache_info is None
+    new_od = new_od.enable_diagnostics_cache(maxsize=2)
+
+    # Compute once, then reuse (positional or keyword arguments)
+    ds = new_od.compute.weighted_mean(varNameList="Temp", axesList=["X", "Y"])
+    new_ds = new_od.compute.weighted_mean(varNameList="Temp", axesList=["X", "Y"])
+    xr.testing.assert_identical(ds.dataset, new_ds.dataset)
+    info = new_od.diagnostics_cache_info
+    assert (info["hits"], info["misses"], info["currsize"]) == (1, 1, 1)
+
+    # Shared by copies, invalidated when the dataset changes
+    copy_od = copy.copy(new_od)
+    copy_od.compute.weighted_mean(varNameList="Temp", axesList=["X", "Y"])
+    assert new_od.diagnostics_cache_info["hits"] == 2
+    copy_od._ds["Temp"] = 2 * copy_od._ds["Temp"]
+    copy_od.compute.weighted_mean(varNameList="Temp", axesList=["X", "Y"])
+    assert new_od.diagnostics_cache_info["misses"] == 2
+
+    # LRU eviction
+    new_od.compute.gradient(varNameList="Temp", axesList="X")
+    info = new_od.diagnostics_cache_info
+    assert (info["evictions"], info["currsize"]) == (1, 2)
+
+    # Only results held in memory count towards maxbytes
+    lazy_od = OceanDataset(od.dataset.chunk()).enable_diagnostics_cache(maxbytes=0)
+    lazy_od.compute.gradient(varNameList="Temp", axesList="X")
+    assert lazy_od.diagnostics_cache_info["currsize"] == 1
+    lazy_od = lazy_od.enable_diagnostics_cache(maxbytes=0, persist=True)
+    lazy_od.compute.gradient(varNameList="Temp", axesList="X")
+    assert lazy_od.diagnostics_cache_info["currsize"] == 0
+
+    # Disable
+    assert new_od.disable_diagnostics_cache().diagnostics_cache_info is None
+    assert new_od.diagnostics_cache_info is not None
+
+
+@pytest.mark.parametrize("od", [od, alias_od])
+def test_metadata(od):
+    new_od = copy.copy(od)
+
+    # Decoded attributes are kept in memory, keyed by the global attributes
+    grid_coords = new_od.grid_coords
+    raw = new_od._ds.attrs["OceanSpy_grid_coords"]
+    assert _DECODED_ATTRS[raw] == grid_coords
+
+    # Decoded attributes can't be modified
+    grid_coords.pop("X")
+    assert "X" in new_od.grid_coords
+
+    # New oceandatasets use the decoded attributes
+    assert OceanDataset(new_od.dataset).grid_coords == new_od.grid_coords
+
+    # Setters update the decoded attributes
+    new_od = new_od.set_grid_coords(grid_coords, overwrite=True)
+    assert "X" not in new_od.grid_coords
+    assert _DECODED_ATTRS[new_od._ds.attrs["OceanSpy_grid_coords"]] == grid_coords
+
+
 @pytest.mark.parametrize("projection", [1, None, "Mercator", "wrong"])
 def test_projection(projection):
     if not isinstance(projection, (str, type(None))):
@@ -372,6 +472,37 @@ def test_create_tree(od, grid_pos):
         assert isinstance(tree, scipy.spatial.ckdtree.cKDTree)
 
 
+@pytest.mark.parametrize("od", [od, cart_od])
+def test_create_tree_cache(od, tmp_path, monkeypatch):
+    # Trees are built only once
+    assert od.create_tree("C") is copy.copy(od).create_tree("C")
+
+    # Disk cache
+    monkeypatch.setenv("OCEANSPY_CACHE_DIR", str(tmp_path))
+    _SPATIAL_INDEX_CACHE.clear()
+    tree = od.create_tree("C")
+    assert len(list(tmp_path.iterdir())) == 1
+    _SPATIAL_INDEX_CACHE.clear()
+    assert np.array_equal(od.create_tree("C").data, tree.data)
+
+
+def test_spatial_index_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("OCEANSPY_CACHE_DIR", str(tmp_path))
+    _SPATIAL_INDEX_CACHE.clear()
+
+    # None is not stored
+    assert _cached_spatial_index("test", (1,), lambda: None) is None
+    assert len(list(tmp_path.iterdir())) == 0
+
+    # Incompatible pickles are rebuilt
+    _cached_spatial_index("test", (2,), lambda: [2])
+    (path,) = tmp_path.iterdir()
+    path.write_bytes(b"cmissing_module_in_oceanspy_tests\nIndex\n.")
+    _SPATIAL_INDEX_CACHE.clear()
+    assert _cached_spatial_index("test", (2,), lambda: [3]) == [3]
+    _SPATIAL_INDEX_CACHE.clear()
+
+
 # Take ds out
 ds = od.dataset
 
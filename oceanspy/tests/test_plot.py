@@ -9,7 +9,17 @@ import xarray as xr
 
 # From OceanSpy
 from oceanspy import OceanDataset, open_oceandataset
-from oceanspy.plot import TS_diagram, horizontal_section, time_series, vertical_section
+from oceanspy.plot import (
+    TS_diagram,
+    _cached_isopycnals,
+    _coarsen_to_pixels,
+    _isopycnals,
+    _TS_weights,
+    horizontal_section,
+    time_series,
+    vertical_section,
+)
+from oceanspy.utils import densjmd95
 
 # Directory
 Datadir = "./oceanspy/tests/Data/"
@@ -152,6 +162,48 @@ def test_TS_diagram_field(od_in, meanAxes, colorName):
     assert isinstance(ax, plt.Axes)
 
 
+def test_TS_diagram_isopycnals():
+    Tlim, Slim = [0, 10], [30, 35]
+    dens = _isopycnals(od, Tlim, Slim)
+    assert dens.dims == ("t", "s")
+    assert set(["Temp", "S"]).issubset(dens.coords)
+    expected = densjmd95(dens["S"], dens["Temp"], 0) - 1000
+    frozen = dens["Temp"] <= (
+        od.parameters["tempFrz0"] + dens["S"] * od.parameters["dTempFrz_dS"]
+    )
+    xr.testing.assert_allclose(dens.drop_attrs(), expected.where(~frozen))
+
+    # Grid is computed once
+    hits = _cached_isopycnals.cache_info().hits
+    plt.close()
+    TS_diagram(od, Tlim=Tlim, Slim=Slim)
+    assert _cached_isopycnals.cache_info().hits == hits + 1
+
+    # Key includes parameters
+    od_mdjwf = od.set_parameters({"eq_state": "mdjwf"})
+    assert not _isopycnals(od_mdjwf, Tlim, Slim).equals(dens)
+
+
+@pytest.mark.parametrize("colorName", [None, "Depth"])
+def test_TS_diagram_binned(colorName):
+    plt.close()
+    ax = TS_diagram(od, binned=True, bins=[20, 30], colorName=colorName)
+    assert isinstance(ax, plt.Axes)
+    hist = ax.collections[0].get_array()
+    assert hist.shape == (30, 20)
+
+    # Volume is conserved
+    if colorName is None:
+        weights, _ = _TS_weights(od, od.dataset["Temp"])
+        mask = np.isfinite(od.dataset["Temp"] + od.dataset["S"])
+        expected = float((weights * xr.ones_like(od.dataset["Temp"])).where(mask).sum())
+        assert np.isclose(hist.sum(), expected)
+
+    for bins in [[10, 20, 30], "10", 0]:
+        with pytest.raises(ValueError):
+            TS_diagram(od, binned=True, bins=bins)
+
+
 # ===========
 # Time series
 # ===========
@@ -275,6 +327,56 @@ def test_hor_sec_facet(od_in, col):
     assert isinstance(ax, xr.plot.FacetGrid)
 
 
+def test_hor_sec_coarsen(tmp_path):
+    # 10x10 pixels
+    plt.close()
+    fig = plt.figure(figsize=(1, 1), dpi=10)
+    factors = {dim: max(od.dataset.sizes[dim] // 10, 1) for dim in ["X", "Y"]}
+    horizontal_section(od, varName="Depth", use_coords=False, coarsen=True)
+    mesh = np.ma.filled(fig.axes[0].collections[0].get_array(), np.nan)
+    expected = od.dataset["Depth"].coarsen(factors, boundary="trim").mean()
+    assert np.allclose(mesh, expected.values, equal_nan=True)
+
+    # Start from pyramid
+    pyramid = str(tmp_path / "pyramid.zarr")
+    ds = od.dataset[["Depth"]].coarsen(X=2, Y=2, boundary="trim").mean()
+    ds.to_zarr(pyramid, group="2")
+    plt.close()
+    fig = plt.figure(figsize=(1, 1), dpi=10)
+    horizontal_section(
+        od, varName="Depth", use_coords=False, coarsen=True, pyramid=pyramid
+    )
+    mesh = np.ma.filled(fig.axes[0].collections[0].get_array(), np.nan)
+    factors = {dim: max(factor // 2, 1) for dim, factor in factors.items()}
+    expected = ds["Depth"].coarsen(factors, boundary="trim").mean()
+    assert np.allclose(mesh, expected.values, equal_nan=True)
+
+
+def test_coarsen_to_pixels(tmp_path):
+    # 1x1 pixels: coarsen as much as possible
+    plt.close()
+    plt.figure(figsize=(1, 1), dpi=1)
+    factors = {dim: od.dataset.sizes[dim] for dim in ["X", "Y"]}
+
+    # Longitudes crossing the dateline
+    XC = od.dataset["XC"] - od.dataset["XC"].min() + 179.5
+    od_in = od.set_projection(None)
+    od_in._ds = od_in._ds.assign_coords(XC=(XC + 180) % 360 - 180)
+    da = _coarsen_to_pixels(od_in, od_in.dataset["Depth"], None, None)
+    expected = XC.coarsen(factors, boundary="trim").mean()
+    assert np.allclose((da["XC"] - expected + 180) % 360 - 180, 0)
+
+    # Skip pyramid levels without the variable (shifted, to check it is used)
+    pyramid = str(tmp_path / "pyramid.zarr")
+    ds = od.dataset[["Depth"]].coarsen(X=2, Y=2, boundary="trim").mean() + 1
+    ds.to_zarr(pyramid, group="2")
+    ds.rename(Depth="Eta").to_zarr(pyramid, group="3")
+    da = _coarsen_to_pixels(od, od.dataset["Depth"], None, None, pyramid)
+    factors = {dim: max(factor // 2, 1) for dim, factor in factors.items()}
+    expected = ds["Depth"].coarsen(factors, boundary="trim").mean()
+    assert np.allclose(da.values, expected.values, equal_nan=True)
+
+
 # ==================
 # Horizontal section
 # ==================
@@ -1,6 +1,7 @@
 # TODO: cartesian, and Xp1 Yp1 right are not tested.
 import copy as _copy
 
+import dask
 import numpy as np
 import pytest
 import xarray as xr
@@ -8,6 +9,7 @@ from numpy.testing import assert_array_equal
 
 # From OceanSpy
 from oceanspy import OceanDataset, open_oceandataset
+from oceanspy._ospy_utils import _split_time_bins
 from oceanspy.llc_rearrange import mates
 
 # Directory
@@ -254,6 +256,56 @@ def test_time_resampling(od, timeFreq, sampMethod):
         new_od.subsample.cutout(timeFreq="2D", sampMethod=sampMethod)
 
 
+@pytest.mark.parametrize("od", [MITgcm_rect_nc])
+@pytest.mark.parametrize("timeFreq", ["12H", "1D"])
+def test_time_mean_chunk_aligned(od, timeFreq):
+    ds = od.dataset.drop_vars(
+        [var for var in od.dataset.variables if "time_midp" in od.dataset[var].dims]
+    )
+    ds = ds.assign(Temp=ds["Temp"].assign_attrs(units="degC", long_name="Temp"))
+    od = OceanDataset(ds.chunk({"time": 3}))
+    new_ds = od.subsample.cutout(timeFreq=timeFreq, sampMethod="mean").dataset
+
+    # Each output bin is reduced from one input chunk
+    assert set(new_ds["Temp"].chunksizes["time"]) == {1}
+    expected = ds["Temp"].resample(time=timeFreq).mean().reset_coords(drop=True)
+    xr.testing.assert_allclose(new_ds["Temp"].reset_coords(drop=True), expected)
+    assert new_ds["Temp"].attrs == ds["Temp"].attrs
+    for coord in ["X", "Y", "Z"]:
+        assert new_ds[coord].attrs == ds[coord].attrs
+
+
+@pytest.mark.parametrize(
+    "chunks, max_steps, expected",
+    [
+        ((4, 4), 4, (4, 4)),
+        ((4, 4), 1, (1,) * 8),
+        ((5, 2), 2, (2, 2, 1, 2)),
+        ((7,), 3, (3, 2, 2)),
+    ],
+)
+def test_split_time_bins(chunks, max_steps, expected):
+    assert _split_time_bins(chunks, max_steps) == expected
+
+
+@pytest.mark.parametrize("od", [MITgcm_rect_nc])
+def test_time_mean_bounded_chunks(od):
+    ds = od.dataset.drop_vars(
+        [var for var in od.dataset.variables if "time_midp" in od.dataset[var].dims]
+    )
+    ds = ds.assign(Temp=ds["Temp"].assign_attrs(units="degC", long_name="Temp"))
+    od = OceanDataset(ds.chunk({"time": 3}))
+
+    # Bins larger than the chunk size are split (one time step per chunk)
+    step = ds["Temp"].isel(time=0).nbytes
+    with dask.config.set({"array.chunk-size": step}):
+        new_ds = od.subsample.cutout(timeFreq="1D", sampMethod="mean").dataset
+    assert set(new_ds["Temp"].chunksizes["time"]) == {1}
+    expected = ds["Temp"].resample(time="1D").mean().reset_coords(drop=True)
+    xr.testing.assert_allclose(new_ds["Temp"].reset_coords(drop=True), expected)
+    assert new_ds["Temp"].attrs == ds["Temp"].attrs
+
+
 @pytest.mark.parametrize("od", [MITgcm_rect_bin])
 @pytest.mark.parametrize("varList", [["X"], ["XC"], ["S"], ["X", "XC", "S"]])
 def test_reduce_variables(od, varList):
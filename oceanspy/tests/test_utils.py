@@ -1,13 +1,22 @@
 # Import modules
 import numpy as _np
 import pytest
+import xarray as _xr
 
 # From OceanSpy
+import oceanspy.utils
+from oceanspy._ospy_utils import _SPATIAL_INDEX_CACHE
 from oceanspy.utils import (
+    _index_range,
+    _rectilinear_vectors,
     _reset_range,
     cartesian_path,
     circle_path_array,
     connector,
+    densjmd95,
+    densmdjwf,
+    get_maskH,
+    great_circle_distance,
     great_circle_path,
     spherical2cartesian,
     viewer2range,
@@ -59,6 +68,24 @@ def test_circle_path_array(lats, lons, symmetry, resolution):
         assert len(nY) == len(lats)
 
 
+@pytest.mark.parametrize("R", [None, 6371.0])
+def test_great_circle_distance(R):
+    from geopy.distance import EARTH_RADIUS
+    from geopy.distance import great_circle as _great_circle
+
+    rng = _np.random.default_rng(0)
+    lat1, lat2 = rng.uniform(-90, 90, (2, 100))
+    lon1, lon2 = rng.uniform(-180, 180, (2, 100))
+    lat2[:5], lon2[:5] = lat1[:5], lon1[:5] + 1.0e-6  # nearby points
+    dists = great_circle_distance(lat1, lon1, lat2, lon2, R)
+    expected = [
+        _great_circle((y1, x1), (y2, x2), radius=R or EARTH_RADIUS).km
+        for y1, x1, y2, x2 in zip(lat1, lon1, lat2, lon2)
+    ]
+    # Same formula as geopy: differences are round-off errors only
+    _np.testing.assert_allclose(dists, expected, rtol=1.0e-9, atol=1.0e-9)
+
+
 tR = ["2012-04-25T00", "2012-04-25T08"]
 Point1 = [-37.49995880442971, 56.15599523245322]
 Point2 = [-44.90083986169844, 38.27074364198387]
@@ -227,3 +254,149 @@ def test_connector(x, y):
     if len(xn) > 1:
         diffs = abs(_np.diff(xn)) + abs(_np.diff(yn))
         assert _np.max(diffs) == _np.min(diffs) == 1
+
+
+@pytest.mark.parametrize("dens", [densjmd95, densmdjwf])
+@pytest.mark.parametrize("chunks", [None, {"Z": 2}])
+def test_dens_numba(dens, chunks):
+    pytest.importorskip("numba")
+    rng = _np.random.default_rng(0)
+    shape = (3, 4, 5)
+    s = _xr.DataArray(rng.uniform(0, 42, shape), dims=("Z", "Y", "X"))
+    t = _xr.DataArray(rng.uniform(-2, 40, shape), dims=("Z", "Y", "X"))
+    p = _xr.DataArray(_np.linspace(0, 6000, shape[0]), dims="Z")
+    if chunks:
+        s, t = s.chunk(chunks), t.chunk(chunks)
+
+    # Pressure profile is broadcast
+    expected = dens(s, t, p)
+    rho = dens(s, t, p, backend="numba")
+    assert rho.dims == expected.dims
+    _np.testing.assert_allclose(rho.values, expected.values, rtol=1.0e-14)
+
+    # Single precision
+    rho = dens(s, t, p, backend="numba", dtype="float32")
+    assert rho.dtype == "float32"
+    _np.testing.assert_allclose(rho.values, expected.values, rtol=0, atol=7.0e-5)
+    rho = dens(s, t, p, dtype="float32")
+    assert rho.dtype == "float32"
+    _np.testing.assert_allclose(rho.values, expected.values, rtol=0, atol=5.0e-4)
+
+    # numpy arrays
+    rho = dens(s.values, t.values, 0, backend="numba")
+    _np.testing.assert_allclose(rho, dens(s.values, t.values, 0), rtol=1.0e-14)
+
+    with pytest.raises(ValueError):
+        dens(s, t, p, backend="wrong")
+    with pytest.raises(ValueError):
+        dens(s, t, p, dtype="float16")
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        _np.linspace(0, -100, 11),
+        _np.linspace(-5, 5, 11),
+        _np.array([3, 1, 2, 0, 4.0]),
+        _np.arange("2000-01-01", "2000-01-11", dtype="datetime64[D]"),
+    ],
+)
+@pytest.mark.parametrize("valRange", [[0.4, 0.6], [-3.3, 2.5], [-1000, 1000]])
+def test_index_range(values, valRange):
+    if _np.issubdtype(values.dtype, _np.datetime64):
+        valRange = values[0] + _np.array(valRange).astype("timedelta64[D]")
+    valRange = _np.asarray(valRange).astype(values.dtype)
+
+    # Brute force
+    closest = []
+    for val in valRange:
+        diff = _np.fabs(values.astype("float64") - _np.float64(val.astype("float64")))
+        closest += [_np.min(values[diff == diff.min()])]
+    inside = _np.flatnonzero(
+        _np.logical_and(values >= min(closest), values <= max(closest))
+    )
+
+    indexes, snapped = _index_range(values, valRange)
+    assert indexes == [inside.min(), inside.max()]
+    assert _np.array_equal(snapped, closest)
+
+
+@pytest.mark.parametrize("chunks", [None, {"face": 1, "Yp1": 5, "Xp1": 5}])
+@pytest.mark.parametrize(
+    "XRange, YRange, add_Hbdr",
+    [
+        ([-30, 10], [10, 40], 0),
+        ([170, -170], [60, 90], 1.5),
+        (None, [30, 31], 0),
+        ([-5, 5], None, 0),
+    ],
+)
+def test_get_maskH_faces(monkeypatch, chunks, XRange, YRange, add_Hbdr):
+    monkeypatch.setattr(oceanspy.utils, "_FACE_TILE_MIN", 4)
+    nface, n = 6, 21
+    f, j, i = _np.meshgrid(
+        _np.arange(nface), _np.arange(n), _np.arange(n), indexing="ij"
+    )
+    XG = _np.round((-180 + 67.3 * f + 1.3 * i + 0.2 * j + 180) % 360 - 180, 3)
+    YG = _np.round(-80 + 30 * f + 0.6 * j + 0.1 * i, 3)
+    ds = _xr.Dataset(
+        coords={
+            "XG": (("face", "Yp1", "Xp1"), XG),
+            "YG": (("face", "Yp1", "Xp1"), YG),
+        }
+    )
+    if chunks:
+        ds = ds.chunk(chunks)
+    ref_lon = 180
+    if XRange is not None:
+        XRange, ref_lon = _reset_range(XRange)
+    maskH, dmaskH, XRange, YRange = get_maskH(ds, add_Hbdr, XRange, YRange, ref_lon)
+
+    # Brute force
+    expected = _np.ones(XG.shape, dtype=bool)
+    if YRange is not None:
+        expected &= _np.logical_and(YG >= YRange[0], YG <= YRange[-1])
+        assert _np.isin(YRange, YG).all()
+    if XRange is not None:
+        rel = (XG - ref_lon) % 360
+        rel_range = (XRange - ref_lon) % 360
+        expected &= _np.logical_and(rel >= rel_range[0], rel <= rel_range[-1])
+        assert _np.isin(XRange, XG).all()
+    assert _np.array_equal(maskH.values, expected)
+    assert _np.array_equal(dmaskH["face"], _np.flatnonzero(expected.any(axis=(1, 2))))
+    assert _np.array_equal(dmaskH["Yp1"], _np.flatnonzero(expected.any(axis=(0, 2))))
+    assert _np.array_equal(dmaskH["Xp1"], _np.flatnonzero(expected.any(axis=(0, 1))))
+
+
+@pytest.mark.parametrize("chunks", [None, {"Yp1": 5, "Xp1": 5}])
+def test_rectilinear_vectors(monkeypatch, chunks):
+    xg, yg = _np.linspace(-30, 10, 21), _np.linspace(10, 40, 16)
+    YG, XG = _np.meshgrid(yg, xg, indexing="ij")
+    ds = _xr.Dataset(coords={"XG": (("Yp1", "Xp1"), XG), "YG": (("Yp1", "Xp1"), YG)})
+    if chunks:
+        ds = ds.chunk(chunks)
+
+    # Count full checks
+    builds = []
+    cached_spatial_index = oceanspy.utils._cached_spatial_index
+
+    def spy(name, fingerprint, build):
+        return cached_spatial_index(
+            name, fingerprint, lambda: builds.append(name) or build()
+        )
+
+    monkeypatch.setattr(oceanspy.utils, "_cached_spatial_index", spy)
+    _SPATIAL_INDEX_CACHE.clear()
+    vectors = _rectilinear_vectors(ds)
+    assert _np.array_equal(vectors[0], xg) and _np.array_equal(vectors[1], yg)
+    assert len(builds) == 1
+
+    # Same grid, different graph: cached
+    vectors = _rectilinear_vectors(ds.chunk({"Yp1": 3}).transpose())
+    assert _np.array_equal(vectors[0], xg) and _np.array_equal(vectors[1], yg)
+    assert len(builds) == 1
+
+    # Curvilinear: detected without loading the 2D coordinates
+    ds = ds.assign_coords(XG=ds["XG"] + 0.1 * ds["YG"])
+    assert _rectilinear_vectors(ds) is None
+    assert len(builds) == 1
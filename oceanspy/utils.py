@@ -3,20 +3,16 @@ OceanSpy utilities that don't need OceanDataset objects.
 """
 
 import copy as _copy
-
-import numpy as _np
+import functools as _functools
 
 # Required dependencies (private)
+import dask as _dask
+import dask.array as _da
+import numpy as _np
 import xarray as _xr
 
 # from .llc_rearrange import face_edge_check
-from ._ospy_utils import _check_instance
-
-# Recommended dependencies (private)
-try:
-    from geopy.distance import great_circle as _great_circle
-except ImportError:  # pragma: no cover
-    pass
+from ._ospy_utils import _cached_spatial_index, _check_instance, _check_options
 
 
 def viewer2range(p):
@@ -206,6 +202,71 @@ def spherical2cartesian(Y, X, R=None):
     return x, y, z
 
 
+def great_circle_distance(lat1, lon1, lat2, lon2, R=None):
+    """
+    Vectorized great circle distance between points on a sphere.
+    Same formula used by geopy.distance.great_circle
+    (agreement with geopy is within 1e-9 km on the Earth),
+    which is well-conditioned for all distances.
+
+    Parameters
+    ----------
+    lat1: scalar or array_like
+        Latitudes of points 1 [degrees N]
+    lon1: scalar or array_like
+        Longitudes of points 1 [degrees E]
+    lat2: scalar or array_like
+        Latitudes of points 2 [degrees N]
+    lon2: scalar or array_like
+        Longitudes of points 2 [degrees E]
+    R: scalar, None
+        Earth radius in km
+        If None, use geopy default
+
+    Returns
+    -------
+    dists: scalar or numpy.ndarray
+        Distances between points 1 and points 2 [km]
+    """
+
+    # Check parameters
+    _check_instance({"R": R}, {"R": ["type(None)", "numpy.ScalarType"]})
+    if R is None:
+        from geopy.distance import EARTH_RADIUS
+
+        R = EARTH_RADIUS
+
+    return _great_circle_distance(lat1, lon1, lat2, lon2, R)
+
+
+def _great_circle_distance(lat1, lon1, lat2, lon2, R):
+    """
+    Kernel of great_circle_distance (no checks).
+    """
+
+    # Convert to radians
+    lat1 = _np.deg2rad(_np.asarray(lat1, dtype=_np.float64))
+    lon1 = _np.deg2rad(_np.asarray(lon1, dtype=_np.float64))
+    lat2 = _np.deg2rad(_np.asarray(lat2, dtype=_np.float64))
+    lon2 = _np.deg2rad(_np.asarray(lon2, dtype=_np.float64))
+
+    sin_lat1, cos_lat1 = _np.sin(lat1), _np.cos(lat1)
+    sin_lat2, cos_lat2 = _np.sin(lat2), _np.cos(lat2)
+    delta_lon = lon2 - lon1
+    cos_delta_lon, sin_delta_lon = _np.cos(delta_lon), _np.sin(delta_lon)
+
+    # Central angle
+    d = _np.arctan2(
+        _np.sqrt(
+            (cos_lat2 * sin_delta_lon) ** 2
+            + (cos_lat1 * sin_lat2 - sin_lat1 * cos_lat2 * cos_delta_lon) ** 2
+        ),
+        sin_lat1 * sin_lat2 + cos_lat1 * cos_lat2 * cos_delta_lon,
+    )
+
+    return R * d
+
+
 def great_circle_path(lat1, lon1, lat2, lon2, delta_km=None, R=None):
     """
     Generate a great circle trajectory specifying the distance resolution.
@@ -345,10 +406,7 @@ def great_circle_path(lat1, lon1, lat2, lon2, delta_km=None, R=None):
 
     # Compute distance
     dists = _np.zeros(lons.shape)
-    for i in range(1, len(lons)):
-        coord1 = (lats[i - 1], lons[i - 1])
-        coord2 = (lats[i], lons[i])
-        dists[i] = _great_circle(coord1, coord2, radius=R).km
+    dists[1:] = _great_circle_distance(lats[:-1], lons[:-1], lats[1:], lons[1:], R)
     dists = _np.cumsum(dists)
 
     return lats, lons, dists
@@ -388,10 +446,8 @@ def circle_path_array(_Y, _X, R, _res=25):
     if _np.sum(diffsum) == 0:
         raise ValueError("There must be at least two different coordinates points")
 
-    dists = []
-    for i in range(len(_Y) - 1):
-        dists.append(_great_circle((_Y[i], _X[i]), (_Y[i + 1], _X[i + 1]), radius=R).km)
-    k = _np.argwhere(_np.array(dists) > _res).squeeze()
+    dists = _great_circle_distance(_Y[:-1], _X[:-1], _Y[1:], _X[1:], R)
+    k = _np.argwhere(dists > _res).squeeze()
     nY = [[] * k.size for i in range(k.size)]
     nX = [[] * k.size for i in range(k.size)]
     ndists = []
@@ -482,59 +538,23 @@ def cartesian_path(x1, y1, x2, y2, delta=None):
     return xs, ys, dists
 
 
-def densjmd95(s, t, p):
-    """
-    Density of Sea Water using Jackett and McDougall 1995 (JAOT 12)
-    polynomial (modified UNESCO polynomial) [JaMc95]_.
-    jmd95.py:
-    `<http://mitgcm.org/\
-    download/daily_snapshot/MITgcm/utils/python/MITgcmutils/MITgcmutils/jmd95.py>`_
-
-    Parameters
-    ----------
-    s: xarray.DatArray, array-like
-        salinity    [psu (PSS-78)]
-    t: xarray.DatArray, array-like
-        potential temperature [degree C (IPTS-68)]
-    p: xarray.DatArray, array-like
-        pressure [dbar]
-        (p may have dims 1x1, mx1, 1xn or mxn for S(mxn))
-
-    Returns
-    -------
-    rho: xarray.DatArray, array-like
-        density  [kg/m^3]
-
-    References
-    ----------
-    .. [JaMc95]
-        Jackett, D.R. and T.J. Mcdougall, 1995:\
-        Minimal Adjustment of Hydrographic Profiles\
-        to Achieve Static Stability.\
-        J. Atmos. Oceanic Technol., 12, 381–389,\
-        https://doi.org/10.1175/1520-0426(1995)012<0381:MAOHPT>2.0.CO;2
-    """
-
-    # make sure arguments are floating point
-    for var in [s, t, p]:
-        if isinstance(var, _xr.DataArray):
-            var = var.astype("float")
-        else:
-            var = _np.asarray(var, _np.float64)
-
-    # coefficients nonlinear equation of state in pressure coordinates for
-    # 1. density of fresh water at p = 0
-    eosJMDCFw = [
+# Coefficients of the nonlinear equations of state in pressure coordinates.
+# densjmd95:
+#   Fw: density of fresh water at p = 0
+#   Sw: density of sea water at p = 0
+#   KFw: secant bulk modulus K of fresh water at p = 0
+#   KSw: secant bulk modulus K of sea water at p = 0
+#   KP: secant bulk modulus K of sea water at p
+_EOS_JMD95 = dict(
+    Fw=(
         999.842594,
         6.793952e-02,
         -9.095290e-03,
         1.001685e-04,
         -1.120083e-06,
         6.536332e-09,
-    ]
-
-    # 2. density of sea water at p = 0
-    eosJMDCSw = [
+    ),
+    Sw=(
         8.244930e-01,
         -4.089900e-03,
         7.643800e-05,
@@ -544,14 +564,15 @@ def densjmd95(s, t, p):
         1.022700e-04,
         -1.654600e-06,
         4.831400e-04,
-    ]
-
-    # coefficients in pressure coordinates for
-    # 3. secant bulk modulus K of fresh water at p = 0
-    eosJMDCKFw = [1.965933e04, 1.444304e02, -1.706103e00, 9.648704e-03, -4.190253e-05]
-
-    # 4. secant bulk modulus K of sea water at p = 0
-    eosJMDCKSw = [
+    ),
+    KFw=(
+        1.965933e04,
+        1.444304e02,
+        -1.706103e00,
+        9.648704e-03,
+        -4.190253e-05,
+    ),
+    KSw=(
         5.284855e01,
         -3.101089e-01,
         6.283263e-03,
@@ -559,10 +580,8 @@ def densjmd95(s, t, p):
         3.886640e-01,
         9.085835e-03,
         -4.619924e-04,
-    ]
-
-    # 5. secant bulk modulus K of sea water at p
-    eosJMDCKP = [
+    ),
+    KP=(
         3.186519e00,
         2.212276e-02,
         -2.984642e-04,
@@ -577,7 +596,101 @@ def densjmd95(s, t, p):
         -2.040237e-06,
         6.128773e-08,
         6.207323e-10,
-    ]
+    ),
+)
+
+# densmdjwf: numerator and denominator
+_EOS_MDJWF = dict(
+    num=(
+        7.35212840e00,
+        -5.45928211e-02,
+        3.98476704e-04,
+        2.96938239e00,
+        -7.23268813e-03,
+        2.12382341e-03,
+        1.04004591e-02,
+        1.03970529e-07,
+        5.18761880e-06,
+        -3.24041825e-08,
+        -1.23869360e-11,
+        9.99843699e02,
+    ),
+    den=(
+        7.28606739e-03,
+        -4.60835542e-05,
+        3.68390573e-07,
+        1.80809186e-10,
+        2.14691708e-03,
+        -9.27062484e-06,
+        -1.78343643e-10,
+        4.76534122e-06,
+        1.63410736e-09,
+        5.30848875e-06,
+        -3.03175128e-16,
+        -1.27934137e-17,
+        1.00000000e00,
+    ),
+)
+
+
+def densjmd95(s, t, p, backend="numpy", dtype="float64"):
+    """
+    Density of Sea Water using Jackett and McDougall 1995 (JAOT 12)
+    polynomial (modified UNESCO polynomial) [JaMc95]_.
+    jmd95.py:
+    `<http://mitgcm.org/\
+    download/daily_snapshot/MITgcm/utils/python/MITgcmutils/MITgcmutils/jmd95.py>`_
+
+    Parameters
+    ----------
+    s: xarray.DatArray, array-like
+        salinity    [psu (PSS-78)]
+    t: xarray.DatArray, array-like
+        potential temperature [degree C (IPTS-68)]
+    p: xarray.DatArray, array-like
+        pressure [dbar]
+        (p may have dims 1x1, mx1, 1xn or mxn for S(mxn))
+    backend: str
+        | numpy: evaluate the polynomials with numpy/xarray operations.
+        | numba: single-pass compiled ufunc in Horner form (requires numba).
+        | Pressure (e.g., a 1D profile along Z) is broadcast
+        | inside the ufunc, so it is never expanded to the shape of s.
+    dtype: str
+        float64 or float32.
+        float32 halves memory use: inputs and outputs are float32.
+        The numba backend still evaluates the polynomials
+        in double precision, so the only error is the rounding of rho
+        to float32 (at most 2^-14 ~ 6.1e-5 kg/m^3).
+        The numpy backend evaluates them in single precision
+        (errors up to ~4e-4 kg/m^3).
+
+    Returns
+    -------
+    rho: xarray.DatArray, array-like
+        density  [kg/m^3]
+
+    References
+    ----------
+    .. [JaMc95]
+        Jackett, D.R. and T.J. Mcdougall, 1995:\
+        Minimal Adjustment of Hydrographic Profiles\
+        to Achieve Static Stability.\
+        J. Atmos. Oceanic Technol., 12, 381–389,\
+        https://doi.org/10.1175/1520-0426(1995)012<0381:MAOHPT>2.0.CO;2
+    """
+
+    # Check parameters
+    _check_options("backend", backend, ["numpy", "numba"])
+    _check_options("dtype", dtype, ["float64", "float32"])
+    if backend == "numba":
+        return _eos_apply("jmd95", s, t, p, dtype)
+    if dtype == "float32":
+        s, t, p = (_eos_cast(var, dtype) for var in (s, t, p))
+
+    # coefficients nonlinear equation of state in pressure coordinates
+    eosJMDCFw, eosJMDCSw, eosJMDCKFw, eosJMDCKSw, eosJMDCKP = (
+        _EOS_JMD95[key] for key in ["Fw", "Sw", "KFw", "KSw", "KP"]
+    )
 
     # convert pressure to bar
     p = 0.1 * p
@@ -643,7 +756,7 @@ def densjmd95(s, t, p):
     return rho
 
 
-def densmdjwf(s, t, p):
+def densmdjwf(s, t, p, backend="numpy", dtype="float64"):
     """
     Density of Sea Water using McDougall et al. 2003 (JAOT 20)
     polynomial (Gibbs Potential) [McJa03]_.
@@ -660,6 +773,10 @@ def densmdjwf(s, t, p):
     p: xarray.DatArray, array-like
         pressure [dbar]
         (p may have dims 1x1, mx1, 1xn or mxn for S(mxn))
+    backend: str
+        numpy or numba. See densjmd95.
+    dtype: str
+        float64 or float32. See densjmd95.
 
     Returns
     -------
@@ -676,44 +793,16 @@ def densmdjwf(s, t, p):
         https://doi.org/10.1175/1520-0426(2003)20<730:AACEAF>2.0.CO;2
     """
 
-    # make sure arguments are floating point
-    for var in [s, t, p]:
-        if isinstance(var, _xr.DataArray):
-            var = var.astype("float")
-        else:
-            var = _np.asarray(var, _np.float64)
-
-    # coefficients nonlinear equation of state in pressure coordinates for
-    eosMDJWFnum = [
-        7.35212840e00,
-        -5.45928211e-02,
-        3.98476704e-04,
-        2.96938239e00,
-        -7.23268813e-03,
-        2.12382341e-03,
-        1.04004591e-02,
-        1.03970529e-07,
-        5.18761880e-06,
-        -3.24041825e-08,
-        -1.23869360e-11,
-        9.99843699e02,
-    ]
+    # Check parameters
+    _check_options("backend", backend, ["numpy", "numba"])
+    _check_options("dtype", dtype, ["float64", "float32"])
+    if backend == "numba":
+        return _eos_apply("mdjwf", s, t, p, dtype)
+    if dtype == "float32":
+        s, t, p = (_eos_cast(var, dtype) for var in (s, t, p))
 
-    eosMDJWFden = [
-        7.28606739e-03,
-        -4.60835542e-05,
-        3.68390573e-07,
-        1.80809186e-10,
-        2.14691708e-03,
-        -9.27062484e-06,
-        -1.78343643e-10,
-        4.76534122e-06,
-        1.63410736e-09,
-        5.30848875e-06,
-        -3.03175128e-16,
-        -1.27934137e-17,
-        1.00000000e00,
-    ]
+    # coefficients nonlinear equation of state in pressure coordinates
+    eosMDJWFnum, eosMDJWFden = (_EOS_MDJWF[key] for key in ["num", "den"])
 
     p1 = _copy.copy(p)
     t1 = _copy.copy(t)
@@ -758,6 +847,117 @@ def densmdjwf(s, t, p):
     return rho
 
 
+def _eos_cast(var, dtype):
+    """
+    Cast an input of the equations of state to dtype.
+    """
+    if isinstance(var, _xr.DataArray):
+        return var.astype(dtype)
+    return _np.asarray(var, dtype)
+
+
+def _eos_apply(name, s, t, p, dtype):
+    """
+    Evaluate a compiled equation of state (see _eos_kernels).
+    Inputs are broadcast by the ufunc, block by block if they are dask arrays.
+    """
+    kernel = _eos_kernels()[name]
+    s, t, p = (_eos_cast(var, dtype) for var in (s, t, p))
+    if any(isinstance(var, _xr.DataArray) for var in (s, t, p)):
+        return _xr.apply_ufunc(
+            kernel, s, t, p, dask="parallelized", output_dtypes=[dtype]
+        )
+    return kernel(s, t, p)
+
+
+@_functools.lru_cache(maxsize=None)
+def _eos_kernels():
+    """
+    Compile (once) Numba ufuncs of the equations of state.
+    Polynomials are in Horner form and always evaluated in double precision,
+    also when inputs and outputs are float32.
+
+    Returns
+    -------
+    kernels: dict
+        | jmd95: see densjmd95
+        | mdjwf: see densmdjwf
+    """
+    try:
+        import numba
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "The numba backend of the equations of state requires numba."
+            "\nInstall numba, or use backend='numpy'."
+        )
+
+    sigs = ["float32(float32, float32, float32)", "float64(float64, float64, float64)"]
+    Fw, Sw, KFw, KSw, KP = (_EOS_JMD95[key] for key in ["Fw", "Sw", "KFw", "KSw", "KP"])
+    num, den = _EOS_MDJWF["num"], _EOS_MDJWF["den"]
+
+    @numba.vectorize(sigs, nopython=True, cache=True)
+    def jmd95(s, t, p):
+        s, t = numba.float64(s), numba.float64(t)
+        p = 0.1 * numba.float64(p)  # bar
+        s3o2 = s * _np.sqrt(s)
+
+        # density of sea water at the surface
+        rho = (
+            Fw[0]
+            + t * (Fw[1] + t * (Fw[2] + t * (Fw[3] + t * (Fw[4] + t * Fw[5]))))
+            + s
+            * (Sw[0] + Sw[8] * s + t * (Sw[1] + t * (Sw[2] + t * (Sw[3] + t * Sw[4]))))
+            + s3o2 * (Sw[5] + t * (Sw[6] + t * Sw[7]))
+        )
+
+        # secant bulk modulus of sea water at pressure p
+        bulkmod = (
+            KFw[0]
+            + t * (KFw[1] + t * (KFw[2] + t * (KFw[3] + t * KFw[4])))
+            + s * (KSw[0] + t * (KSw[1] + t * (KSw[2] + t * KSw[3])))
+            + s3o2 * (KSw[4] + t * (KSw[5] + t * KSw[6]))
+            + p
+            * (
+                KP[0]
+                + t * (KP[1] + t * (KP[2] + t * KP[3]))
+                + s * (KP[4] + t * (KP[5] + t * KP[6]))
+                + s3o2 * KP[7]
+                + p
+                * (
+                    KP[8]
+                    + t * (KP[9] + t * KP[10])
+                    + s * (KP[11] + t * (KP[12] + t * KP[13]))
+                )
+            )
+        )
+        return rho / (1.0 - p / bulkmod)
+
+    @numba.vectorize(sigs, nopython=True, cache=True)
+    def mdjwf(s, t, p):
+        s, t, p = numba.float64(s), numba.float64(t), numba.float64(p)
+        t2 = t * t
+        rho_num = (
+            num[11]
+            + t * (num[0] + t * (num[1] + num[2] * t))
+            + s * (num[3] + num[4] * t + num[5] * s)
+            + p * (num[6] + num[7] * t2 + num[8] * s + p * (num[9] + num[10] * t2))
+        )
+        rho_den = (
+            den[12]
+            + t * (den[0] + t * (den[1] + t * (den[2] + t * den[3])))
+            + s
+            * (
+                den[4]
+                + t * (den[5] + den[6] * t2)
+                + _np.sqrt(s) * (den[7] + den[8] * t2)
+            )
+            + p * (den[9] + p * t * (den[10] * t2 + den[11] * p))
+        )
+        return rho_num / rho_den
+
+    return {"jmd95": jmd95, "mdjwf": mdjwf}
+
+
 def static_pressure(Z):  # pragma: no cover
     """
     Returns the static pressure given depth.
@@ -811,9 +1011,15 @@ def get_maskH(ds, add_Hbdr, XRange, YRange, ref_lon=0):
     time this code runs, it gets applied on a dataset without faces as a
     dimension.
     """
-    if "face" in ds.dims and len(ds.X) == 4320:  # pragma: no cover
-        args = {"Xp1": slice(0, 4320, 10), "Yp1": slice(0, 4320, 10)}
-        ds = _copy.deepcopy(ds.isel(**args))
+    # Rectilinear grids: use 1D coordinates (no compute)
+    if "face" not in ds.dims:
+        vectors = _rectilinear_vectors(ds)
+        if vectors is not None:
+            return _get_maskH_rectilinear(add_Hbdr, XRange, YRange, ref_lon, *vectors)
+
+    # Face grids: prune faces and tiles using bounding boxes
+    if "face" in ds.dims:
+        return _get_maskH_faces(ds, add_Hbdr, XRange, YRange, ref_lon)
 
     maskH = _xr.ones_like(ds["XG"])
 
@@ -858,6 +1064,349 @@ def get_maskH(ds, add_Hbdr, XRange, YRange, ref_lon=0):
     return maskH, dmaskH, XRange, YRange
 
 
+def _nearest_index(values, targets):
+    """
+    Indexes of the values closest to targets
+    (the smallest value is used when two values are equally close).
+    Binary search if values are strictly monotonic, otherwise brute force.
+
+    Parameters
+    ----------
+    values: 1D numpy.ndarray
+        Coordinate values (e.g., Zp1, time).
+    targets: 1D numpy.ndarray
+        Values to look up.
+
+    Returns
+    -------
+    indexes: numpy.ndarray
+    """
+    values = _np.asarray(values)
+    targets = _np.asarray(targets)
+    if _np.issubdtype(values.dtype, _np.datetime64):
+        targets = targets.astype(values.dtype).astype("float64")
+        values = values.astype("float64")
+
+    increasing = _monotonic(values) == 1
+    if _monotonic(values) == 0:
+        # Brute force (NaNs are skipped)
+        dist = _np.fabs(values[None, :] - targets[:, None])
+        dist = _np.where(_np.isnan(dist), _np.inf, dist)
+        closest = dist == dist.min(axis=1, keepdims=True)
+        masked = _np.where(closest, values[None, :], _np.inf)
+        return _np.argmin(masked, axis=1)
+
+    # Binary search on sorted values
+    sorted_values = values if increasing else values[::-1]
+    pos = _np.searchsorted(sorted_values, targets)
+    lower = _np.clip(pos - 1, 0, len(values) - 1)
+    upper = _np.clip(pos, 0, len(values) - 1)
+    use_upper = _np.fabs(sorted_values[upper] - targets) < _np.fabs(
+        sorted_values[lower] - targets
+    )
+    indexes = _np.where(use_upper, upper, lower)
+    if not increasing:
+        indexes = len(values) - 1 - indexes
+    return indexes
+
+
+def _monotonic(values):
+    """
+    1 if values are strictly increasing, -1 if strictly decreasing, otherwise 0.
+    """
+    diff = _np.diff(values)
+    if (diff > 0).all():
+        return 1
+    if (diff < 0).all():
+        return -1
+    return 0
+
+
+def _index_range(values, valRange):
+    """
+    First and last indexes of values within valRange,
+    after moving the limits to the closest values.
+    Indexes are found by binary search if values are strictly monotonic.
+
+    Parameters
+    ----------
+    values: 1D numpy.ndarray
+        Coordinate values (e.g., Zp1, time).
+    valRange: 1D numpy.ndarray
+        Limits [min, max].
+
+    Returns
+    -------
+    indexes: list
+        [first, last]
+    valRange: numpy.ndarray
+        Limits moved to the closest values.
+    """
+    values = _np.asarray(values)
+    indexes = _nearest_index(values, valRange)
+    valRange = values[indexes]
+    if _monotonic(values) == 0:
+        indexes = _np.flatnonzero(
+            _np.logical_and(values >= valRange[0], values <= valRange[-1])
+        )
+    return [_np.min(indexes), _np.max(indexes)], valRange
+
+
+# Rows of XG and columns of YG sampled to detect curvilinear grids
+_RECTILINEAR_SAMPLES = 3
+
+
+def _rectilinear_vectors(ds):
+    """
+    Return XG and YG as 1D vectors if the grid is rectilinear,
+    otherwise None.
+    Curvilinear grids are detected from a few rows of XG and columns of YG,
+    so the 2D coordinates are not loaded.
+    Otherwise, the 2D coordinates are checked once (see _cached_spatial_index),
+    keyed by the sampled rows and columns, so that the same grid
+    with a different dask graph (e.g., rechunked) is not checked again.
+    """
+    XG, YG = ds["XG"], ds["YG"]
+    if set(XG.dims) != set(["Yp1", "Xp1"]) or set(YG.dims) != set(XG.dims):
+        return None
+    XG, YG = (da.transpose("Yp1", "Xp1") for da in (XG, YG))
+
+    # Cheap check: evenly spaced rows and columns
+    ny, nx = XG.shape
+    rows = _np.unique(_np.linspace(0, ny - 1, _RECTILINEAR_SAMPLES).astype(int))
+    cols = _np.unique(_np.linspace(0, nx - 1, _RECTILINEAR_SAMPLES).astype(int))
+    xrows, ycols = (
+        _np.ascontiguousarray(sample)
+        for sample in _dask.compute(XG.isel(Yp1=rows).data, YG.isel(Xp1=cols).data)
+    )
+    if not ((xrows == xrows[:1]).all() and (ycols == ycols[:, :1]).all()):
+        return None
+
+    def build():
+        xg, yg = XG.values, YG.values
+        if (xg == xg[:1]).all() and (yg == yg[:, :1]).all():
+            return xg[0], yg[:, 0]
+        return None
+
+    return _cached_spatial_index("rectilinear_vectors", (xrows, ycols), build)
+
+
+def _get_maskH_rectilinear(add_Hbdr, XRange, YRange, ref_lon, xg, yg):
+    """
+    Same as get_maskH, using 1D coordinates of rectilinear grids.
+    """
+    maskY = _np.ones(len(yg), dtype=bool)
+    maskX = _np.ones(len(xg), dtype=bool)
+
+    if YRange is not None:
+        YRange = _np.asarray([_np.min(YRange) - add_Hbdr, _np.max(YRange) + add_Hbdr])
+        YRange = yg[_nearest_index(yg, YRange.astype(yg.dtype))]
+        maskY = _np.logical_and(yg >= YRange[0], yg <= YRange[-1])
+
+    if XRange is not None:
+        XRange = _np.asarray([XRange[0] - add_Hbdr, XRange[-1] + add_Hbdr])
+        XRange = xg[_nearest_index(xg, XRange.astype(xg.dtype))]
+        maskX = _np.logical_and(
+            _rel_lon(xg, ref_lon) >= _rel_lon(XRange[0], ref_lon),
+            _rel_lon(xg, ref_lon) <= _rel_lon(XRange[-1], ref_lon),
+        )
+
+    # Can't be all zeros
+    if not (maskY.any() and maskX.any()):
+        raise ValueError("Zero grid points in the horizontal range")
+
+    # Horizontal indexes
+    maskH = _xr.DataArray(
+        _np.logical_and(maskY[:, None], maskX[None, :]).astype(xg.dtype),
+        dims=("Yp1", "Xp1"),
+        coords={"Yp1": _np.arange(len(yg)), "Xp1": _np.arange(len(xg))},
+    )
+    dmaskH = maskH.isel(Yp1=_np.flatnonzero(maskY), Xp1=_np.flatnonzero(maskX))
+    return maskH, dmaskH, XRange, YRange
+
+
+# Tiles along each side of a face, and minimum tile size (see _face_tile_index)
+_FACE_TILES = 16
+_FACE_TILE_MIN = 32
+
+
+def _face_tile_index(ds):
+    """
+    Bounding boxes of square tiles of XG and YG on each face.
+    Longitudes are stored as circular intervals [lon0, lon0 + lonspan],
+    so that tiles crossing the dateline are compact.
+    Bounding boxes are cached (see _cached_spatial_index),
+    so the coordinates are loaded only once.
+
+    Parameters
+    ----------
+    ds: xarray.Dataset
+        Dataset with XG and YG, and face as a dimension.
+
+    Returns
+    -------
+    index: dict
+        Tile size, and arrays (face, tileY, tileX) with
+        xmin, xmax, ymin, ymax, lon0, and lonspan.
+    """
+    XG = ds["XG"].transpose("face", "Yp1", "Xp1")
+    YG = ds["YG"].transpose("face", "Yp1", "Xp1")
+
+    def build():
+        size = -(-max(len(ds["Yp1"]), len(ds["Xp1"])) // _FACE_TILES)
+        size = max(size, _FACE_TILE_MIN)
+        stats = []
+        for da in (XG, _rel_lon(XG, 0), YG):
+            coarse = da.coarsen(Yp1=size, Xp1=size, boundary="pad")
+            stats += [coarse.min().data, coarse.max().data]
+        stats = [_np.asarray(stat) for stat in _dask.compute(*stats)]
+        xmin, xmax, x360min, x360max, ymin, ymax = stats
+
+        # Use the shortest longitude interval
+        use360 = (x360max - x360min) < (xmax - xmin)
+        return {
+            "size": size,
+            "xmin": xmin,
+            "xmax": xmax,
+            "ymin": ymin,
+            "ymax": ymax,
+            "lon0": _np.where(use360, x360min, xmin),
+            "lonspan": _np.where(use360, x360max - x360min, xmax - xmin),
+        }
+
+    return _cached_spatial_index("face_tile_bounds", (XG, YG), build)
+
+
+def _load_tiles(das, tiles, size):
+    """
+    Load tiles (face, tileY, tileX) of DataArrays (face, Yp1, Xp1) with one compute.
+    """
+    slices = [
+        (f, slice(j * size, (j + 1) * size), slice(i * size, (i + 1) * size))
+        for f, j, i in tiles
+    ]
+    loaded = _dask.compute(*[da.data[sl] for da in das for sl in slices])
+    loaded = [_np.asarray(values) for values in loaded]
+    return [loaded[k * len(slices) : (k + 1) * len(slices)] for k in range(len(das))]
+
+
+def _nearest_value_tiles(da, vmin, vmax, size, targets):
+    """
+    Values of da closest to targets (the smallest value is used when two
+    values are equally close), loading only tiles that can contain them.
+    """
+    targets = _np.asarray(targets).astype(da.dtype)
+    candidates = []
+    for target in targets:
+        # Lower and upper bounds of the distance within each tile
+        lower = _np.where(
+            target < vmin, vmin - target, _np.where(target > vmax, target - vmax, 0)
+        )
+        upper = _np.fmin(_np.fabs(target - vmin), _np.fabs(target - vmax))
+        candidates += [lower <= _np.nanmin(upper)]
+    tiles = _np.argwhere(_np.logical_or.reduce(candidates))
+    (values,) = _load_tiles([da], tiles, size)
+    values = _np.concatenate([tile.ravel() for tile in values])
+
+    for i, target in enumerate(targets):
+        diff = _np.fabs(values - target)
+        targets[i] = values[diff == _np.nanmin(diff)].min()
+    return targets
+
+
+def _lon_overlap(lon0, lonspan, XRange, ref_lon, tol=1.0e-6):
+    """
+    True where circular intervals [lon0, lon0 + lonspan] may contain
+    longitudes within XRange (see get_maskH).
+    """
+    x0, x1 = (_rel_lon(X, ref_lon) for X in XRange)
+    r0 = _rel_lon(lon0, ref_lon) - tol
+    r1 = r0 + lonspan + 2 * tol
+    return _np.logical_or.reduce(
+        [
+            lonspan >= 360 - 2 * tol,
+            _np.logical_and(r0 <= x1, r1 >= x0),
+            r1 - 360 >= x0,
+            _np.logical_and(r0 < 0, r0 + 360 <= x1),
+        ]
+    )
+
+
+def _get_maskH_faces(ds, add_Hbdr, XRange, YRange, ref_lon):
+    """
+    Same as get_maskH, for grids with face as a dimension.
+    Coarse to fine: faces and tiles are pruned using bounding boxes
+    (see _face_tile_index), and coordinates are only loaded on the
+    tiles that can be in the horizontal range.
+    maskH is returned as a lazy dask array.
+    """
+    index = _face_tile_index(ds)
+    size = index["size"]
+    XG = ds["XG"].transpose("face", "Yp1", "Xp1")
+    YG = ds["YG"].transpose("face", "Yp1", "Xp1")
+    keep = _np.isfinite(index["ymin"])
+
+    if YRange is not None:
+        YRange = _np.asarray([_np.min(YRange) - add_Hbdr, _np.max(YRange) + add_Hbdr])
+        YRange = _nearest_value_tiles(
+            YG, index["ymin"], index["ymax"], size, YRange.astype(YG.dtype)
+        )
+        keep &= _np.logical_and(index["ymax"] >= YRange[0], index["ymin"] <= YRange[-1])
+
+    if XRange is not None:
+        XRange = _np.asarray([XRange[0] - add_Hbdr, XRange[-1] + add_Hbdr])
+        XRange = _nearest_value_tiles(
+            XG, index["xmin"], index["xmax"], size, XRange.astype(XG.dtype)
+        )
+        keep &= _lon_overlap(index["lon0"], index["lonspan"], XRange, ref_lon)
+
+    # Exact mask on the remaining tiles
+    tiles = _np.argwhere(keep)
+    xg, yg = _load_tiles([XG, YG], tiles, size)
+    masks = {}
+    for tile, x, y in zip(map(tuple, tiles), xg, yg):
+        mask = _np.ones_like(x, dtype=bool)
+        if YRange is not None:
+            mask &= _np.logical_and(y >= YRange[0], y <= YRange[-1])
+        if XRange is not None:
+            mask &= _np.logical_and(
+                _rel_lon(x, ref_lon) >= _rel_lon(XRange[0], ref_lon),
+                _rel_lon(x, ref_lon) <= _rel_lon(XRange[-1], ref_lon),
+            )
+        if mask.any():
+            masks[tile] = mask
+
+    # Can't be all zeros
+    if not masks:
+        raise ValueError("Zero grid points in the horizontal range")
+
+    # Assemble the mask from tiles
+    def _mask_block(block, block_id=None):
+        if block_id in masks:
+            return masks[block_id].reshape(block.shape).astype(block.dtype)
+        return block
+
+    zeros = _da.zeros(XG.shape, chunks=(1, size, size), dtype=XG.dtype)
+    maskH = _xr.DataArray(
+        _da.map_blocks(_mask_block, zeros, dtype=XG.dtype),
+        dims=XG.dims,
+        coords={
+            "face": ds["face"].values,
+            "Yp1": _np.arange(XG.shape[1]),
+            "Xp1": _np.arange(XG.shape[2]),
+        },
+    )
+
+    # Horizontal indexes
+    faces, iY, iX = set(), set(), set()
+    for (f, j, i), mask in masks.items():
+        faces.add(f)
+        iY.update(j * size + _np.flatnonzero(mask.any(axis=1)))
+        iX.update(i * size + _np.flatnonzero(mask.any(axis=0)))
+    dmaskH = maskH.isel(face=sorted(faces), Yp1=sorted(iY), Xp1=sorted(iX))
+    return maskH, dmaskH, XRange, YRange
+
+
 def reset_dim(_ds, N, dim="mooring"):
     """resets the dimension mooring by shifting it by a value set by N"""
     _ds["n" + dim] = N + _ds[dim]